@@ -1,32 +1,123 @@
+# First, so the startup clock includes every import below
+from startup import startup_report
 import os
-import io
-import zipfile
-import requests
+import hashlib
+import hmac
+import json
 import logging
-from datetime import datetime
-from flask import Flask, request, jsonify
+import time
+from contextlib import contextmanager
+from functools import wraps
+from datetime import datetime, timezone
+from flask import Flask, Response, g, has_request_context, request, jsonify, send_file, stream_with_context
+from urllib.parse import quote
 from flask_cors import CORS
-from jinja2 import Template
 import secrets
 import string
 import random
-from dotenv import load_dotenv
+from template_registry import COMPILED_DIR, template_registry
+from cache import LRUCache, canonical_hash
+from artifacts import ArtifactStore, STATIC_FILES
+import compression
+from compression import CompressedBodyCache
+from netlify_client import NetlifyDeployer, DEFAULT_API_URL, DEPLOY_MODES, file_digest_manifest
+import jobs
+from jobs import JobManager, JobQueueFull
+from concurrent.futures import ThreadPoolExecutor
+from site_pool import SitePool
+from site_manifests import SiteManifestStore
+import readiness
+from readiness import ReadinessTracker
+from rate_limit import BACKENDS as RATE_LIMIT_BACKENDS, create_limiter
+import metrics
+from metrics import MetricsRegistry
+from profiling import ProfileStore, RequestProfile, token_matches
+import idempotency
+from idempotency import IdempotencyKeyReused, IdempotencyStore, StoredResponse
+from history import DeploymentHistory, InvalidCursor
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from a .env file next to this one; hosted
+# deploys set them directly and never import python-dotenv
+ENV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+if os.path.exists(ENV_FILE):
+    from dotenv import load_dotenv
+    load_dotenv(ENV_FILE)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+startup_report.mark('imports')
+
 app = Flask(__name__)
-CORS(app)  # Enable CORS for frontend requests
+CORS(app, expose_headers=['ETag', 'Idempotent-Replayed', 'Server-Timing', 'X-Profile-Id', 'X-Preview-Title', 'X-Preview-Description', 'X-Preview-Theme'])  # Enable CORS for frontend requests
+
+# How deployed pages carry the theme CSS: inlined in a <style> tag, or as a
+# content-hashed /assets/theme.<hash>.css shared and cached across sites
+STYLESHEET_MODES = ('inline', 'external')
 
 # Configuration
 class Config:
     NETLIFY_TOKEN = os.getenv('NETLIFY_TOKEN')
+    NETLIFY_API_URL = os.getenv('NETLIFY_API_URL', DEFAULT_API_URL)
+    NETLIFY_DEPLOY_MODE = os.getenv('NETLIFY_DEPLOY_MODE', 'zip').lower()
+    NETLIFY_UPLOAD_CONCURRENCY = int(os.getenv('NETLIFY_UPLOAD_CONCURRENCY', '4'))
+    NETLIFY_POOL_SIZE = int(os.getenv('NETLIFY_POOL_SIZE', '10'))
+    NETLIFY_CONNECT_TIMEOUT = float(os.getenv('NETLIFY_CONNECT_TIMEOUT', '5'))
+    NETLIFY_READ_TIMEOUT = float(os.getenv('NETLIFY_READ_TIMEOUT', '25'))
+    DEPLOY_JOB_WORKERS = int(os.getenv('DEPLOY_JOB_WORKERS', '4'))
+    DEPLOY_JOB_QUEUE_SIZE = int(os.getenv('DEPLOY_JOB_QUEUE_SIZE', '32'))
+    DEPLOY_JOB_TTL = int(os.getenv('DEPLOY_JOB_TTL', '3600'))
+    DEPLOY_JOB_LEASE = float(os.getenv('DEPLOY_JOB_LEASE', '60'))
+    DEPLOY_JOB_STREAM_MAX_SECONDS = float(os.getenv('DEPLOY_JOB_STREAM_MAX_SECONDS', '600'))
+    MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '50'))
+    BATCH_DEPLOY_CONCURRENCY = int(os.getenv('BATCH_DEPLOY_CONCURRENCY', '8'))
+    SITE_POOL_SIZE = int(os.getenv('SITE_POOL_SIZE', '0'))
+    SITE_POOL_LOW_WATERMARK = int(os.getenv('SITE_POOL_LOW_WATERMARK', str(SITE_POOL_SIZE // 2)))
+    SITE_POOL_REFILL_PER_MINUTE = int(os.getenv('SITE_POOL_REFILL_PER_MINUTE', '30'))
+    READINESS_POLL_INTERVAL = float(os.getenv('READINESS_POLL_INTERVAL', '1'))
+    READINESS_MAX_POLL_INTERVAL = float(os.getenv('READINESS_MAX_POLL_INTERVAL', '10'))
+    READINESS_MAX_AGE = int(os.getenv('READINESS_MAX_AGE', '300'))
+    READINESS_MAX_WAIT = float(os.getenv('READINESS_MAX_WAIT', '25'))
+    READINESS_MAX_TRACKED = int(os.getenv('READINESS_MAX_TRACKED', '10000'))
+    SITE_TOKEN_SECRET = os.getenv('SITE_TOKEN_SECRET', '')
+    SITE_MANIFEST_CACHE_SIZE = int(os.getenv('SITE_MANIFEST_CACHE_SIZE', '1024'))
+    IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', '86400'))
+    IDEMPOTENCY_MAX_ENTRIES = int(os.getenv('IDEMPOTENCY_MAX_ENTRIES', '10000'))
+    IDEMPOTENCY_MAX_BYTES = int(os.getenv('IDEMPOTENCY_MAX_BYTES', str(16 * 1024 * 1024)))
+    IDEMPOTENCY_WAIT = float(os.getenv('IDEMPOTENCY_WAIT', '60'))
+    IDEMPOTENCY_LEASE = float(os.getenv('IDEMPOTENCY_LEASE', '300'))
+    HISTORY_DB_PATH = os.getenv('HISTORY_DB_PATH', '/tmp/landing-history.sqlite3')
+    HISTORY_QUEUE_SIZE = int(os.getenv('HISTORY_QUEUE_SIZE', '10000'))
+    HISTORY_PAGE_SIZE = int(os.getenv('HISTORY_PAGE_SIZE', '50'))
+    HISTORY_MAX_PAGE_SIZE = int(os.getenv('HISTORY_MAX_PAGE_SIZE', '200'))
     MAX_DEPLOYS_PER_HOUR = int(os.getenv('MAX_DEPLOYS_PER_HOUR', '10'))
+    RATE_LIMIT_MAX_CLIENTS = int(os.getenv('RATE_LIMIT_MAX_CLIENTS', '100000'))
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory').lower()
+    RATE_LIMIT_SQLITE_PATH = os.getenv('RATE_LIMIT_SQLITE_PATH', '/tmp/landing-rate-limit.sqlite3')
+    IDEMPOTENCY_DB_PATH = os.getenv('IDEMPOTENCY_DB_PATH', RATE_LIMIT_SQLITE_PATH)
+    DEPLOY_JOB_DB_PATH = os.getenv('DEPLOY_JOB_DB_PATH', RATE_LIMIT_SQLITE_PATH)
+    SITE_POOL_DB_PATH = os.getenv('SITE_POOL_DB_PATH', RATE_LIMIT_SQLITE_PATH)
+    SITE_MANIFEST_DB_PATH = os.getenv('SITE_MANIFEST_DB_PATH', RATE_LIMIT_SQLITE_PATH)
+    REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    RATE_LIMIT_STATS_TTL = float(os.getenv('RATE_LIMIT_STATS_TTL', '60'))
     DEBUG = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
+    RENDER_CACHE_MAX_ENTRIES = int(os.getenv('RENDER_CACHE_MAX_ENTRIES', '512'))
+    RENDER_CACHE_MAX_BYTES = int(os.getenv('RENDER_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))
+    RENDER_CACHE_TTL = int(os.getenv('RENDER_CACHE_TTL', '600'))
+    ARTIFACT_CACHE_MAX_BYTES = int(os.getenv('ARTIFACT_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+    ZIP_STREAM_THRESHOLD = int(os.getenv('ZIP_STREAM_THRESHOLD', str(256 * 1024)))
+    THEME_CSS_CACHE_SIZE = int(os.getenv('THEME_CSS_CACHE_SIZE', '256'))
+    STYLESHEET_MODE = os.getenv('STYLESHEET_MODE', 'inline').lower()
+    PREVIEW_COMPRESSION_CACHE_MAX_BYTES = int(os.getenv('PREVIEW_COMPRESSION_CACHE_MAX_BYTES', str(8 * 1024 * 1024)))
+    METRICS_DIR = os.getenv('METRICS_DIR', '')
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False').lower() == 'true'
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+    PROFILE_DIR = os.getenv('PROFILE_DIR', '/tmp/landing-profiles')
+    PROFILE_HISTORY = int(os.getenv('PROFILE_HISTORY', '20'))
+    PRECOMPILED_TEMPLATES_DIR = os.getenv('PRECOMPILED_TEMPLATES_DIR', COMPILED_DIR)
+    WARM_UP = os.getenv('WARM_UP', 'True').lower() == 'true'
 
 config = Config()
 
@@ -35,50 +126,156 @@ if not config.NETLIFY_TOKEN:
     logger.error("NETLIFY_TOKEN environment variable is required")
     raise ValueError("NETLIFY_TOKEN environment variable is required")
 
-# Rate limiting storage (in production, use Redis or database)
-deploy_tracker = {}
+if config.NETLIFY_DEPLOY_MODE not in DEPLOY_MODES:
+    logger.error(f"NETLIFY_DEPLOY_MODE must be one of {', '.join(DEPLOY_MODES)}")
+    raise ValueError(f"NETLIFY_DEPLOY_MODE must be one of {', '.join(DEPLOY_MODES)}")
 
-class NetlifyDeployer:
-    """Handles Netlify deployment operations"""
-    
-    def __init__(self, token):
-        self.token = token
-        self.base_url = "https://api.netlify.com/api/v1"
-        self.headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
-    
-    def create_site(self, site_name):
-        """Create a new Netlify site"""
-        url = f"{self.base_url}/sites"
-        payload = {
-            "name": site_name,
-            "custom_domain": None,
-            "force_ssl": True,
-            "published": True
-        }
-        
-        response = requests.post(url, json=payload, headers=self.headers)
-        if response.status_code == 201:
-            return response.json()
-        else:
-            logger.error(f"Failed to create site: {response.text}")
-            raise Exception(f"Failed to create site: {response.text}")
-    
-    def deploy_site(self, site_id, zip_content):
-        """Deploy files to an existing Netlify site"""
-        url = f"{self.base_url}/sites/{site_id}/deploys"
-        
-        files = {"zip": ("site.zip", zip_content, "application/zip")}
-        headers = {"Authorization": f"Bearer {self.token}"}
-        
-        response = requests.post(url, files=files, headers=headers)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            logger.error(f"Failed to deploy site: {response.text}")
-            raise Exception(f"Failed to deploy site: {response.text}")
+if config.STYLESHEET_MODE not in STYLESHEET_MODES:
+    logger.error(f"STYLESHEET_MODE must be one of {', '.join(STYLESHEET_MODES)}")
+    raise ValueError(f"STYLESHEET_MODE must be one of {', '.join(STYLESHEET_MODES)}")
+
+if config.RATE_LIMIT_BACKEND not in RATE_LIMIT_BACKENDS:
+    logger.error(f"RATE_LIMIT_BACKEND must be one of {', '.join(RATE_LIMIT_BACKENDS)}")
+    raise ValueError(f"RATE_LIMIT_BACKEND must be one of {', '.join(RATE_LIMIT_BACKENDS)}")
+
+# Per-client deploy limiter; the sqlite and redis backends share their
+# counters across every gunicorn worker
+deploy_limiter = create_limiter(
+    config.RATE_LIMIT_BACKEND,
+    limit=config.MAX_DEPLOYS_PER_HOUR,
+    window=3600,
+    max_clients=config.RATE_LIMIT_MAX_CLIENTS,
+    sqlite_path=config.RATE_LIMIT_SQLITE_PATH,
+    redis_url=config.REDIS_URL,
+    stats_ttl=config.RATE_LIMIT_STATS_TTL
+)
+
+# Prometheus metrics, merged across gunicorn workers through METRICS_DIR
+metrics_registry = MetricsRegistry(config.METRICS_DIR, flush_interval=config.METRICS_FLUSH_INTERVAL)
+deploy_stage_seconds = metrics_registry.histogram(
+    'landing_deploy_stage_seconds', 'Time spent in each stage of a deploy', ['stage']
+)
+preview_seconds = metrics_registry.histogram(
+    'landing_preview_seconds', 'Time to build a preview response'
+)
+http_responses = metrics_registry.counter(
+    'landing_http_responses_total', 'HTTP responses by endpoint and status code', ['endpoint', 'code']
+)
+deploys_in_flight = metrics_registry.gauge(
+    'landing_deploys_in_flight', 'Deploy pipelines currently running'
+)
+deploys_awaiting_ready = metrics_registry.gauge(
+    'landing_deploys_awaiting_ready', 'Deploys uploaded to Netlify but not yet live',
+    function=lambda: deploy_readiness.in_flight()
+)
+idempotent_requests = metrics_registry.counter(
+    'landing_idempotent_requests_total',
+    'Deploy requests by idempotency outcome (lead, follow, replay, conflict)',
+    ['outcome']
+)
+rate_limit_tracked_clients = metrics_registry.gauge(
+    'landing_rate_limit_tracked_clients',
+    'Clients tracked by the deploy rate limiter',
+    # Shared backends report the same store from every worker
+    aggregate='sum' if config.RATE_LIMIT_BACKEND == 'memory' else 'max',
+    function=lambda: deploy_limiter.stats().get('tracked_clients')
+)
+
+# Opt-in ?profile=1 captures, shared by every worker through PROFILE_DIR
+profile_store = ProfileStore(config.PROFILE_DIR, history=config.PROFILE_HISTORY)
+
+# Landing page templates, compiled once at load and shared by all requests.
+# Rendering is two-stage: THEME_STYLESHEET depends only on the theme colours
+# and is cached per colour tuple; LANDING_TEMPLATE fills in the page text.
+LANDING_TEMPLATE = 'landing.html'
+THEME_STYLESHEET = 'theme.css'
+THEME_COLOR_KEYS = ('primary', 'secondary', 'accent', 'text', 'background')
+# Deployed path of the external stylesheet, see HTMLGenerator.generate_site
+THEME_ASSET_PATH = 'assets/theme.{hash}.css'
+startup_report.mark('setup')
+# Modules built by compile_templates.py skip the Jinja compiler; without them
+# (or if they are stale) the templates are compiled from source here
+precompiled_templates = bool(config.PRECOMPILED_TEMPLATES_DIR) and template_registry.use_compiled(
+    config.PRECOMPILED_TEMPLATES_DIR
+)
+template_registry.warm(LANDING_TEMPLATE, THEME_STYLESHEET)
+startup_report.mark('templates', precompiled_templates=precompiled_templates)
+
+# Rendered pages keyed by a canonical hash of the template inputs
+render_cache = LRUCache(
+    max_entries=config.RENDER_CACHE_MAX_ENTRIES,
+    max_bytes=config.RENDER_CACHE_MAX_BYTES,
+    ttl=config.RENDER_CACHE_TTL
+)
+
+# Stage-one stylesheets keyed by theme colour tuple
+theme_css_cache = LRUCache(max_entries=config.THEME_CSS_CACHE_SIZE)
+
+# Deploy ZIPs keyed by a content hash of the page HTML
+artifact_store = ArtifactStore(max_bytes=config.ARTIFACT_CACHE_MAX_BYTES)
+
+# Gzip/brotli preview bodies keyed by body hash and encoding
+preview_compression = CompressedBodyCache(max_bytes=config.PREVIEW_COMPRESSION_CACHE_MAX_BYTES)
+
+# Last deploy of each site (file manifest, deploy id, URLs) for redeploys,
+# shared by every worker so none diffs against a deploy another replaced
+site_manifests = SiteManifestStore(config.SITE_MANIFEST_DB_PATH, max_entries=config.SITE_MANIFEST_CACHE_SIZE)
+
+# Key for the site tokens that authorize redeploys; derived from the
+# Netlify token unless set, so every worker issues the same tokens
+SITE_TOKEN_KEY = (config.SITE_TOKEN_SECRET or f'site-token:{config.NETLIFY_TOKEN}').encode('utf-8')
+
+# Deploy responses by Idempotency-Key, and requests currently in flight,
+# shared by every worker through the same SQLite file as the rate limiter
+idempotency_store = IdempotencyStore(
+    config.IDEMPOTENCY_DB_PATH,
+    max_entries=config.IDEMPOTENCY_MAX_ENTRIES,
+    max_bytes=config.IDEMPOTENCY_MAX_BYTES,
+    ttl=config.IDEMPOTENCY_TTL,
+    lease=config.IDEMPOTENCY_LEASE
+)
+
+# Log of every deploy, written off the request path by a background thread
+deployment_history = DeploymentHistory(config.HISTORY_DB_PATH, queue_size=config.HISTORY_QUEUE_SIZE)
+
+# Static site files, encoded once for digest-mode deploys
+STATIC_FILE_BYTES = {path: content.encode('utf-8') for path, content in STATIC_FILES.items()}
+
+# Process-wide Netlify client with a pooled keep-alive session
+netlify_deployer = NetlifyDeployer(
+    config.NETLIFY_TOKEN,
+    base_url=config.NETLIFY_API_URL,
+    upload_concurrency=config.NETLIFY_UPLOAD_CONCURRENCY,
+    pool_size=config.NETLIFY_POOL_SIZE,
+    connect_timeout=config.NETLIFY_CONNECT_TIMEOUT,
+    read_timeout=config.NETLIFY_READ_TIMEOUT
+)
+
+# Background executor for asynchronous deploys; job state and events are
+# kept in SQLite so any worker can answer for a job
+deploy_jobs = JobManager(
+    config.DEPLOY_JOB_DB_PATH,
+    max_workers=config.DEPLOY_JOB_WORKERS,
+    max_queue=config.DEPLOY_JOB_QUEUE_SIZE,
+    ttl=config.DEPLOY_JOB_TTL,
+    lease=config.DEPLOY_JOB_LEASE
+)
+
+# Shared by every batch so the total number of concurrent Netlify
+# pipelines stays bounded no matter how many batches are in flight
+batch_executor = ThreadPoolExecutor(
+    max_workers=config.BATCH_DEPLOY_CONCURRENCY,
+    thread_name_prefix='batch-deploy'
+)
+
+class ValidationError(Exception):
+    """Raised when a request payload fails validation"""
+
+class SiteAccessError(Exception):
+    """Raised when a redeploy names a site the client may not update"""
+
+class SiteNotFound(Exception):
+    """Raised when a redeploy names a site Netlify doesn't know"""
 
 class HTMLGenerator:
     """Generates HTML content for landing pages"""
@@ -92,505 +289,667 @@ class HTMLGenerator:
     
     @staticmethod
     def create_html_template():
-        """Create Jinja2 template for HTML generation"""
-        return Template("""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{{ title }}</title>
-    <meta name="description" content="{{ description }}">
-    <meta name="keywords" content="landing page, business, professional, {{ title }}">
-    <meta name="author" content="{{ title }}">
-    
-    <!-- Open Graph Meta Tags -->
-    <meta property="og:title" content="{{ title }}">
-    <meta property="og:description" content="{{ description }}">
-    <meta property="og:type" content="website">
-    <meta property="og:image" content="/og-image.jpg">
-    
-    <!-- Twitter Card Meta Tags -->
-    <meta name="twitter:card" content="summary_large_image">
-    <meta name="twitter:title" content="{{ title }}">
-    <meta name="twitter:description" content="{{ description }}">
-    <meta name="twitter:image" content="/og-image.jpg">
-    
-    <style>
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
-        
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            line-height: 1.6;
-            color: {{ theme.colors.text if theme else '#333' }};
-            overflow-x: hidden;
-        }
-        
-        .container {
-            max-width: 1200px;
-            margin: 0 auto;
-            padding: 0 20px;
-        }
-        
-        /* Header Section */
-        .header {
-            background: {{ theme.colors.primary if theme else 'linear-gradient(135deg, #667eea 0%, #764ba2 100%)' }};
-            {% if theme and theme.colors %}
-            background: linear-gradient(135deg, {{ theme.colors.primary }} 0%, {{ theme.colors.secondary }} 100%);
-            {% endif %}
-            color: white;
-            padding: 100px 0;
-            text-align: center;
-            position: relative;
-            overflow: hidden;
-        }
-        
-        .header::before {
-            content: '';
-            position: absolute;
-            top: 0;
-            left: 0;
-            right: 0;
-            bottom: 0;
-            background: url('data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 1000 100" preserveAspectRatio="none"><polygon fill="rgba(255,255,255,0.1)" points="1000,0 1000,100 0,100"/></svg>');
-            background-size: cover;
-        }
-        
-        .header h1 {
-            font-size: 3.5rem;
-            font-weight: 700;
-            margin-bottom: 20px;
-            position: relative;
-            z-index: 1;
-        }
-        
-        .header p {
-            font-size: 1.3rem;
-            margin-bottom: 40px;
-            opacity: 0.95;
-            max-width: 600px;
-            margin-left: auto;
-            margin-right: auto;
-            position: relative;
-            z-index: 1;
-        }
-        
-        .cta-button {
-            display: inline-block;
-            background: {{ theme.colors.accent if theme else '#ff6b6b' }};
-            color: white;
-            padding: 18px 40px;
-            text-decoration: none;
-            border-radius: 50px;
-            font-weight: 600;
-            font-size: 1.1rem;
-            transition: all 0.3s ease;
-            position: relative;
-            z-index: 1;
-            box-shadow: 0 4px 15px rgba(0,0,0,0.2);
-        }
-        
-        .cta-button:hover {
-            transform: translateY(-3px);
-            box-shadow: 0 6px 20px rgba(0,0,0,0.3);
-        }
-        
-        /* Features Section */
-        .features {
-            padding: 100px 0;
-            background: {{ theme.colors.background if theme else '#f8f9fa' }};
-        }
-        
-        .features h2 {
-            text-align: center;
-            font-size: 2.5rem;
-            margin-bottom: 60px;
-            color: {{ theme.colors.text if theme else '#2c3e50' }};
-        }
-        
-        .features-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
-            gap: 40px;
-            margin-top: 60px;
-        }
-        
-        .feature-card {
-            background: white;
-            padding: 40px 30px;
-            border-radius: 15px;
-            text-align: center;
-            box-shadow: 0 10px 30px rgba(0,0,0,0.1);
-            transition: all 0.3s ease;
-            border-top: 4px solid {{ theme.colors.accent if theme else '#3498db' }};
-        }
-        
-        .feature-card:hover {
-            transform: translateY(-10px);
-            box-shadow: 0 20px 40px rgba(0,0,0,0.15);
-        }
-        
-        .feature-icon {
-            font-size: 3rem;
-            margin-bottom: 20px;
-        }
-        
-        .feature-card h3 {
-            font-size: 1.5rem;
-            margin-bottom: 15px;
-            color: {{ theme.colors.text if theme else '#2c3e50' }};
-        }
-        
-        .feature-card p {
-            color: {{ theme.colors.text if theme else '#666' }};
-            opacity: 0.8;
-        }
-        
-        /* Contact Section */
-        .contact {
-            padding: 100px 0;
-            background: {{ theme.colors.primary if theme else 'linear-gradient(135deg, #667eea 0%, #764ba2 100%)' }};
-            {% if theme and theme.colors %}
-            background: linear-gradient(135deg, {{ theme.colors.primary }} 0%, {{ theme.colors.secondary }} 100%);
-            {% endif %}
-            color: white;
-            text-align: center;
-        }
-        
-        .contact h2 {
-            font-size: 2.5rem;
-            margin-bottom: 20px;
-        }
-        
-        .contact p {
-            font-size: 1.2rem;
-            margin-bottom: 40px;
-            opacity: 0.9;
-        }
-        
-        .contact-form {
-            max-width: 600px;
-            margin: 0 auto;
-        }
-        
-        .form-group {
-            margin-bottom: 20px;
-        }
-        
-        .form-group input,
-        .form-group textarea {
-            width: 100%;
-            padding: 15px;
-            border: none;
-            border-radius: 8px;
-            font-size: 1rem;
-            background: rgba(255, 255, 255, 0.1);
-            color: white;
-            border: 2px solid transparent;
-            transition: all 0.3s ease;
-        }
-        
-        .form-group input::placeholder,
-        .form-group textarea::placeholder {
-            color: rgba(255, 255, 255, 0.7);
-        }
-        
-        .form-group input:focus,
-        .form-group textarea:focus {
-            outline: none;
-            border-color: {{ theme.colors.accent if theme else '#ff6b6b' }};
-            background: rgba(255, 255, 255, 0.15);
-        }
-        
-        .form-group textarea {
-            height: 120px;
-            resize: vertical;
-        }
-        
-        .submit-button {
-            background: {{ theme.colors.accent if theme else '#ff6b6b' }};
-            color: white;
-            padding: 15px 40px;
-            border: none;
-            border-radius: 50px;
-            font-size: 1.1rem;
-            font-weight: 600;
-            cursor: pointer;
-            transition: all 0.3s ease;
-        }
-        
-        .submit-button:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 4px 15px rgba(0,0,0,0.2);
-        }
-        
-        /* Footer */
-        .footer {
-            background: #1a252f;
-            color: white;
-            padding: 40px 0;
-            text-align: center;
-        }
-        
-        .footer p {
-            margin-bottom: 20px;
-        }
-        
-        .social-links a {
-            color: {{ theme.colors.accent if theme else '#ff6b6b' }};
-            text-decoration: none;
-            margin: 0 15px;
-            font-weight: 500;
-            transition: color 0.3s ease;
-        }
-        
-        .social-links a:hover {
-            opacity: 0.8;
-        }
-        
-        /* Built with Bolt.new Badge */
-        .bolt-badge {
-            position: fixed;
-            bottom: 20px;
-            right: 20px;
-            background: linear-gradient(135deg, #6366f1 0%, #8b5cf6 100%);
-            color: white;
-            padding: 8px 16px;
-            border-radius: 25px;
-            font-size: 0.85rem;
-            font-weight: 600;
-            text-decoration: none;
-            box-shadow: 0 4px 15px rgba(99, 102, 241, 0.3);
-            transition: all 0.3s ease;
-            z-index: 1000;
-            border: 2px solid rgba(255, 255, 255, 0.1);
-        }
-        
-        .bolt-badge:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 6px 20px rgba(99, 102, 241, 0.4);
-            color: white;
-        }
-        
-        .bolt-badge::before {
-            content: '⚡';
-            margin-right: 6px;
-        }
-        
-        /* Responsive Design */
-        @media (max-width: 768px) {
-            .header h1 {
-                font-size: 2.5rem;
-            }
-            
-            .header p {
-                font-size: 1.1rem;
-            }
-            
-            .features h2,
-            .contact h2 {
-                font-size: 2rem;
-            }
-            
-            .features-grid {
-                grid-template-columns: 1fr;
-            }
-            
-            .bolt-badge {
-                bottom: 10px;
-                right: 10px;
-                padding: 6px 12px;
-                font-size: 0.8rem;
-            }
+        """Return the compiled Jinja2 template for HTML generation"""
+        return template_registry.get(LANDING_TEMPLATE)
+    
+    @staticmethod
+    def theme_stylesheet_key(theme):
+        """Cache key for a theme's stylesheet, or None if it can't be cached
+        
+        Keys on exactly what theme.css reads: whether ``colors`` is empty
+        (it picks the gradient on that) and the named colours. Colours that
+        aren't strings aren't cached, since ``1`` and ``True`` hash alike but
+        render differently.
+        """
+        if not theme:
+            return ()
+        colors = theme.get('colors')
+        if not isinstance(colors, dict):
+            return None
+        values = tuple(colors.get(name) for name in THEME_COLOR_KEYS)
+        if not all(value is None or isinstance(value, str) for value in values):
+            return None
+        return (bool(colors),) + values
+    
+    @classmethod
+    def generate_theme_stylesheet(cls, theme=None):
+        """Stage one: render the page stylesheet, cached per theme colour tuple"""
+        key = cls.theme_stylesheet_key(theme)
+        if key is None:
+            return template_registry.render(THEME_STYLESHEET, theme=theme)
+        return theme_css_cache.get_or_set(
+            key,
+            lambda: template_registry.render(THEME_STYLESHEET, theme=theme)
+        )
+    
+    @staticmethod
+    def stylesheet_asset_path(stylesheet):
+        """Deployed path of a stylesheet, named after a hash of its contents"""
+        digest = hashlib.sha256(stylesheet.encode('utf-8')).hexdigest()
+        return THEME_ASSET_PATH.format(hash=digest[:16])
+    
+    @classmethod
+    def generate_landing_page(cls, title, description, theme=None, stylesheet_href=None):
+        """Generate HTML content for a landing page with optional theme
+        
+        With ``stylesheet_href`` the page links to that stylesheet instead of
+        inlining the theme CSS.
+        """
+        # Stage two: only the page text is rendered per request
+        return template_registry.render(
+            LANDING_TEMPLATE,
+            **cls.landing_page_context(title, description, theme, stylesheet_href)
+        )
+    
+    @classmethod
+    def landing_page_context(cls, title, description, theme=None, stylesheet_href=None):
+        """Template variables for the landing page"""
+        return {
+            'title': title,
+            'description': description,
+            'current_year': datetime.now().year,
+            'stylesheet': None if stylesheet_href else cls.generate_theme_stylesheet(theme),
+            'stylesheet_href': stylesheet_href
         }
-    </style>
-</head>
-<body>
-    <!-- Header Section -->
-    <section class="header">
-        <div class="container">
-            <h1>{{ title }}</h1>
-            <p>{{ description }}</p>
-            <a href="#contact" class="cta-button">Get Started Today</a>
-        </div>
-    </section>
-
-    <!-- Features Section -->
-    <section class="features">
-        <div class="container">
-            <h2>Why Choose Us?</h2>
-            <div class="features-grid">
-                <div class="feature-card">
-                    <div class="feature-icon">🚀</div>
-                    <h3>Fast & Reliable</h3>
-                    <p>Built with modern technology to ensure optimal performance and reliability for your needs.</p>
-                </div>
-                <div class="feature-card">
-                    <div class="feature-icon">💡</div>
-                    <h3>Innovative Solutions</h3>
-                    <p>Cutting-edge features and functionalities designed to give you a competitive advantage.</p>
-                </div>
-                <div class="feature-card">
-                    <div class="feature-icon">🎯</div>
-                    <h3>Results Focused</h3>
-                    <p>Every feature is designed with your success in mind, delivering measurable results.</p>
-                </div>
-            </div>
-        </div>
-    </section>
-
-    <!-- Contact Section -->
-    <section class="contact" id="contact">
-        <div class="container">
-            <h2>Ready to Get Started?</h2>
-            <p>Contact us today and let's discuss how we can help you achieve your goals.</p>
-            
-            <form class="contact-form" id="contactForm">
-                <div class="form-group">
-                    <input type="text" name="name" placeholder="Your Name" required>
-                </div>
-                <div class="form-group">
-                    <input type="email" name="email" placeholder="Your Email" required>
-                </div>
-                <div class="form-group">
-                    <textarea name="message" placeholder="Your Message" required></textarea>
-                </div>
-                <button type="submit" class="submit-button">Send Message</button>
-            </form>
-        </div>
-    </section>
-
-    <!-- Footer -->
-    <footer class="footer">
-        <div class="container">
-            <p>&copy; {{ current_year }} {{ title }}. All rights reserved.</p>
-            <div class="social-links">
-                <a href="#" target="_blank">Twitter</a>
-                <a href="#" target="_blank">LinkedIn</a>
-                <a href="#" target="_blank">Facebook</a>
-                <a href="#" target="_blank">Instagram</a>
-            </div>
-        </div>
-    </footer>
-
-    <!-- Built with Bolt.new Badge -->
-    <a href="https://bolt.new" target="_blank" class="bolt-badge">
-        Built with Bolt.new
-    </a>
-
-    <script>
-        // Smooth scrolling for anchor links
-        document.querySelectorAll('a[href^="#"]').forEach(anchor => {
-            anchor.addEventListener('click', function (e) {
-                e.preventDefault();
-                const target = document.querySelector(this.getAttribute('href'));
-                if (target) {
-                    target.scrollIntoView({
-                        behavior: 'smooth',
-                        block: 'start'
-                    });
-                }
-            });
-        });
-
-        // Form submission handler
-        document.getElementById('contactForm').addEventListener('submit', function(e) {
-            e.preventDefault();
-            
-            // Simple form validation
-            const formData = new FormData(this);
-            const name = formData.get('name');
-            const email = formData.get('email');
-            const message = formData.get('message');
-            
-            if (!name || !email || !message) {
-                alert('Please fill in all fields.');
-                return;
-            }
-            
-            // Simulate form submission
-            alert('Thank you for your message! We will get back to you soon.');
-            this.reset();
-        });
-        
-        // Add scroll effect for header
-        window.addEventListener('scroll', function() {
-            const scrolled = window.pageYOffset;
-            const header = document.querySelector('.header');
-            header.style.transform = `translateY(${scrolled * 0.5}px)`;
-        });
-    </script>
-</body>
-</html>
-        """)
     
     @classmethod
-    def generate_landing_page(cls, title, description, theme=None):
-        """Generate HTML content for a landing page with optional theme"""
-        template = cls.create_html_template()
+    def cached_landing_page(cls, title, description, theme=None):
+        """Return the cached render for these inputs, or None"""
+        key = cls.render_cache_key(title, description, theme, datetime.now().year)
+        return render_cache.get(key)
+    
+    @classmethod
+    def stream_landing_page(cls, title, description, theme=None):
+        """Return an iterator over a landing page's chunks as it renders
+        
+        The finished page is stored in the render cache, so the next identical
+        preview is served from memory.
+        """
+        key = cls.render_cache_key(title, description, theme, datetime.now().year)
+        # The context (and so the stylesheet) is built before anything is
+        # sent, so a bad theme still fails with an error status
+        context = cls.landing_page_context(title, description, theme)
+        
+        def chunks():
+            parts = []
+            for chunk in template_registry.generate(LANDING_TEMPLATE, **context):
+                parts.append(chunk)
+                yield chunk
+            render_cache.set(key, ''.join(parts))
+        
+        return chunks()
+    
+    @staticmethod
+    def render_cache_key(title, description, theme, current_year, stylesheet_href=None):
+        """Canonical cache key covering every input the template reads"""
+        # Only theme.colors reaches the template; the theme id/name do not
+        colors = theme.get('colors') if theme else None
+        return canonical_hash(title, description, bool(theme), colors, current_year, stylesheet_href)
+    
+    @classmethod
+    def generate_cached_landing_page(cls, title, description, theme=None, stylesheet_href=None):
+        """Generate a landing page, reusing a cached render for identical input"""
         current_year = datetime.now().year
-        
-        return template.render(
-            title=title,
-            description=description,
-            current_year=current_year,
-            theme=theme
+        key = cls.render_cache_key(title, description, theme, current_year, stylesheet_href)
+        return render_cache.get_or_set(
+            key,
+            lambda: cls.generate_landing_page(title, description, theme, stylesheet_href)
         )
     
+    @classmethod
+    def generate_site(cls, title, description, theme=None):
+        """Generate a deployed page and its extra asset files
+        
+        Returns ``(html_content, extra_files)`` where extra_files is a tuple of
+        ``(path, bytes)`` pairs. In external stylesheet mode the theme CSS is
+        shipped as a content-hashed asset, so sites with the same theme share
+        one immutable, long-cached file.
+        """
+        if config.STYLESHEET_MODE != 'external':
+            return cls.generate_cached_landing_page(title, description, theme), ()
+        
+        stylesheet = cls.generate_theme_stylesheet(theme)
+        path = cls.stylesheet_asset_path(stylesheet)
+        html_content = cls.generate_cached_landing_page(title, description, theme, stylesheet_href='/' + path)
+        return html_content, ((path, stylesheet.encode('utf-8')),)
+    
+    @staticmethod
+    def site_files(html_content, extra_files=()):
+        """Return the generated site as a mapping of path to file bytes"""
+        files = {'index.html': html_content.encode('utf-8')}
+        files.update(extra_files)
+        files.update(STATIC_FILE_BYTES)
+        return files
+    
     @staticmethod
     def create_zip_file(html_content):
         """Create a ZIP file containing the HTML content"""
-        zip_buffer = io.BytesIO()
-        
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            # Add index.html
-            zip_file.writestr('index.html', html_content)
-            
-            # Add _redirects file for Netlify SPA routing
-            zip_file.writestr('_redirects', '/* /index.html 200')
-            
-            # Add netlify.toml for configuration
-            netlify_config = """
-[build]
-  publish = "."
-
-[[headers]]
-  for = "/*"
-  [headers.values]
-    X-Frame-Options = "DENY"
-    X-XSS-Protection = "1; mode=block"
-    X-Content-Type-Options = "nosniff"
-    Referrer-Policy = "strict-origin-when-cross-origin"
-"""
-            zip_file.writestr('netlify.toml', netlify_config)
-        
-        zip_buffer.seek(0)
-        return zip_buffer.getvalue()
+        # Static members are precompressed and whole archives are cached by
+        # content hash, see artifacts.ArtifactStore
+        return artifact_store.get_zip(html_content)
+    
+    @staticmethod
+    def create_upload_zip(html_content, extra_files=()):
+        """Create the deploy ZIP for upload, streamed in chunks for large sites"""
+        return artifact_store.for_upload(html_content, extra_files, config.ZIP_STREAM_THRESHOLD)
+
+# Pre-created sites so deploys can skip the create_site round trip, shared
+# by every worker so recycling one doesn't strand its sites
+site_pool = SitePool(
+    config.SITE_POOL_DB_PATH,
+    netlify_deployer.create_site,
+    HTMLGenerator.generate_site_name,
+    size=config.SITE_POOL_SIZE,
+    low_watermark=config.SITE_POOL_LOW_WATERMARK,
+    refill_per_minute=config.SITE_POOL_REFILL_PER_MINUTE
+)
+
+# Polls started deploys until Netlify serves them; waited on by /ready
+deploy_readiness = ReadinessTracker(
+    netlify_deployer.get_deploy,
+    initial_interval=config.READINESS_POLL_INTERVAL,
+    max_interval=config.READINESS_MAX_POLL_INTERVAL,
+    max_age=config.READINESS_MAX_AGE,
+    ttl=config.DEPLOY_JOB_TTL,
+    max_tracked=config.READINESS_MAX_TRACKED
+)
+
+def record_server_timing(name, seconds):
+    """Add a duration to this request's Server-Timing header"""
+    if has_request_context():
+        g.setdefault('server_timing', []).append((name, seconds))
+
+@contextmanager
+def deploy_stage(stage):
+    """Time a deploy stage into its histogram and the Server-Timing header"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        deploy_stage_seconds.observe(elapsed, stage=stage)
+        record_server_timing(stage, elapsed)
 
 def check_rate_limit(client_ip):
-    """Basic rate limiting implementation"""
-    current_hour = datetime.now().hour
-    if client_ip not in deploy_tracker:
-        deploy_tracker[client_ip] = {}
-    
-    if current_hour not in deploy_tracker[client_ip]:
-        deploy_tracker[client_ip][current_hour] = 0
-    
-    # Clean old hours
-    deploy_tracker[client_ip] = {
-        hour: count for hour, count in deploy_tracker[client_ip].items()
-        if hour >= current_hour - 1
+    """Count a deploy for client_ip and return whether it is within the hourly limit"""
+    try:
+        return deploy_limiter.hit(client_ip or 'unknown')
+    except Exception as e:
+        # Fail open: an unreachable limiter store shouldn't take deploys down
+        logger.error(f"Rate limit check failed: {str(e)}")
+        return True
+
+def site_token(site_id):
+    """Token handed out with a new site; required to redeploy it later"""
+    return hmac.new(SITE_TOKEN_KEY, site_id.encode('utf-8'), hashlib.sha256).hexdigest()
+
+def client_id_signature(raw_id):
+    # Domain-separated from site tokens, which sign bare site ids
+    return hmac.new(SITE_TOKEN_KEY, f'client-id:{raw_id}'.encode('utf-8'), hashlib.sha256).hexdigest()[:32]
+
+def deploy_ready_token(deploy_id):
+    """Token in a deploy's ready_url; proves this service started the deploy"""
+    return hmac.new(SITE_TOKEN_KEY, f'deploy:{deploy_id}'.encode('utf-8'), hashlib.sha256).hexdigest()[:32]
+
+def issue_client_id():
+    """A new unguessable client id, signed so it can't be made up"""
+    raw_id = secrets.token_urlsafe(18)
+    return f'{raw_id}.{client_id_signature(raw_id)}'
+
+def validate_site_update(data):
+    """Return the site_id a deploy payload asks to update, or None
+    
+    Only the client that created the site holds its site_token, so without
+    a matching token the update is refused.
+    """
+    site_id = data.get('site_id') if isinstance(data, dict) else None
+    if site_id is None:
+        return None
+    
+    if not isinstance(site_id, str) or not site_id:
+        raise ValidationError('site_id must be a string')
+    
+    token = data.get('site_token')
+    if not token_matches(site_token(site_id), token):
+        raise SiteAccessError('A valid site_token is required to update this site')
+    
+    return site_id
+
+def validate_deploy_request(data):
+    """Validate a deploy payload and return (title, description, theme)"""
+    if not data:
+        raise ValidationError('No JSON data provided')
+    
+    title = data.get('title', '').strip()
+    description = data.get('description', '').strip()
+    theme = data.get('theme')  # Optional theme data
+    
+    if not title:
+        raise ValidationError('Title is required')
+    
+    if not description:
+        raise ValidationError('Description is required')
+    
+    # Validate input lengths
+    if len(title) > 100:
+        raise ValidationError('Title must be 100 characters or less')
+    
+    if len(description) > 500:
+        raise ValidationError('Description must be 500 characters or less')
+    
+    return title, description, theme
+
+def remember_site_deploy(site_id, manifest, deploy_info):
+    """Record a site's newest deploy so a redeploy can diff against it"""
+    site_manifests.set(site_id, {
+        'manifest': manifest,
+        'deploy_id': deploy_info['id'],
+        'url': deploy_info['ssl_url'],
+        'admin_url': deploy_info.get('admin_url'),
+        'deployed_at': deploy_info['created_at']
+    })
+
+def last_site_deploy(site_id):
+    """The last deploy recorded for a site, asking Netlify on a cache miss"""
+    record = site_manifests.get(site_id)
+    if record is not None:
+        return record
+    
+    with deploy_stage('fetch_manifest'):
+        site_info = netlify_deployer.get_site(site_id)
+        if site_info is None:
+            raise SiteNotFound(f'Site {site_id} not found')
+        manifest = netlify_deployer.get_site_files(site_id) or {}
+    
+    published = site_info.get('published_deploy') or {}
+    record = {
+        'manifest': manifest,
+        'deploy_id': published.get('id'),
+        'url': site_info.get('ssl_url'),
+        'admin_url': site_info.get('admin_url'),
+        'deployed_at': published.get('created_at')
+    }
+    site_manifests.set(site_id, record)
+    if record['deploy_id']:
+        deploy_readiness.track(record['deploy_id'], published.get('state'), record['url'])
+    return record
+
+def deploy_summary(site_id, deploy_id, url, admin_url, deployed_at, title, description, theme, **extra):
+    """Response body shared by new deploys and redeploys"""
+    summary = {
+        'success': True,
+        'site_id': site_id,
+        'site_token': site_token(site_id),
+        'deploy_id': deploy_id,
+        'state': deploy_readiness.track(deploy_id).state if deploy_id else readiness.READY,
+        'ready_url': f"/api/deploy/{deploy_id}/ready?token={deploy_ready_token(deploy_id)}" if deploy_id else None,
+        'url': url,
+        'admin_url': admin_url,
+        'title': title,
+        'description': description,
+        'theme': theme.get('name') if theme else 'default',
+        'deployed_at': deployed_at
+    }
+    summary.update(extra)
+    return summary
+
+def redeploy_site(site_id, site_files, title, description, theme, report):
+    """Update an existing site, uploading only the files that changed
+    
+    The new manifest is compared with the site's last deploy: when nothing
+    changed no Netlify call is made at all; otherwise a digest deploy sends
+    the manifest and uploads just the changed files.
+    """
+    with deploy_stage('manifest'):
+        manifest = file_digest_manifest(site_files)
+    
+    previous = last_site_deploy(site_id)
+    if previous['manifest'] == manifest:
+        logger.info(f"Site {site_id} is unchanged, skipping the deploy")
+        return deploy_summary(
+            site_id, previous['deploy_id'], previous['url'], previous['admin_url'], previous['deployed_at'],
+            title, description, theme, updated=True, unchanged=True, uploaded_files=0
+        )
+    
+    report(jobs.UPLOADING)
+    with deploy_stage('deploy_site'):
+        deploy_info = netlify_deployer.deploy_files(site_id, site_files, manifest)
+    remember_site_deploy(site_id, manifest, deploy_info)
+    deploy_readiness.track(deploy_info['id'], deploy_info.get('state'), deploy_info['ssl_url'])
+    
+    logger.info(f"Updated site {site_id}: {deploy_info.get('ssl_url')}")
+    
+    return deploy_summary(
+        site_id, deploy_info['id'], deploy_info['ssl_url'], deploy_info.get('admin_url'), deploy_info['created_at'],
+        title, description, theme, updated=True, unchanged=False, uploaded_files=deploy_info['uploaded_files']
+    )
+
+@deploys_in_flight.track_inprogress()
+def run_deploy_pipeline(title, description, theme, progress=None, site_id=None):
+    """Render, package and deploy a landing page, returning the deploy summary
+    
+    ``progress`` is called with each stage name from jobs.py as the pipeline
+    moves through it. With ``site_id`` the existing site is updated in place
+    instead of deploying to a new one.
+    """
+    def report(stage):
+        if progress:
+            progress(stage)
+    
+    logger.info(f"Starting deployment for: {title} with theme: {theme.get('name') if theme else 'default'}")
+    
+    deployer = netlify_deployer
+    
+    # Generate HTML content with theme
+    report(jobs.RENDERING)
+    with deploy_stage('render'):
+        html_content, assets = HTMLGenerator.generate_site(title, description, theme)
+    
+    site_files = HTMLGenerator.site_files(html_content, assets)
+    if site_id is not None:
+        # Redeploys always use digest mode so unchanged files aren't resent
+        return redeploy_site(site_id, site_files, title, description, theme, report)
+    
+    # Kept for later redeploys of this site, whatever the deploy mode
+    with deploy_stage('manifest'):
+        manifest = file_digest_manifest(site_files)
+    
+    if config.NETLIFY_DEPLOY_MODE != 'digest':
+        report(jobs.ZIPPING)
+        with deploy_stage('zip'):
+            zip_content = HTMLGenerator.create_upload_zip(html_content, assets)
+    
+    # Take a pre-created site from the pool, or create one
+    report(jobs.CREATING_SITE)
+    site_info = site_pool.acquire()
+    if site_info is None:
+        with deploy_stage('create_site'):
+            site_info = deployer.create_site(HTMLGenerator.generate_site_name())
+    site_id = site_info['id']
+    
+    # Deploy to Netlify
+    report(jobs.UPLOADING)
+    with deploy_stage('deploy_site'):
+        if config.NETLIFY_DEPLOY_MODE == 'digest':
+            # Upload only the files Netlify doesn't already have
+            deploy_info = deployer.deploy_files(site_id, site_files, manifest)
+        else:
+            deploy_info = deployer.deploy_site(site_id, zip_content)
+    
+    logger.info(f"Successfully deployed site: {deploy_info.get('ssl_url')}")
+    
+    # Netlify is usually still processing the upload; poll it until it's live
+    deploy_readiness.track(deploy_info['id'], deploy_info.get('state'), deploy_info['ssl_url'])
+    remember_site_deploy(site_id, manifest, deploy_info)
+    
+    return deploy_summary(
+        site_id, deploy_info['id'], deploy_info['ssl_url'], deploy_info.get('admin_url'), deploy_info['created_at'],
+        title, description, theme
+    )
+
+def record_deploy(client, result):
+    """Add a finished deploy to the history
+    
+    Unchanged redeploys deployed nothing and are skipped. Deploys without a
+    client id are logged with no client: they appear only in admin listings.
+    """
+    if not result.get('unchanged'):
+        deployment_history.record(client, result)
+    return result
+
+def deploy_job_pipeline(job, title, description, theme, site_id=None, client=None):
+    """Run the deploy pipeline for a background job, reporting each stage"""
+    result = run_deploy_pipeline(title, description, theme, progress=job.advance, site_id=site_id)
+    return record_deploy(client, result)
+
+def validate_batch_item(item):
+    """Validate one batch item and return (title, description, theme, site_id)"""
+    title, description, theme = validate_deploy_request(item if isinstance(item, dict) else None)
+    return title, description, theme, validate_site_update(item)
+
+def run_batch_item(index, title, description, theme, site_id, client):
+    """Deploy one validated batch item, capturing failures in the result"""
+    try:
+        result = run_deploy_pipeline(title, description, theme, site_id=site_id)
+    except Exception as e:
+        logger.error(f"Batch item {index} failed: {str(e)}")
+        return {'index': index, 'success': False, 'error': 'Deployment failed', 'message': str(e)}
+    
+    record_deploy(client, result)
+    result['index'] = index
+    return result
+
+def conditional_response(response):
+    """Tag a 200 response with a strong ETag, then answer 304 or compress it
+    
+    The ETag is derived from the uncompressed body, so a client that sends it
+    back in If-None-Match gets an empty 304 instead of the payload. Otherwise
+    the body is sent with the best encoding the client accepts, reusing the
+    compressed bytes cached for identical bodies.
+    """
+    body = response.get_data()
+    digest = compression.body_hash(body)
+    encoding = preview_compression.negotiate(request.accept_encodings, body)
+    
+    if compression.matches(request.if_none_match, digest):
+        response = Response(status=304)
+    elif encoding:
+        response.set_data(preview_compression.get(digest, body, encoding))
+        response.headers['Content-Encoding'] = encoding
+    
+    response.set_etag(compression.etag_for(digest, encoding))
+    response.vary.add('Accept-Encoding')
+    return response
+
+def html_preview_response(title, description, theme):
+    """Serve a preview as raw text/html instead of an escaped JSON string
+    
+    Cached pages are sent whole with an ETag; otherwise the template is
+    streamed to the client as it renders. Metadata travels in
+    percent-encoded X-Preview-* headers.
+    
+    The page is built from caller-supplied text, so it is served sandboxed:
+    the browser gives it a unique origin with scripts, forms and plugins
+    disabled, and won't sniff it as anything but HTML.
+    """
+    headers = {
+        'X-Preview-Title': quote(title),
+        'X-Preview-Description': quote(description),
+        'X-Preview-Theme': quote(theme.get('name', 'custom') if theme else 'default'),
+        'Content-Security-Policy': 'sandbox',
+        'X-Content-Type-Options': 'nosniff'
     }
     
-    if deploy_tracker[client_ip][current_hour] >= config.MAX_DEPLOYS_PER_HOUR:
-        return False
+    html_content = HTMLGenerator.cached_landing_page(title, description, theme)
+    if html_content is not None:
+        return conditional_response(Response(html_content, mimetype='text/html', headers=headers))
     
-    deploy_tracker[client_ip][current_hour] += 1
-    return True
+    return Response(
+        stream_with_context(HTMLGenerator.stream_landing_page(title, description, theme)),
+        mimetype='text/html',
+        headers=headers
+    )
+
+def wants_html_preview():
+    """Whether the client prefers raw text/html over the JSON preview"""
+    best = request.accept_mimetypes.best_match(['application/json', 'text/html'])
+    return best == 'text/html'
+
+def request_client_id():
+    """Who a deploy belongs to in the history, or None
+    
+    Only ids issued by POST /api/client are accepted in X-Client-Id: they
+    carry a signature, so a caller can't claim another client's id, and there
+    is deliberately no fallback to the (spoofable) client address. The
+    frontend keeps its id in localStorage, so its history follows the browser.
+    """
+    client = request.headers.get('X-Client-Id', '').strip()
+    raw_id, _, signature = client.partition('.')
+    if raw_id and len(client) <= 128 and token_matches(client_id_signature(raw_id), signature):
+        return client
+    return None
+
+def parse_history_time(value):
+    """A history filter bound given as a Unix timestamp or ISO 8601 string"""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValidationError(f'Invalid time: {value}')
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+def wants_async_deploy():
+    """Whether the client asked for a 202 + job id instead of waiting"""
+    if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'respond-async' in request.headers.get('Prefer', '').lower()
+
+# Response headers worth replaying along with the body
+IDEMPOTENT_REPLAY_HEADERS = ('Content-Type', 'Location', 'Retry-After')
+
+def replay_response(stored):
+    """Rebuild a response stored by IdempotencyStore"""
+    response = Response(stored.body, status=stored.status, headers=stored.headers)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def idempotent(view):
+    """Run a deploy view at most once per Idempotency-Key
+    
+    Keys are scoped to the client address. Concurrent duplicates wait for
+    the first request's response, and retries within IDEMPOTENCY_TTL get it
+    replayed, so only the first request renders, uploads and is charged
+    against the rate limit. Requests without a key are coalesced only while
+    an identical one is in flight.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if key is not None and not (0 < len(key) <= 255 and key.isprintable()):
+            return jsonify({'error': 'Idempotency-Key must be 1-255 printable characters'}), 400
+        
+        client_ip = request.headers.get('X-Forwarded-For', request.remote_addr)
+        fingerprint = canonical_hash(
+            request.method, request.full_path, hashlib.sha256(request.get_data()).hexdigest()
+        )
+        scope = (client_ip, 'key', key) if key is not None else (client_ip, 'request', fingerprint)
+        
+        try:
+            outcome, value = idempotency_store.begin(scope, fingerprint)
+        except IdempotencyKeyReused as e:
+            idempotent_requests.inc(outcome='conflict')
+            return jsonify({'error': str(e)}), 422
+        idempotent_requests.inc(outcome=outcome)
+        
+        if outcome == idempotency.REPLAY:
+            return replay_response(value)
+        
+        if outcome == idempotency.FOLLOW:
+            stored = value.wait(config.IDEMPOTENCY_WAIT)
+            if stored is None:
+                response = jsonify({'error': 'An identical request is still in progress'})
+                response.headers['Retry-After'] = '1'
+                return response, 409
+            return replay_response(stored)
+        
+        stored = None
+        try:
+            response = app.make_response(view(*args, **kwargs))
+            stored = StoredResponse(
+                fingerprint,
+                response.status_code,
+                response.get_data(),
+                [(name, response.headers[name]) for name in IDEMPOTENT_REPLAY_HEADERS if name in response.headers]
+            )
+            return response
+        finally:
+            idempotency_store.finish(scope, value, stored, remember=key is not None)
+    
+    return wrapper
+
+@app.before_request
+def start_background_workers():
+    """Start per-process background threads once this process serves requests"""
+    site_pool.ensure_started()
+    deploy_readiness.ensure_started()
+    deployment_history.ensure_started()
+    metrics_registry.ensure_started()
+
+def profiling_allowed():
+    """Whether this request may use ?profile=1 and the profile endpoints"""
+    return config.PROFILING_ENABLED or token_matches(config.ADMIN_TOKEN, request.headers.get('X-Admin-Token'))
+
+@app.before_request
+def start_request_instrumentation():
+    """Start the request clock, and the profiler when ?profile=1 is allowed"""
+    g.request_start = time.perf_counter()
+    if request.args.get('profile') == '1' and profiling_allowed():
+        profile = RequestProfile()
+        if profile.begin():
+            g.profile = profile
+
+@app.after_request
+def finish_request_instrumentation(response):
+    """Count the response and attach Server-Timing (and a profile id)"""
+    profile = g.pop('profile', None)
+    if profile is not None:
+        duration = profile.end()
+        response.headers['X-Profile-Id'] = profile_store.save(
+            profile.profiler, request.method, request.full_path, response.status_code, duration
+        )
+    
+    http_responses.inc(endpoint=request.endpoint or 'unmatched', code=response.status_code)
+    
+    timings = list(g.get('server_timing', ()))
+    if 'request_start' in g:
+        elapsed = time.perf_counter() - g.request_start
+        timings.append(('total', elapsed))
+        startup_report.record_response(
+            request.endpoint or 'unmatched', response.status_code, elapsed,
+            preview=request.endpoint in PREVIEW_ENDPOINTS
+        )
+    if timings:
+        response.headers['Server-Timing'] = ', '.join(
+            f'{name};dur={seconds * 1000:.2f}' for name, seconds in timings
+        )
+        # Lets the frontend read Server-Timing from a cross-origin response
+        response.headers['Timing-Allow-Origin'] = '*'
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Metrics of every worker in the Prometheus text exposition format"""
+    return Response(metrics_registry.exposition(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/api/profiles', methods=['GET'])
+def list_profiles():
+    """Newest-first list of captured ?profile=1 request profiles"""
+    if not profiling_allowed():
+        return jsonify({'error': 'Profiling is not enabled'}), 403
+    return jsonify({'profiles': profile_store.list()})
+
+@app.route('/api/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """One captured profile; ?format=pstats downloads the raw dump"""
+    if not profiling_allowed():
+        return jsonify({'error': 'Profiling is not enabled'}), 403
+    
+    if request.args.get('format') == 'pstats':
+        path = profile_store.raw_path(profile_id)
+        if path is None:
+            return jsonify({'error': 'Profile not found'}), 404
+        return send_file(path, mimetype='application/octet-stream', as_attachment=True,
+                         download_name=f'{profile_id}.prof')
+    
+    record = profile_store.get(profile_id)
+    if record is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    return jsonify(record)
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -601,11 +960,41 @@ def health_check():
         'version': '1.0.0'
     })
 
+@app.route('/api/stats', methods=['GET'])
+def stats():
+    """Runtime statistics for the rendering pipeline"""
+    return jsonify({
+        'templates': template_registry.stats(),
+        'render_cache': render_cache.stats(),
+        'theme_css_cache': theme_css_cache.stats(),
+        'artifact_cache': artifact_store.stats(),
+        'preview_compression': preview_compression.stats(),
+        'netlify': netlify_deployer.stats(),
+        'deploy_jobs': deploy_jobs.stats(),
+        'site_pool': site_pool.stats(),
+        'deploy_readiness': deploy_readiness.stats(),
+        'idempotency': idempotency_store.stats(),
+        'history': deployment_history.stats(),
+        'rate_limit': deploy_limiter.stats(),
+        'startup': startup_report.stats()
+    })
+
 @app.route('/api/deploy', methods=['POST'])
+@idempotent
 def deploy_landing_page():
     """
     Deploy a landing page to Netlify
     
+    Pass ``?async=1`` (or ``Prefer: respond-async``) to get a 202 with a job
+    id straight away and follow progress at /api/deploy/<job_id>.
+    
+    To update a site deployed earlier instead of creating a new one, add the
+    ``site_id`` and ``site_token`` from that deploy's response; only files
+    that changed are uploaded.
+    
+    Send an ``Idempotency-Key`` header to make retries safe: repeats of the
+    request get the first response back instead of deploying again.
+    
     Expected JSON payload:
     {
         "title": "My Project",
@@ -635,71 +1024,286 @@ def deploy_landing_page():
             }), 429
         
         # Validate request data
-        data = request.get_json()
-        if not data:
-            return jsonify({'error': 'No JSON data provided'}), 400
-        
-        title = data.get('title', '').strip()
-        description = data.get('description', '').strip()
-        theme = data.get('theme')  # Optional theme data
-        
-        if not title:
-            return jsonify({'error': 'Title is required'}), 400
-        
-        if not description:
-            return jsonify({'error': 'Description is required'}), 400
-        
-        # Validate input lengths
-        if len(title) > 100:
-            return jsonify({'error': 'Title must be 100 characters or less'}), 400
-        
-        if len(description) > 500:
-            return jsonify({'error': 'Description must be 500 characters or less'}), 400
-        
-        logger.info(f"Starting deployment for: {title} with theme: {theme.get('name') if theme else 'default'}")
+        try:
+            with deploy_stage('validate'):
+                data = request.get_json()
+                title, description, theme = validate_deploy_request(data)
+                site_id = validate_site_update(data)
+        except ValidationError as e:
+            return jsonify({'error': str(e)}), 400
+        except SiteAccessError as e:
+            return jsonify({'error': str(e)}), 403
+        
+        # Resolved before anything reaches Netlify, so a bad header can't
+        # fail the request after the site has been deployed
+        client = request_client_id()
+        
+        if wants_async_deploy():
+            try:
+                job = deploy_jobs.submit(
+                    title, deploy_job_pipeline, title, description, theme, site_id, client
+                )
+            except JobQueueFull as e:
+                response = jsonify({'error': 'Deploy queue full', 'message': str(e)})
+                response.headers['Retry-After'] = '5'
+                return response, 503
+            
+            logger.info(f"Queued deployment job {job.id} for: {title}")
+            response = jsonify({
+                'success': True,
+                'job_id': job.id,
+                'state': job.state,
+                'status_url': f'/api/deploy/{job.id}',
+                'events_url': f'/api/deploy/{job.id}/events'
+            })
+            response.headers['Location'] = f'/api/deploy/{job.id}'
+            return response, 202
         
-        # Initialize services
-        deployer = NetlifyDeployer(config.NETLIFY_TOKEN)
+        # Return deployment information
+        result = run_deploy_pipeline(title, description, theme, site_id=site_id)
+        return jsonify(record_deploy(client, result)), 200
         
-        # Generate unique site name
-        site_name = HTMLGenerator.generate_site_name()
+    except SiteNotFound as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        logger.error(f"Deployment failed: {str(e)}")
+        return jsonify({
+            'error': 'Deployment failed',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/deploy/batch', methods=['POST'])
+@idempotent
+def deploy_landing_page_batch():
+    """
+    Deploy several landing pages in one request
+    
+    Expected JSON payload:
+    {
+        "items": [
+            {"title": "First Project", "description": "...", "theme": {...}},
+            {"title": "Second Project", "description": "..."}
+        ]
+    }
+    
+    Items are deployed concurrently, at most BATCH_DEPLOY_CONCURRENCY at a
+    time across all batches. Each item gets its own result, in input order;
+    one failing item does not fail the rest. Every valid item counts as one
+    deploy against the hourly rate limit: items beyond the client's remaining
+    allowance fail with "Rate limit exceeded", and a batch with none left is
+    refused with 429.
+    """
+    try:
+        client_ip = request.headers.get('X-Forwarded-For', request.remote_addr)
         
-        # Generate HTML content with theme
-        html_content = HTMLGenerator.generate_landing_page(title, description, theme)
+        data = request.get_json()
+        items = data.get('items') if isinstance(data, dict) else None
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'A non-empty list of items is required'}), 400
+        
+        if len(items) > config.MAX_BATCH_SIZE:
+            return jsonify({'error': f'A batch may contain at most {config.MAX_BATCH_SIZE} items'}), 400
+        
+        results = [None] * len(items)
+        deployable = []
+        for index, item in enumerate(items):
+            try:
+                deployable.append((index, validate_batch_item(item)))
+            except (ValidationError, SiteAccessError) as e:
+                results[index] = {'index': index, 'success': False, 'error': str(e)}
+        
+        # Charge the limiter once per item; once it refuses, the rest of
+        # the batch is over the allowance too
+        admitted = []
+        rate_limited = 0
+        for index, fields in deployable:
+            if rate_limited == 0 and check_rate_limit(client_ip):
+                admitted.append((index, fields))
+            else:
+                rate_limited += 1
+                results[index] = {
+                    'index': index,
+                    'success': False,
+                    'error': 'Rate limit exceeded',
+                    'message': f'Maximum {config.MAX_DEPLOYS_PER_HOUR} deployments per hour allowed'
+                }
         
-        # Create ZIP file
-        zip_content = HTMLGenerator.create_zip_file(html_content)
+        if deployable and not admitted:
+            return jsonify({
+                'error': 'Rate limit exceeded',
+                'message': f'Maximum {config.MAX_DEPLOYS_PER_HOUR} deployments per hour allowed'
+            }), 429
         
-        # Create Netlify site
-        site_info = deployer.create_site(site_name)
-        site_id = site_info['id']
+        logger.info(f"Starting batch deployment of {len(admitted)} of {len(items)} pages")
         
-        # Deploy to Netlify
-        deploy_info = deployer.deploy_site(site_id, zip_content)
+        client = request_client_id()
+        futures = [
+            (index, batch_executor.submit(run_batch_item, index, *fields, client))
+            for index, fields in admitted
+        ]
+        for index, future in futures:
+            results[index] = future.result()
+        succeeded = sum(1 for result in results if result['success'])
         
-        logger.info(f"Successfully deployed site: {deploy_info.get('ssl_url')}")
+        logger.info(f"Batch deployment finished: {succeeded}/{len(results)} succeeded")
         
-        # Return deployment information
         return jsonify({
-            'success': True,
-            'site_id': site_id,
-            'deploy_id': deploy_info['id'],
-            'url': deploy_info['ssl_url'],
-            'admin_url': deploy_info.get('admin_url'),
-            'title': title,
-            'description': description,
-            'theme': theme.get('name') if theme else 'default',
-            'deployed_at': deploy_info['created_at']
+            'success': succeeded == len(results),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'rate_limited': rate_limited,
+            'results': results
         }), 200
         
     except Exception as e:
-        logger.error(f"Deployment failed: {str(e)}")
+        logger.error(f"Batch deployment failed: {str(e)}")
         return jsonify({
-            'error': 'Deployment failed',
+            'error': 'Batch deployment failed',
             'message': str(e)
         }), 500
 
+@app.route('/api/client', methods=['POST'])
+def new_client_id():
+    """Issue a client id to send as X-Client-Id with deploys and history reads"""
+    return jsonify({'client_id': issue_client_id()}), 201
+
+@app.route('/api/history', methods=['GET'])
+def deployment_history_page():
+    """
+    Deploys made by this client, newest first, one page at a time
+    
+    Query parameters (all optional):
+    - site_id: only deploys of this site
+    - since / until: Unix timestamp or ISO 8601 bounds on the deploy time
+    - limit: page size, up to HISTORY_MAX_PAGE_SIZE
+    - cursor: the next_cursor of the previous page
+    
+    The client is identified by an X-Client-Id issued by POST /api/client;
+    each entry carries the site_token for updating that site again. Requests
+    with the admin token may pass ``client`` to read another client's
+    history, or ``client=*`` for everyone's, without the site tokens.
+    """
+    client = request_client_id()
+    own_history = 'client' not in request.args
+    if not own_history:
+        if not token_matches(config.ADMIN_TOKEN, request.headers.get('X-Admin-Token')):
+            return jsonify({'error': 'Reading another client\'s history requires the admin token'}), 403
+        client = None if request.args['client'] == '*' else request.args['client']
+    elif client is None:
+        return jsonify({'error': 'X-Client-Id must be a client id issued by POST /api/client'}), 401
+    
+    try:
+        limit = int(request.args.get('limit', config.HISTORY_PAGE_SIZE))
+        since = parse_history_time(request.args['since']) if 'since' in request.args else None
+        until = parse_history_time(request.args['until']) if 'until' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
+    limit = min(max(limit, 1), config.HISTORY_MAX_PAGE_SIZE)
+    
+    try:
+        deployments, next_cursor = deployment_history.query(
+            client=client,
+            site_id=request.args.get('site_id'),
+            since=since,
+            until=until,
+            limit=limit,
+            cursor=request.args.get('cursor')
+        )
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if own_history:
+        for deployment in deployments:
+            # Lets a browser that lost its local history update these sites again
+            deployment['site_token'] = site_token(deployment['site_id'])
+    
+    return jsonify({
+        'deployments': deployments,
+        'next_cursor': next_cursor,
+        'limit': limit
+    }), 200
+
+@app.route('/api/deploy/<job_id>', methods=['GET'])
+def deploy_job_status(job_id):
+    """Current state and stage history of an asynchronous deploy"""
+    job = deploy_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Deploy job not found'}), 404
+    return jsonify(job.to_dict()), 200
+
+@app.route('/api/deploy/<job_id>/events', methods=['GET'])
+def deploy_job_events(job_id):
+    """Server-Sent Events stream of an asynchronous deploy's stage transitions"""
+    job = deploy_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Deploy job not found'}), 404
+    
+    def stream():
+        seen = 0
+        deadline = time.monotonic() + config.DEPLOY_JOB_STREAM_MAX_SECONDS
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # Don't hold a worker forever; the client can reconnect or poll
+                yield f"event: timeout\ndata: {json.dumps(job.to_dict())}\n\n"
+                return
+            events = job.wait_for_events(seen, timeout=min(15, remaining))
+            if not events and not job.done:
+                # Comment line keeps proxies from closing an idle stream
+                yield ': keep-alive\n\n'
+                continue
+            
+            for event in events:
+                yield f"event: {event['state']}\ndata: {json.dumps(event)}\n\n"
+            seen += len(events)
+            
+            if job.done and seen >= len(job.events):
+                yield f"event: result\ndata: {json.dumps(job.to_dict())}\n\n"
+                return
+    
+    return Response(
+        stream_with_context(stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/deploy/<deploy_id>/ready', methods=['GET'])
+def deploy_ready(deploy_id):
+    """Long-poll until a Netlify deploy is live
+    
+    Waits up to ``?timeout=`` seconds (capped at READINESS_MAX_WAIT) for the
+    deploy to settle. ``?token=`` comes from the ``ready_url`` of the deploy
+    response; without it the id is unknown here. Answers 200 once it is ready or has failed, and 202
+    while Netlify is still processing it, in which case the client should
+    simply ask again. Every waiting client shares the same background poll.
+    """
+    if not deploy_id.isalnum() or len(deploy_id) > 64:
+        return jsonify({'error': 'Invalid deploy id'}), 400
+    
+    # Only deploys this service started: anything else would have us poll
+    # Netlify with our token for arbitrary ids
+    if not token_matches(deploy_ready_token(deploy_id), request.args.get('token', '')):
+        return jsonify({'error': 'Deploy not found'}), 404
+    
+    try:
+        timeout = float(request.args.get('timeout', config.READINESS_MAX_WAIT))
+    except ValueError:
+        return jsonify({'error': 'Timeout must be a number of seconds'}), 400
+    timeout = min(max(timeout, 0.0), config.READINESS_MAX_WAIT)
+    
+    status = deploy_readiness.wait(deploy_id, timeout)
+    if status['state'] == readiness.NOT_FOUND:
+        return jsonify({'error': 'Deploy not found', **status}), 404
+    if status['state'] not in readiness.SETTLED_STATES:
+        response = jsonify(status)
+        response.headers['Retry-After'] = '0'
+        return response, 202
+    return jsonify(status), 200
+
 @app.route('/api/preview', methods=['POST'])
+@preview_seconds.time()
 def preview_landing_page():
     """
     Generate a preview of the landing page without deploying
@@ -736,16 +1340,23 @@ def preview_landing_page():
         if not description:
             return jsonify({'error': 'Description is required'}), 400
         
-        # Generate HTML content with theme
-        html_content = HTMLGenerator.generate_landing_page(title, description, theme)
-        
-        return jsonify({
-            'success': True,
-            'html': html_content,
-            'title': title,
-            'description': description,
-            'theme': theme.get('name') if theme else 'default'
-        }), 200
+        if wants_html_preview():
+            response = html_preview_response(title, description, theme)
+        else:
+            # Generate HTML content with theme
+            html_content = HTMLGenerator.generate_cached_landing_page(title, description, theme)
+            
+            response = conditional_response(jsonify({
+                'success': True,
+                'html': html_content,
+                'title': title,
+                'description': description,
+                'theme': theme.get('name') if theme else 'default'
+            }))
+        
+        # The representation depends on Accept as well as the payload
+        response.vary.add('Accept')
+        return response
         
     except Exception as e:
         logger.error(f"Preview generation failed: {str(e)}")
@@ -754,6 +1365,35 @@ def preview_landing_page():
             'message': str(e)
         }), 500
 
+@app.route('/api/preview/render', methods=['GET'])
+@preview_seconds.time()
+def render_preview():
+    """
+    Stream a preview as raw text/html, e.g. as an iframe src
+    
+    Query parameters: title, description and an optional theme as JSON
+    (the same object the JSON preview accepts).
+    """
+    title = request.args.get('title', '').strip()
+    description = request.args.get('description', '').strip()
+    
+    if not title:
+        return jsonify({'error': 'Title is required'}), 400
+    
+    if not description:
+        return jsonify({'error': 'Description is required'}), 400
+    
+    theme = None
+    if request.args.get('theme'):
+        try:
+            theme = json.loads(request.args['theme'])
+        except ValueError:
+            return jsonify({'error': 'Theme must be a JSON object'}), 400
+        if not isinstance(theme, dict):
+            return jsonify({'error': 'Theme must be a JSON object'}), 400
+    
+    return html_preview_response(title, description, theme)
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Endpoint not found'}), 404
@@ -762,5 +1402,34 @@ def not_found(error):
 def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
+# Endpoints whose first success is the time-to-first-preview in the startup report
+PREVIEW_ENDPOINTS = ('preview_landing_page', 'render_preview')
+
+def warm_up():
+    """Run the preview path once so the first real preview finds it warm
+    
+    Renders the default landing page into the render and theme caches,
+    encodes it as the JSON preview response would, and builds the URL
+    matcher. No request is dispatched, so no before_request hook runs and
+    no background thread is started: under gunicorn's preload_app this runs
+    once in the master and every forked worker inherits the result.
+    """
+    app.url_map.bind('localhost').match('/api/preview', method='POST')
+    with app.app_context():
+        html_content = HTMLGenerator.generate_cached_landing_page(
+            'Landing page', 'Warm-up render of the default theme', None
+        )
+        jsonify({'success': True, 'html': html_content, 'theme': 'default'}).get_data()
+
+startup_report.mark('routes')
+if config.WARM_UP:
+    try:
+        warm_up()
+    except Exception as e:
+        # A cold first preview is better than an app that won't load
+        logger.warning(f"Warm-up failed: {str(e)}")
+    startup_report.mark('warm_up')
+logger.info(startup_report.finish())
+
 if __name__ == '__main__':
     app.run(debug=config.DEBUG, host='0.0.0.0', port=5000) 
\ No newline at end of file
@@ -0,0 +1,249 @@
+"""
+Deploy artifact construction and caching.
+
+Netlify deploys are uploaded as ZIP archives. The ``_redirects`` and
+``netlify.toml`` members are identical for every site, so they are deflated
+once, by the first archive a process builds, and spliced into each archive as
+raw, already-compressed entries. Finished archives are stored under a SHA-256 of the page HTML and
+any extra site files, so deploying the same site twice skips compression
+entirely.
+
+The archive writer only emits what Netlify needs (deflated members, no extra
+fields or comments) and uses a fixed timestamp, so the same inputs always
+produce byte-identical archives. ``iter_zip`` produces the archive as a
+stream of chunks: members are read and deflated piece by piece, with their
+CRC and sizes written in a trailing data descriptor, so an upload can start
+before the archive is complete and no full copy of it is ever held.
+"""
+
+import hashlib
+import struct
+import zlib
+from collections import namedtuple
+
+from cache import LRUCache
+
+# Static files shipped with every generated site
+REDIRECTS = '/* /index.html 200'
+
+NETLIFY_TOML = """
+[build]
+  publish = "."
+
+[[headers]]
+  for = "/*"
+  [headers.values]
+    X-Frame-Options = "DENY"
+    X-XSS-Protection = "1; mode=block"
+    X-Content-Type-Options = "nosniff"
+    Referrer-Policy = "strict-origin-when-cross-origin"
+
+# Files under /assets/ carry a content hash in their name, so they never change
+[[headers]]
+  for = "/assets/*"
+  [headers.values]
+    Cache-Control = "public, max-age=31536000, immutable"
+"""
+
+STATIC_FILES = {
+    '_redirects': REDIRECTS,
+    'netlify.toml': NETLIFY_TOML
+}
+
+COMPRESSION_LEVEL = 6
+
+_DEFLATED = 8
+_VERSION = 20
+_FLAG_UTF8 = 0x0800
+# CRC and sizes follow the member data instead of preceding it
+_FLAG_DATA_DESCRIPTOR = 0x0008
+# 1980-01-01 00:00:00, the ZIP epoch, so archives are reproducible
+_DOS_TIME = 0
+_DOS_DATE = (1 << 5) | 1
+# Unix "made by" with -rw-r--r-- permissions
+_MADE_BY = (3 << 8) | _VERSION
+_EXTERNAL_ATTR = 0o100644 << 16
+
+CHUNK_SIZE = 64 * 1024
+
+_LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+_DATA_DESCRIPTOR = struct.Struct('<IIII')
+_CENTRAL_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+_END_OF_CENTRAL_DIR = struct.Struct('<IHHHHIIH')
+
+
+class ZipMember(namedtuple('ZipMember', 'name crc compressed size')):
+    """A ZIP entry whose data has already been deflated"""
+
+    __slots__ = ()
+
+    @classmethod
+    def deflate(cls, name, data, level=COMPRESSION_LEVEL):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        compressed = compressor.compress(data) + compressor.flush()
+        return cls(name, zlib.crc32(data), compressed, len(data))
+
+
+def _local_header(name, flags, crc, compressed_size, size):
+    return _LOCAL_HEADER.pack(
+        0x04034b50, _VERSION, flags, _DEFLATED, _DOS_TIME, _DOS_DATE,
+        crc, compressed_size, size, len(name), 0
+    ) + name
+
+
+def _central_header(name, flags, crc, compressed_size, size, offset):
+    return _CENTRAL_HEADER.pack(
+        0x02014b50, _MADE_BY, _VERSION, flags, _DEFLATED, _DOS_TIME, _DOS_DATE,
+        crc, compressed_size, size, len(name), 0, 0, 0, 0, _EXTERNAL_ATTR, offset
+    ) + name
+
+
+def iter_chunks(data, chunk_size=CHUNK_SIZE):
+    """Yield bytes chunks from bytes/str, a binary file object or an iterable"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        view = memoryview(data)
+        for start in range(0, len(view), chunk_size):
+            yield view[start:start + chunk_size]
+    elif hasattr(data, 'read'):
+        while True:
+            chunk = data.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        yield from data
+
+
+def iter_zip(members, chunk_size=CHUNK_SIZE, level=COMPRESSION_LEVEL):
+    """Generate a ZIP archive as a stream of byte chunks
+
+    Each member is either a precompressed ``ZipMember``, spliced in as-is, or
+    a ``(name, data)`` pair where data is anything ``iter_chunks`` accepts.
+    Pairs are deflated incrementally, so memory use is bounded by the chunk
+    size rather than by the member or archive size.
+    """
+    central = []
+    offset = 0
+
+    for member in members:
+        if isinstance(member, ZipMember):
+            name = member.name.encode('utf-8')
+            header = _local_header(name, _FLAG_UTF8, member.crc, len(member.compressed), member.size)
+            yield header
+            yield member.compressed
+            central.append(_central_header(
+                name, _FLAG_UTF8, member.crc, len(member.compressed), member.size, offset
+            ))
+            offset += len(header) + len(member.compressed)
+            continue
+
+        member_name, data = member
+        name = member_name.encode('utf-8')
+        flags = _FLAG_UTF8 | _FLAG_DATA_DESCRIPTOR
+        header = _local_header(name, flags, 0, 0, 0)
+        yield header
+
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        crc = size = compressed_size = 0
+        for chunk in iter_chunks(data, chunk_size):
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            compressed = compressor.compress(chunk)
+            if compressed:
+                compressed_size += len(compressed)
+                yield compressed
+        compressed = compressor.flush()
+        compressed_size += len(compressed)
+        yield compressed
+
+        descriptor = _DATA_DESCRIPTOR.pack(0x08074b50, crc, compressed_size, size)
+        yield descriptor
+        central.append(_central_header(name, flags, crc, compressed_size, size, offset))
+        offset += len(header) + compressed_size + len(descriptor)
+
+    central_size = sum(len(entry) for entry in central)
+    yield b''.join(central) + _END_OF_CENTRAL_DIR.pack(
+        0x06054b50, 0, 0, len(central), len(central), central_size, offset, 0
+    )
+
+
+def build_zip(members):
+    """Assemble precompressed members into a complete ZIP archive"""
+    # A single join keeps peak memory at one copy of the archive
+    return b''.join(iter_zip(members))
+
+
+# Compressed once per process and reused by every archive; left until the
+# first deploy so loading the app does no compression work
+_static_members = None
+
+
+def static_members():
+    """The precompressed ``STATIC_FILES`` members, deflated on first use"""
+    global _static_members
+    if _static_members is None:
+        # Building them twice in a race is harmless; both results are equal
+        _static_members = tuple(ZipMember.deflate(name, data) for name, data in STATIC_FILES.items())
+    return _static_members
+
+
+def _encoded(data):
+    return data.encode('utf-8') if isinstance(data, str) else data
+
+
+class ArtifactStore:
+    """Content-addressed cache of deploy ZIPs keyed by the site contents"""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, max_entries=None):
+        self.cache = LRUCache(max_entries=max_entries, max_bytes=max_bytes)
+
+    @staticmethod
+    def content_hash(html_content, extra_files=()):
+        digest = hashlib.sha256(html_content.encode('utf-8'))
+        for path, data in extra_files:
+            # NUL separators keep path/content boundaries unambiguous
+            digest.update(b'\0' + path.encode('utf-8') + b'\0')
+            digest.update(_encoded(data))
+        return digest.hexdigest()
+
+    def get_zip(self, html_content, extra_files=()):
+        """Return the deploy ZIP for the site, building it on a miss
+
+        ``extra_files`` is a sequence of ``(path, bytes or str)`` pairs added
+        next to ``index.html``.
+        """
+        key = self.content_hash(html_content, extra_files)
+        return self.cache.get_or_set(key, lambda: self.build(html_content, extra_files))
+
+    @staticmethod
+    def build(html_content, extra_files=()):
+        members = [ZipMember.deflate('index.html', html_content)]
+        members.extend(ZipMember.deflate(path, data) for path, data in extra_files)
+        members.extend(static_members())
+        return build_zip(members)
+
+    def for_upload(self, html_content, extra_files=(), stream_threshold=256 * 1024):
+        """Return the deploy ZIP as bytes, or as a chunk iterator for large sites
+
+        Sites held fully in memory below ``stream_threshold`` bytes go through
+        the content-addressed cache. Larger sites, or ones with extra files
+        given as file objects or iterables, are streamed instead so no full
+        copy is held. ``extra_files`` is a sequence of ``(path, data)`` pairs.
+        """
+        in_memory = all(isinstance(data, (bytes, str)) for _, data in extra_files)
+        if in_memory:
+            size = len(html_content) + sum(len(data) for _, data in extra_files)
+            if size < stream_threshold:
+                return self.get_zip(html_content, extra_files)
+
+        members = [('index.html', html_content)]
+        members.extend(extra_files)
+        members.extend(static_members())
+        return iter_zip(members)
+
+    def stats(self):
+        return self.cache.stats()
@@ -0,0 +1,6 @@
+"""
+Performance benchmarks for the backend.
+
+Run individual benchmarks as modules from the ``backend`` directory, e.g.
+``python -m benchmarks.rate_limit``.
+"""
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Time-to-first-successful-preview of a cold gunicorn server.
+
+Each run spawns gunicorn from ``gunicorn_config.py`` (one worker, preloaded
+app) and posts ``/api/preview`` in a tight loop until it gets a 200; the
+time from spawn to that response is what a visitor waits for when a
+scale-to-zero host starts an instance for them. The app's own startup report
+(load phases and the worker's first preview) is read from ``/api/stats``
+afterwards.
+
+Runs are repeated for each mode and the medians reported:
+
+* ``source``: templates compiled from source, no warm-up;
+* ``precompiled``: templates loaded from ``templates_compiled``;
+* ``warm``: precompiled templates plus the preload warm-up (the default).
+
+``--backend-dir`` points the benchmark at another checkout of the backend,
+e.g. an older revision, to compare against; modes it doesn't know about
+simply behave like ``source`` there.
+
+    python -m benchmarks.cold_start --runs 15
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks.serving import BACKEND_DIR, PREVIEW, free_port, post_json
+
+MODES = {
+    'source': {'PRECOMPILED_TEMPLATES_DIR': '', 'WARM_UP': 'false'},
+    'precompiled': {'WARM_UP': 'false'},
+    'warm': {}
+}
+
+
+def first_preview(backend_dir, port, mode_env, timeout):
+    """Spawn gunicorn; return seconds until the first 200 preview and its startup stats"""
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        WEB_CONCURRENCY='1',
+        NETLIFY_TOKEN='benchmark',
+        NETLIFY_API_URL='http://127.0.0.1:9/api/v1',
+        **mode_env
+    )
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn_config.py', '--bind', f'127.0.0.1:{port}', 'app:app'],
+        cwd=backend_dir,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    try:
+        deadline = start + timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f'gunicorn exited: {process.stderr.read()[-2000:]}')
+            if time.perf_counter() > deadline:
+                raise RuntimeError('No successful preview before the timeout')
+            try:
+                if post_json(f'http://127.0.0.1:{port}/api/preview', PREVIEW, timeout) == 200:
+                    break
+            except (OSError, urllib.error.URLError):
+                time.sleep(0.001)
+        elapsed = time.perf_counter() - start
+
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/stats', timeout=timeout) as response:
+            startup = json.load(response).get('startup')
+        return elapsed, startup
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark time to the first successful preview')
+    parser.add_argument('--runs', type=int, default=10, help='Cold starts per mode (median is kept)')
+    parser.add_argument('--modes', nargs='+', choices=sorted(MODES), default=list(MODES))
+    parser.add_argument('--backend-dir', default=BACKEND_DIR, help='Backend checkout to start')
+    parser.add_argument('--timeout', type=float, default=20.0)
+    args = parser.parse_args()
+
+    compiler = os.path.join(args.backend_dir, 'compile_templates.py')
+    if os.path.exists(compiler):
+        subprocess.run([sys.executable, compiler], cwd=args.backend_dir, check=True, stdout=subprocess.DEVNULL)
+
+    print(f"{'mode':<12} {'first preview ms':>17} {'app load ms':>12} {'worker preview ms':>18}")
+    for mode in args.modes:
+        totals, loads, previews = [], [], []
+        for _ in range(args.runs):
+            elapsed, startup = first_preview(args.backend_dir, free_port(), MODES[mode], args.timeout)
+            totals.append(elapsed * 1000)
+            if startup:
+                loads.append(startup['load_ms'])
+                preview = startup['first_preview'] or {}
+                if 'latency_ms' in preview:
+                    previews.append(preview['latency_ms'])
+        load = f"{statistics.median(loads):.1f}" if loads else 'n/a'
+        preview = f"{statistics.median(previews):.2f}" if previews else 'n/a'
+        print(f"{mode:<12} {statistics.median(totals):>17.1f} {load:>12} {preview:>18}")
+
+
+if __name__ == '__main__':
+    main()
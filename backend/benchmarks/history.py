@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Deployment history listing at scale.
+
+Fills a fresh history database with ``--rows`` deploys spread over
+``--clients`` clients and a year of timestamps, through the same queued
+batch writer the app uses, then times:
+
+* the first page, for everyone and for one client;
+* a page ``--depth`` rows deep, reached by keyset cursor (what
+  ``GET /api/history`` does) and by ``LIMIT ... OFFSET`` for comparison;
+* a page filtered by site.
+
+Keyset pages cost the same at any depth; OFFSET pages grow with the number
+of rows skipped.
+
+    python -m benchmarks.history --rows 300000 --depth 250000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from history import COLUMNS, DeploymentHistory
+
+PAGE_SIZE = 50
+
+
+def populate(history, rows, clients, sites_per_client, seed):
+    rng = random.Random(seed)
+    start = time.time() - 365 * 86400
+    client_ids = [f'client-{n}' for n in range(clients)]
+    written_at = sorted(start + rng.random() * 365 * 86400 for _ in range(rows))
+    begin = time.perf_counter()
+    for now in written_at:
+        client = rng.choice(client_ids)
+        history.record(client, {
+            'site_id': f'{client}-site-{rng.randrange(sites_per_client)}',
+            'deploy_id': f'{rng.getrandbits(96):024x}',
+            'title': 'Benchmark project',
+            'description': 'A deployment history row of typical size for the benchmark.',
+            'theme': 'Ocean',
+            'url': 'https://landing-benchmark.netlify.app',
+            'admin_url': 'https://app.netlify.com/sites/landing-benchmark'
+        }, now=now)
+    history.flush()
+    return time.perf_counter() - begin, client_ids
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def cursor_at(history, depth, **filters):
+    """The cursor of the page starting ``depth`` rows in, walked page by page"""
+    cursor = None
+    for _ in range(depth // 1000):
+        _, cursor = history.query(limit=1000, cursor=cursor, **filters)
+    return cursor
+
+
+def offset_page(history, depth):
+    return history._connection().execute(
+        f"SELECT id, {', '.join(COLUMNS)} FROM deployments "
+        f"ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+        (PAGE_SIZE, depth)
+    ).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark deployment history pagination')
+    parser.add_argument('--rows', type=int, default=300000, help='Deploys to write')
+    parser.add_argument('--clients', type=int, default=2000, help='Distinct clients')
+    parser.add_argument('--sites-per-client', type=int, default=5, help='Sites per client')
+    parser.add_argument('--depth', type=int, default=250000, help='Rows skipped for the deep page')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed repetitions per query (median is kept)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        history = DeploymentHistory(os.path.join(directory, 'history.sqlite3'), queue_size=args.rows)
+        elapsed, client_ids = populate(history, args.rows, args.clients, args.sites_per_client, args.seed)
+        print(f"Wrote {args.rows:,} rows in {elapsed:.1f}s ({args.rows / elapsed:,.0f} rows/s)")
+
+        client = client_ids[0]
+        site_id = f'{client}-site-0'
+        deep_cursor = cursor_at(history, args.depth)
+
+        cases = [
+            ('first page', lambda: history.query(limit=PAGE_SIZE)),
+            ('first page, one client', lambda: history.query(client=client, limit=PAGE_SIZE)),
+            ('first page, one site', lambda: history.query(client=client, site_id=site_id, limit=PAGE_SIZE)),
+            (f'{args.depth:,} rows deep, keyset', lambda: history.query(limit=PAGE_SIZE, cursor=deep_cursor)),
+            (f'{args.depth:,} rows deep, OFFSET', lambda: offset_page(history, args.depth)),
+        ]
+        print(f"{'query':<36} {'median ms':>10}")
+        for name, fn in cases:
+            print(f"{name:<36} {timed(fn, args.repeat):>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the deploy rate limiter.
+
+Floods ``SlidingWindowLimiter`` with distinct client keys, the way spoofed
+``X-Forwarded-For`` values would arrive, and samples traced memory as it goes.
+Memory should level off once the tracked-client cap is reached instead of
+growing with the number of distinct keys.
+
+    python -m benchmarks.rate_limit --keys 1000000 --max-clients 50000
+"""
+
+import argparse
+import random
+import threading
+import time
+import tracemalloc
+
+from rate_limit import SlidingWindowLimiter
+
+
+def random_ip(rng):
+    return '.'.join(str(rng.randrange(256)) for _ in range(4))
+
+
+def flood(limiter, keys, ips, samples):
+    """Hit the limiter with ``keys`` distinct keys, sampling memory along the way"""
+    sample_every = max(1, keys // samples)
+    rows = []
+
+    start = time.perf_counter()
+    for i in range(keys):
+        # Prefix with the counter so every key is distinct, like a spoofing flood
+        limiter.hit(f'{i}-{ips[i % len(ips)]}')
+        if (i + 1) % sample_every == 0:
+            current, peak = tracemalloc.get_traced_memory()
+            rows.append((i + 1, len(limiter), current, peak))
+    elapsed = time.perf_counter() - start
+    return rows, elapsed
+
+
+def contended(limiter, threads, hits_per_thread, clients):
+    """Hammer a small set of keys from several threads at once"""
+    def worker(offset):
+        for i in range(hits_per_thread):
+            limiter.hit(f'client-{(i + offset) % clients}')
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the deploy rate limiter')
+    parser.add_argument('--keys', type=int, default=500000, help='Distinct client keys to send')
+    parser.add_argument('--max-clients', type=int, default=50000, help='Tracked-client cap')
+    parser.add_argument('--samples', type=int, default=10, help='Memory samples to report')
+    parser.add_argument('--threads', type=int, default=8, help='Threads for the contention run')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    ips = [random_ip(rng) for _ in range(min(args.keys, 100000))]
+    limiter = SlidingWindowLimiter(limit=10, max_clients=args.max_clients)
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    rows, elapsed = flood(limiter, args.keys, ips, args.samples)
+    tracemalloc.stop()
+
+    print(f"Flood of {args.keys:,} distinct keys (cap {args.max_clients:,})")
+    print(f"{'keys sent':>12} {'tracked':>10} {'memory MiB':>12} {'peak MiB':>10}")
+    for sent, tracked, current, peak in rows:
+        print(f"{sent:>12,} {tracked:>10,} {(current - baseline) / 2**20:>12.2f} {(peak - baseline) / 2**20:>10.2f}")
+    print(f"Throughput: {args.keys / elapsed:,.0f} checks/sec (tracemalloc on)")
+
+    limiter = SlidingWindowLimiter(limit=10, max_clients=args.max_clients)
+    hits = 50000
+    elapsed = contended(limiter, args.threads, hits, clients=1000)
+    total = args.threads * hits
+    print(f"Contended: {total:,} checks from {args.threads} threads in {elapsed:.2f}s "
+          f"({total / elapsed:,.0f} checks/sec)")
+    print(limiter.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Per-request render cost of the landing page, single-stage vs two-stage.
+
+* single-stage: the stylesheet is rendered inline on every request, as the
+  original template did (``{% include %}`` of the stylesheet template);
+* two-stage: ``HTMLGenerator.generate_landing_page``, where the stylesheet
+  for a known theme comes from the per-theme cache and only the page text is
+  rendered.
+
+The preview render cache is bypassed so every iteration really renders.
+
+    python -m benchmarks.render --iterations 5000
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault('NETLIFY_TOKEN', 'benchmark')
+
+from app import HTMLGenerator, LANDING_TEMPLATE, THEME_STYLESHEET  # noqa: E402
+from template_registry import template_registry  # noqa: E402
+
+THEMES = {
+    'default': None,
+    'ocean': {
+        'id': 'ocean',
+        'name': 'Ocean',
+        'colors': {
+            'primary': '#0EA5E9',
+            'secondary': '#0369A1',
+            'accent': '#F59E0B',
+            'text': '#0F172A',
+            'background': '#F0F9FF'
+        }
+    }
+}
+
+TITLE = 'Acme Analytics'
+DESCRIPTION = 'Understand your customers with real-time dashboards and insights. ' * 4
+
+
+def single_stage_template():
+    source = template_registry.source(LANDING_TEMPLATE)
+    inline = source.replace('{{ stylesheet }}', "{% include '" + THEME_STYLESHEET + "' %}")
+    return template_registry.env.from_string(inline)
+
+
+def time_per_call(fn, iterations):
+    fn()  # warm caches
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark single- vs two-stage landing page rendering')
+    parser.add_argument('--iterations', type=int, default=2000, help='Renders per measurement')
+    args = parser.parse_args()
+
+    single = single_stage_template()
+
+    print(f"{'theme':>10} {'single-stage us':>16} {'two-stage us':>13} {'speedup':>8}")
+    for name, theme in THEMES.items():
+        single_cost = time_per_call(
+            lambda: single.render(title=TITLE, description=DESCRIPTION, current_year=2025, theme=theme),
+            args.iterations
+        )
+        two_stage_cost = time_per_call(
+            lambda: HTMLGenerator.generate_landing_page(TITLE, DESCRIPTION, theme),
+            args.iterations
+        )
+        print(f"{name:>10} {single_cost * 1e6:>16.1f} {two_stage_cost * 1e6:>13.1f} "
+              f"{single_cost / two_stage_cost:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Load test of the gunicorn serving profiles while Netlify is slow.
+
+For each ``SERVER_PROFILE`` a gunicorn server is started from
+``gunicorn_config.py`` against a local fake Netlify whose deploy calls take
+``--upload-delay`` seconds. ``--deploys`` synchronous deploys are fired at
+once while a probe keeps requesting ``/api/preview`` and ``/health``; the
+report shows how long the deploys took in total and how much the probes were
+held up behind them.
+
+With ``sync`` every probe waits for the uploads ahead of it; ``gthread`` only
+stalls once all threads are busy uploading; ``gevent`` keeps every deploy in
+flight at once and previews stay fast.
+
+    python -m benchmarks.serving --profiles sync gthread gevent --deploys 40
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from fake_netlify import FakeNetlifyServer, FaultProfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PREVIEW = {'title': 'Acme Analytics', 'description': 'Real-time dashboards and insights.'}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def post_json(url, payload, timeout):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': 'application/json'}
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        response.read()
+        return response.status
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    try:
+        fn(*args)
+        ok = True
+    except (OSError, urllib.error.URLError):
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+def percentile(values, fraction):
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def start_server(profile, api_url, port, deploys):
+    env = dict(
+        os.environ,
+        SERVER_PROFILE=profile,
+        PORT=str(port),
+        NETLIFY_TOKEN='benchmark',
+        NETLIFY_API_URL=api_url,
+        NETLIFY_POOL_SIZE=str(max(10, deploys)),
+        MAX_DEPLOYS_PER_HOUR='1000000'
+    )
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn_config.py', '--bind', f'127.0.0.1:{port}', 'app:app'],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn exited: {process.stderr.read()[-2000:]}')
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1).read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError('gunicorn did not become healthy')
+
+
+def run_profile(profile, deploys, delay, timeout):
+    faults = FaultProfile(latency_ms=delay * 1000, routes=('create_deploy',))
+    fake = FakeNetlifyServer(faults=faults).start()
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    process = start_server(profile, fake.api_url, port, deploys)
+
+    deploy_results = []
+    probe_latencies = {'preview': [], 'health': []}
+    done = threading.Event()
+
+    def deploy(n):
+        payload = {'title': f'Load test {n}', 'description': 'Deploy under load'}
+        deploy_results.append(timed(post_json, f'{base}/api/deploy', payload, timeout))
+
+    def probe():
+        while not done.is_set():
+            elapsed, _ = timed(post_json, f'{base}/api/preview', PREVIEW, timeout)
+            probe_latencies['preview'].append(elapsed)
+            elapsed, _ = timed(lambda: urllib.request.urlopen(f'{base}/health', timeout=timeout).read())
+            probe_latencies['health'].append(elapsed)
+            time.sleep(0.05)
+
+    try:
+        prober = threading.Thread(target=probe)
+        prober.start()
+        start = time.perf_counter()
+        workers = [threading.Thread(target=deploy, args=(n,)) for n in range(deploys)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        wall = time.perf_counter() - start
+        done.set()
+        prober.join()
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+        fake.shutdown()
+
+    ok = sum(1 for _, success in deploy_results if success)
+    return {
+        'profile': profile,
+        'deploys_ok': ok,
+        'deploy_wall_s': wall,
+        'preview_p50_ms': percentile(probe_latencies['preview'], 0.5) * 1000,
+        'preview_p95_ms': percentile(probe_latencies['preview'], 0.95) * 1000,
+        'health_max_ms': max(probe_latencies['health'], default=float('nan')) * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test gunicorn serving profiles against a slow Netlify')
+    parser.add_argument('--profiles', nargs='+', default=['sync', 'gthread', 'gevent'], help='SERVER_PROFILE values to compare')
+    parser.add_argument('--deploys', type=int, default=40, help='Concurrent synchronous deploys')
+    parser.add_argument('--upload-delay', type=float, default=1.0, help='Seconds each fake deploy upload takes')
+    parser.add_argument('--timeout', type=float, default=120, help='Client timeout per request, in seconds')
+    args = parser.parse_args()
+
+    print(f"{args.deploys} deploys, {args.upload_delay:.1f}s per upload")
+    print(f"{'profile':>8} {'deploys ok':>10} {'wall s':>8} {'preview p50 ms':>15} {'preview p95 ms':>15} {'health max ms':>14}")
+    for profile in args.profiles:
+        row = run_profile(profile, args.deploys, args.upload_delay, args.timeout)
+        print(f"{row['profile']:>8} {row['deploys_ok']:>10} {row['deploy_wall_s']:>8.1f} "
+              f"{row['preview_p50_ms']:>15.1f} {row['preview_p95_ms']:>15.1f} {row['health_max_ms']:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
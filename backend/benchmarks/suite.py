@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark suite for the render, ZIP, rate-limit and request paths.
+
+Each stage is timed in isolation and end to end through the Flask test
+client, across payload sizes up to the validation limits (title 100 chars,
+description 500) with and without a custom theme. For every case the suite
+records throughput (ops/sec, best of several timed rounds) and the traced peak
+allocation of a single call (median over a sample of calls).
+
+Save a baseline on a given machine, then compare later runs against it; the
+run exits non-zero when a case gets slower, or allocates more, than the
+tolerance allows:
+
+    python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json --tolerance 0.2
+
+Baselines are machine-specific, so compare only runs from the same host.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from fake_netlify import FakeNetlifyServer
+
+# Deploys go to an in-process fake Netlify and are never rate limited
+_fake_netlify = FakeNetlifyServer().start()
+os.environ.setdefault('NETLIFY_TOKEN', 'benchmark')
+os.environ['NETLIFY_API_URL'] = _fake_netlify.api_url
+os.environ['MAX_DEPLOYS_PER_HOUR'] = str(10 ** 9)
+os.environ['RATE_LIMIT_BACKEND'] = 'memory'
+
+import app  # noqa: E402
+
+# Per-deploy INFO logging would dominate the deploy case
+logging.getLogger('app').setLevel(logging.WARNING)
+logging.getLogger('netlify_client').setLevel(logging.WARNING)
+
+THEME = {
+    'id': 'ocean',
+    'name': 'Ocean',
+    'colors': {
+        'primary': '#0EA5E9',
+        'secondary': '#0369A1',
+        'accent': '#F59E0B',
+        'text': '#0F172A',
+        'background': '#F0F9FF'
+    }
+}
+
+# (title length, description length) at the small, typical and maximum end
+PAYLOAD_SIZES = {
+    'small': (12, 60),
+    'medium': (50, 250),
+    'max': (100, 500)
+}
+
+DEFAULT_TOLERANCE = 0.25
+
+
+def text_of(length, word):
+    return ((word + ' ') * length)[:length]
+
+
+def payloads():
+    """Yield (label, title, description, theme) for every payload case"""
+    for size, (title_length, description_length) in PAYLOAD_SIZES.items():
+        title = text_of(title_length, 'Acme')
+        description = text_of(description_length, 'insight')
+        yield f'{size}/default', title, description, None
+        yield f'{size}/themed', title, description, THEME
+
+
+def build_cases():
+    """Map each case name to a zero-argument callable to benchmark"""
+    client = app.app.test_client()
+    cases = {}
+
+    for label, title, description, theme in payloads():
+        html = app.HTMLGenerator.generate_landing_page(title, description, theme)
+        body = {'title': title, 'description': description, 'theme': theme}
+
+        cases[f'render/{label}'] = (
+            lambda t=title, d=description, th=theme: app.HTMLGenerator.generate_landing_page(t, d, th)
+        )
+        # Uncached archive build vs. the content-addressed cache hit
+        cases[f'zip_build/{label}'] = lambda h=html: app.ArtifactStore.build(h)
+        cases[f'zip_cached/{label}'] = lambda h=html: app.HTMLGenerator.create_zip_file(h)
+
+        def preview_request(b=body):
+            # Clear the caches so every request renders and serializes
+            app.render_cache.clear()
+            app.preview_compression.cache.clear()
+            response = client.post('/api/preview', json=b)
+            assert response.status_code == 200, response.status_code
+
+        def preview_request_cached(b=body):
+            response = client.post('/api/preview', json=b, headers={'Accept-Encoding': 'gzip'})
+            assert response.status_code == 200, response.status_code
+
+        cases[f'preview_request/{label}'] = preview_request
+        cases[f'preview_request_cached/{label}'] = preview_request_cached
+
+    counter = iter(range(10 ** 12))
+    cases['check_rate_limit/distinct_clients'] = lambda: app.check_rate_limit(f'10.0.{next(counter) % 50000}')
+
+    def health_request():
+        assert client.get('/health').status_code == 200
+
+    def deploy_request():
+        response = client.post('/api/deploy', json={'title': 'Benchmark', 'description': 'Deploy path benchmark'})
+        assert response.status_code == 200, response.status_code
+
+    cases['health_request/'] = health_request
+    cases['deploy_request/fake_netlify'] = deploy_request
+    return cases
+
+
+def ops_per_sec(fn, min_time, rounds):
+    """Best-of-rounds throughput, each round running for at least min_time"""
+    fn()
+    # Calibrate how many calls fill one round
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 4 or iterations >= 10 ** 6:
+            break
+        iterations *= 4
+    iterations = max(1, int(iterations * min_time / max(elapsed, 1e-9)))
+
+    best = 0.0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        best = max(best, iterations / (time.perf_counter() - start))
+    return best
+
+
+def peak_allocation(fn, samples):
+    """Median traced peak allocation, in bytes, of a single call"""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(samples):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+    finally:
+        tracemalloc.stop()
+    return int(statistics.median(peaks))
+
+
+def run(cases, min_time, rounds, alloc_samples):
+    results = {}
+    for name, fn in cases.items():
+        results[name] = {
+            'ops_per_sec': round(ops_per_sec(fn, min_time, rounds), 1),
+            'peak_alloc_bytes': peak_allocation(fn, alloc_samples)
+        }
+        print(f"{name:<44} {results[name]['ops_per_sec']:>12,.1f} {results[name]['peak_alloc_bytes'] / 1024:>12.1f}")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return regression messages for cases outside tolerance of the baseline"""
+    regressions = []
+    print()
+    print(f"{'case':<44} {'ops/sec':>10} {'alloc':>10}  vs baseline")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:<44} {'new':>10}")
+            continue
+        speed = current['ops_per_sec'] / previous['ops_per_sec'] - 1
+        alloc = (current['peak_alloc_bytes'] - previous['peak_alloc_bytes']) / max(previous['peak_alloc_bytes'], 1)
+        flags = []
+        if speed < -tolerance:
+            flags.append('SLOWER')
+            regressions.append(f"{name}: {speed:+.1%} ops/sec")
+        # Small absolute changes in tiny allocations are noise
+        if alloc > tolerance and current['peak_alloc_bytes'] - previous['peak_alloc_bytes'] > 1024:
+            flags.append('MORE ALLOC')
+            regressions.append(f"{name}: {alloc:+.1%} peak allocation")
+        print(f"{name:<44} {speed:>+10.1%} {alloc:>+10.1%}  {' '.join(flags)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark render, zip, rate-limit and request paths')
+    parser.add_argument('--filter', help='Only run cases whose name contains this text')
+    parser.add_argument('--min-time', type=float, default=0.3, help='Seconds per timed round')
+    parser.add_argument('--rounds', type=int, default=3, help='Timed rounds per case (best is kept)')
+    parser.add_argument('--alloc-samples', type=int, default=25, help='Calls traced for peak allocation')
+    parser.add_argument('--save-baseline', metavar='PATH', help='Write the results as a new baseline')
+    parser.add_argument('--baseline', metavar='PATH', help='Compare against this baseline and fail on regression')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed relative slowdown or allocation growth (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    cases = build_cases()
+    if args.filter:
+        cases = {name: fn for name, fn in cases.items() if args.filter in name}
+
+    print(f"{'case':<44} {'ops/sec':>12} {'peak KiB':>12}")
+    results = run(cases, args.min_time, args.rounds, args.alloc_samples)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'results': results
+            }, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for message in regressions:
+                print(f"  {message}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Peak memory of buffered vs streamed deploy archives.
+
+Builds a site with an index page plus one bundled asset read from disk, at
+growing asset sizes, and compares the traced peak allocation of:
+
+* buffered: ``zipfile`` into a ``BytesIO``, then ``getvalue()``, which is what
+  the deploy path did before archives were streamed;
+* streamed: ``artifacts.iter_zip`` consumed chunk by chunk, as the upload body
+  consumes it.
+
+The buffered peak grows with the archive; the streamed peak stays flat.
+
+    python -m benchmarks.zip_stream --max-mib 32
+"""
+
+import argparse
+import io
+import os
+import tempfile
+import tracemalloc
+import zipfile
+
+from artifacts import STATIC_FILES, iter_zip, static_members
+
+INDEX_HTML = '<!DOCTYPE html><html><body>' + 'x' * 12000 + '</body></html>'
+
+
+def buffered(asset_path):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr('index.html', INDEX_HTML)
+        zip_file.write(asset_path, 'assets/bundle.bin')
+        for name, content in STATIC_FILES.items():
+            zip_file.writestr(name, content)
+    return len(buffer.getvalue())
+
+
+def streamed(asset_path):
+    total = 0
+    with open(asset_path, 'rb') as asset:
+        members = [('index.html', INDEX_HTML), ('assets/bundle.bin', asset)]
+        members.extend(static_members())
+        for chunk in iter_zip(members):
+            # Stand-in for the socket write done by the upload
+            total += len(chunk)
+    return total
+
+
+def peak_of(fn, *args):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    size = fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare buffered and streamed ZIP memory use')
+    parser.add_argument('--max-mib', type=int, default=32, help='Largest asset size to try, in MiB')
+    args = parser.parse_args()
+
+    print(f"{'asset MiB':>10} {'zip MiB':>10} {'buffered peak MiB':>18} {'streamed peak MiB':>18}")
+    size_mib = 1
+    while size_mib <= args.max_mib:
+        with tempfile.NamedTemporaryFile(delete=False) as asset:
+            # Half random, half repetitive so deflate has some work to do
+            for _ in range(size_mib):
+                asset.write(os.urandom(512 * 1024))
+                asset.write(b'landing page ' * (512 * 1024 // 13) + b'\0' * (512 * 1024 % 13))
+            asset_path = asset.name
+        try:
+            zip_size, buffered_peak = peak_of(buffered, asset_path)
+            _, streamed_peak = peak_of(streamed, asset_path)
+        finally:
+            os.unlink(asset_path)
+
+        print(f"{size_mib:>10} {zip_size / 2**20:>10.2f} "
+              f"{buffered_peak / 2**20:>18.2f} {streamed_peak / 2**20:>18.2f}")
+        size_mib *= 2
+
+
+if __name__ == '__main__':
+    main()
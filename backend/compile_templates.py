@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Compile the landing page templates ahead of time.
+
+Writes one byte-compiled Python module per template, plus a manifest of the
+source hashes, so the app can load them with Jinja's ``ModuleLoader`` instead
+of compiling them on start-up. Run it as a build step, after the sources are
+in place:
+
+    python compile_templates.py [--target templates_compiled]
+
+The app checks the manifest on load and falls back to compiling from source
+when a template has changed since, so a stale directory is never served.
+"""
+
+import argparse
+
+from template_registry import COMPILED_DIR, TemplateRegistry
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompile the Jinja templates')
+    parser.add_argument('--target', default=COMPILED_DIR, help='Directory for the compiled modules')
+    args = parser.parse_args()
+
+    names = TemplateRegistry().compile(args.target)
+    print(f"Compiled {len(names)} templates into {args.target}: {', '.join(names)}")
+
+
+if __name__ == '__main__':
+    main()
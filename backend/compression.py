@@ -0,0 +1,85 @@
+"""
+Conditional and compressed responses for generated HTML payloads.
+
+Preview responses are identified by a strong ETag derived from a SHA-256 of
+the response body, so a client that already holds the body can revalidate
+with ``If-None-Match`` and get an empty ``304``. Bodies are compressed with
+the best encoding the client accepts (brotli when the ``brotli`` package
+from requirements.txt is installed, otherwise gzip) and the compressed bytes are cached by
+body hash and encoding, so identical previews are compressed only once.
+
+Each encoding is a separate representation and gets its own strong ETag
+(``"<hash>-gzip"``), while ``If-None-Match`` matches on the shared body hash so
+a validator stays useful if the negotiated encoding changes.
+"""
+
+import gzip
+import hashlib
+
+from cache import LRUCache
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+# Bodies smaller than this are sent as-is; compression would not pay off
+MIN_COMPRESS_BYTES = 1024
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Offered in order of preference when the client weights them equally
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def body_hash(body):
+    """Strong validator for a response body"""
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+def etag_for(digest, encoding=None):
+    return f'{digest}-{encoding}' if encoding else digest
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        # mtime=0 keeps the output, and so the ETag, reproducible
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f'Unsupported encoding: {encoding}')
+
+
+class CompressedBodyCache:
+    """Compressed response bodies keyed by body hash and encoding"""
+
+    def __init__(self, max_bytes=8 * 1024 * 1024, max_entries=None):
+        self.cache = LRUCache(max_entries=max_entries, max_bytes=max_bytes)
+
+    def negotiate(self, accept_encodings, body):
+        """Pick a content coding for body from the client's Accept-Encoding"""
+        if len(body) < MIN_COMPRESS_BYTES:
+            return None
+        return accept_encodings.best_match(ENCODINGS)
+
+    def get(self, digest, body, encoding):
+        return self.cache.get_or_set(
+            (digest, encoding),
+            lambda: compress(body, encoding)
+        )
+
+    def stats(self):
+        stats = self.cache.stats()
+        stats['encodings'] = list(ENCODINGS)
+        return stats
+
+
+def matches(if_none_match, digest):
+    """Whether an If-None-Match header covers any representation of digest"""
+    if not if_none_match:
+        return False
+    return any(
+        if_none_match.contains_weak(etag_for(digest, encoding))
+        for encoding in (None,) + ENCODINGS
+    )
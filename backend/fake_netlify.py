@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the parts of the Netlify API used by NetlifyDeployer.
+
+Run it and point the backend at it to exercise deploys without network
+access or a real Netlify account:
+
+    python fake_netlify.py --port 8765
+    NETLIFY_API_URL=http://localhost:8765/api/v1 python app.py
+
+Like Netlify, file contents are deduplicated across the whole account, so a
+digest deploy only lists files the server has never seen as ``required``, and
+site names are unique: creating a second site with a taken name fails with
+``422``. With ``--processing-ms`` an uploaded deploy stays in ``processing``
+for that long before ``GET /deploys/<id>`` reports it ``ready``, as Netlify's
+own post-upload processing does.
+
+A ``FaultProfile`` makes the server behave like a loaded or flaky Netlify, so
+deploy throughput and tail latency can be measured reproducibly without a
+network. It adds response latency drawn from a distribution, injects ``429``
+and ``5xx`` responses at given rates, throttles upload bodies and forces
+site-name collisions. Everything is seeded, and ``--fault-routes`` limits the
+faults to some operations:
+
+    python fake_netlify.py --latency-ms 300 --latency-dist lognormal \
+        --rate-limit-rate 0.02 --error-rate 0.01 --upload-kbps 512 --seed 1
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import random
+import re
+import secrets
+import threading
+import time
+import zipfile
+from datetime import datetime, timezone
+from email import policy
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+LATENCY_DISTRIBUTIONS = ('fixed', 'uniform', 'exponential', 'lognormal')
+
+# Operations that carry file contents, which upload throttling applies to
+UPLOAD_OPERATIONS = ('create_deploy', 'upload_file')
+
+
+class FaultProfile:
+    """Latency and failure injection applied to routed requests
+
+    ``latency_ms`` is the fixed delay, the centre of a ``uniform`` range of
+    +/- ``jitter_ms``, the mean of an ``exponential`` or the median of a
+    ``lognormal`` with shape ``sigma``. ``rate_limit_rate`` and
+    ``error_rate`` are the probabilities of answering ``429`` or a ``5xx``
+    instead of handling the request. ``upload_bytes_per_sec`` throttles
+    request bodies of deploy and file uploads. ``collision_rate`` is the
+    probability that a site name is reported as taken. ``routes`` restricts
+    all of this to the named operations; None means every operation.
+    """
+
+    def __init__(self, latency_ms=0.0, latency_distribution='fixed', jitter_ms=0.0, sigma=0.5,
+                 error_rate=0.0, rate_limit_rate=0.0, retry_after=1, upload_bytes_per_sec=None,
+                 collision_rate=0.0, routes=None, seed=None):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency_distribution must be one of {', '.join(LATENCY_DISTRIBUTIONS)}")
+        self.latency_ms = latency_ms
+        self.latency_distribution = latency_distribution
+        self.jitter_ms = jitter_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.upload_bytes_per_sec = upload_bytes_per_sec
+        self.collision_rate = collision_rate
+        self.routes = frozenset(routes) if routes else None
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def applies_to(self, operation):
+        return self.routes is None or operation in self.routes
+
+    def _draw(self):
+        with self._lock:
+            return self._random.random()
+
+    def latency(self):
+        """Seconds to hold the next response"""
+        if self.latency_ms <= 0:
+            return 0.0
+        with self._lock:
+            if self.latency_distribution == 'uniform':
+                ms = self._random.uniform(self.latency_ms - self.jitter_ms, self.latency_ms + self.jitter_ms)
+            elif self.latency_distribution == 'exponential':
+                ms = self._random.expovariate(1.0 / self.latency_ms)
+            elif self.latency_distribution == 'lognormal':
+                ms = self.latency_ms * self._random.lognormvariate(0.0, self.sigma)
+            else:
+                ms = self.latency_ms
+        return max(0.0, ms) / 1000
+
+    def failure(self):
+        """Status to answer instead of handling the request, or None"""
+        draw = self._draw()
+        if draw < self.rate_limit_rate:
+            return 429
+        if draw < self.rate_limit_rate + self.error_rate:
+            with self._lock:
+                return self._random.choice((500, 502, 503))
+        return None
+
+    def upload_delay(self, size):
+        """Seconds a body of ``size`` bytes takes at the throttled rate"""
+        if not self.upload_bytes_per_sec:
+            return 0.0
+        return size / self.upload_bytes_per_sec
+
+    def collides(self):
+        return self.collision_rate > 0 and self._draw() < self.collision_rate
+
+
+class FakeNetlifyState:
+    """In-memory sites, deploys and content-addressed file blobs"""
+
+    def __init__(self, processing_seconds=0.0):
+        self.processing_seconds = processing_seconds
+        self.lock = threading.Lock()
+        self.sites = {}
+        self.site_names = set()
+        self.deploys = {}
+        self.blobs = {}
+        self.request_counts = {}
+
+    def count(self, route):
+        with self.lock:
+            self.request_counts[route] = self.request_counts.get(route, 0) + 1
+
+    def create_site(self, name):
+        """Create a site, or return None if the name is taken"""
+        site_id = secrets.token_hex(8)
+        site = {
+            'id': site_id,
+            'name': name,
+            'url': f'http://{name}.netlify.app',
+            'ssl_url': f'https://{name}.netlify.app',
+            'admin_url': f'https://app.netlify.com/sites/{name}',
+            'created_at': _now()
+        }
+        with self.lock:
+            if name in self.site_names:
+                return None
+            self.site_names.add(name)
+            self.sites[site_id] = site
+        return site
+
+    def create_deploy(self, site, files, state, required=()):
+        if state == 'ready':
+            state = self.processing_state()
+        deploy = {
+            'id': secrets.token_hex(12),
+            'site_id': site['id'],
+            'state': state,
+            'required': sorted(required),
+            'ssl_url': site['ssl_url'],
+            'url': site['url'],
+            'admin_url': site['admin_url'],
+            'created_at': _now(),
+            'files': files,
+            'ready_at': time.monotonic() + self.processing_seconds
+        }
+        with self.lock:
+            self.deploys[deploy['id']] = deploy
+        return deploy
+
+    def processing_state(self):
+        """State of a deploy whose files have all arrived"""
+        return 'processing' if self.processing_seconds > 0 else 'ready'
+
+    def finish_upload(self, deploy):
+        """Start processing a deploy once its last required file arrives"""
+        deploy['state'] = self.processing_state()
+        deploy['ready_at'] = time.monotonic() + self.processing_seconds
+
+    def settle(self, deploy):
+        """Move a processing deploy to ready once its processing time is up"""
+        with self.lock:
+            if deploy['state'] == 'processing' and time.monotonic() >= deploy['ready_at']:
+                deploy['state'] = 'ready'
+
+    def published_deploy(self, site_id):
+        """The site's newest ready deploy, which is what Netlify serves"""
+        with self.lock:
+            deploys = [deploy for deploy in self.deploys.values() if deploy['site_id'] == site_id]
+        published = None
+        for deploy in deploys:
+            self.settle(deploy)
+            if deploy['state'] == 'ready':
+                published = deploy
+        return published
+
+    def add_blob(self, content):
+        sha1 = hashlib.sha1(content).hexdigest()
+        with self.lock:
+            self.blobs[sha1] = content
+        return sha1
+
+
+class FakeNetlifyHandler(BaseHTTPRequestHandler):
+    """Routes the subset of Netlify's REST API the backend calls"""
+
+    server_version = 'FakeNetlify/1.0'
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; with Nagle on, the client's
+    # delayed ACK adds ~40ms to every keep-alive response
+    disable_nagle_algorithm = True
+
+    routes = [
+        ('POST', re.compile(r'^/api/v1/sites$'), 'create_site'),
+        ('POST', re.compile(r'^/api/v1/sites/(?P<site_id>[^/]+)/deploys$'), 'create_deploy'),
+        ('PUT', re.compile(r'^/api/v1/deploys/(?P<deploy_id>[^/]+)/files(?P<path>/.+)$'), 'upload_file'),
+        ('GET', re.compile(r'^/api/v1/deploys/(?P<deploy_id>[^/]+)$'), 'get_deploy'),
+        ('GET', re.compile(r'^/api/v1/sites/(?P<site_id>[^/]+)$'), 'get_site'),
+        ('GET', re.compile(r'^/api/v1/sites/(?P<site_id>[^/]+)/files$'), 'list_site_files'),
+    ]
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _dispatch(self, method):
+        path = self.path.split('?', 1)[0]
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(path)
+            if route_method == method and match:
+                if not self.headers.get('Authorization', '').startswith('Bearer '):
+                    return self._send_json(401, {'code': 401, 'message': 'Access Denied'})
+                self.state.count(handler)
+                body = self._read_body()
+                if self._inject_faults(handler, body):
+                    return None
+                return getattr(self, handler)(body, **match.groupdict())
+        self._read_body()
+        self._send_json(404, {'code': 404, 'message': 'Not Found'})
+
+    def _inject_faults(self, operation, body):
+        """Apply the server's FaultProfile; True if a failure was sent instead"""
+        faults = self.server.faults
+        if faults is None or not faults.applies_to(operation):
+            return False
+
+        delay = faults.latency()
+        if operation in UPLOAD_OPERATIONS:
+            delay += faults.upload_delay(len(body))
+        if delay:
+            time.sleep(delay)
+
+        status = faults.failure()
+        if status is None:
+            return False
+        self.state.count(f'injected_{status}')
+        headers = {'Retry-After': str(faults.retry_after)} if status == 429 else None
+        message = 'Rate limit exceeded' if status == 429 else 'Injected failure'
+        self._send_json(status, {'code': status, 'message': message}, headers)
+        return True
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';', 1)[0], 16)
+                if size == 0:
+                    # Skip trailers up to the terminating blank line
+                    while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                        pass
+                    return b''.join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    @staticmethod
+    def _public(deploy):
+        return {key: value for key, value in deploy.items() if key not in ('files', 'ready_at')}
+
+    def create_site(self, body):
+        payload = json.loads(body or b'{}')
+        name = payload.get('name') or f'site-{secrets.token_hex(4)}'
+        faults = self.server.faults
+        forced = faults is not None and faults.applies_to('create_site') and faults.collides()
+        site = None if forced else self.state.create_site(name)
+        if site is None:
+            # Netlify's answer for a subdomain that is already taken
+            self.state.count('name_collision')
+            return self._send_json(422, {
+                'code': 422,
+                'message': 'Validation Failed',
+                'errors': {'subdomain': ['must be unique']}
+            })
+        self._send_json(201, site)
+
+    def create_deploy(self, body, site_id):
+        site = self.state.sites.get(site_id)
+        if site is None:
+            return self._send_json(404, {'code': 404, 'message': 'Not Found'})
+
+        content_type = self.headers.get('Content-Type', '')
+        if content_type.startswith('application/json'):
+            manifest = json.loads(body or b'{}').get('files') or {}
+            required = {sha1 for sha1 in manifest.values() if sha1 not in self.state.blobs}
+            state = 'uploading' if required else 'ready'
+            deploy = self.state.create_deploy(site, manifest, state, required)
+            return self._send_json(200, self._public(deploy))
+
+        archive = self._extract_zip(body, content_type)
+        if archive is None:
+            return self._send_json(422, {'code': 422, 'message': 'Unsupported deploy body'})
+
+        files = {}
+        try:
+            with zipfile.ZipFile(io.BytesIO(archive)) as zip_file:
+                for name in zip_file.namelist():
+                    files['/' + name] = self.state.add_blob(zip_file.read(name))
+        except zipfile.BadZipFile:
+            return self._send_json(422, {'code': 422, 'message': 'Invalid ZIP archive'})
+        deploy = self.state.create_deploy(site, files, 'ready')
+        self._send_json(200, self._public(deploy))
+
+    @staticmethod
+    def _extract_zip(body, content_type):
+        if content_type.startswith('application/zip'):
+            return body
+        if content_type.startswith('multipart/form-data'):
+            message = BytesParser(policy=policy.default).parsebytes(
+                b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body
+            )
+            for part in message.iter_parts():
+                if part.get_param('name', header='content-disposition') == 'zip':
+                    return part.get_payload(decode=True)
+        return None
+
+    def upload_file(self, body, deploy_id, path):
+        deploy = self.state.deploys.get(deploy_id)
+        if deploy is None:
+            return self._send_json(404, {'code': 404, 'message': 'Not Found'})
+
+        path = unquote(path)
+        sha1 = self.state.add_blob(body)
+        if deploy['files'].get(path) != sha1:
+            return self._send_json(422, {'code': 422, 'message': f'Unexpected content for {path}'})
+
+        with self.state.lock:
+            deploy['required'] = [digest for digest in deploy['required'] if digest != sha1]
+            if not deploy['required']:
+                self.state.finish_upload(deploy)
+        self._send_json(200, {'id': sha1, 'deploy_id': deploy_id, 'path': path})
+
+    def get_deploy(self, body, deploy_id):
+        deploy = self.state.deploys.get(deploy_id)
+        if deploy is None:
+            return self._send_json(404, {'code': 404, 'message': 'Not Found'})
+        self.state.settle(deploy)
+        self._send_json(200, self._public(deploy))
+
+
+    def get_site(self, body, site_id):
+        site = self.state.sites.get(site_id)
+        if site is None:
+            return self._send_json(404, {'code': 404, 'message': 'Not Found'})
+        deploy = self.state.published_deploy(site_id)
+        self._send_json(200, dict(site, published_deploy=self._public(deploy) if deploy else None))
+
+    def list_site_files(self, body, site_id):
+        if site_id not in self.state.sites:
+            return self._send_json(404, {'code': 404, 'message': 'Not Found'})
+        deploy = self.state.published_deploy(site_id)
+        files = deploy['files'] if deploy else {}
+        self._send_json(200, [
+            {'id': path, 'path': path, 'sha': sha1, 'size': len(self.state.blobs.get(sha1, b''))}
+            for path, sha1 in sorted(files.items())
+        ])
+
+
+class FakeNetlifyServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding a shared FakeNetlifyState"""
+
+    daemon_threads = True
+    # Load tests open hundreds of connections at once
+    request_queue_size = 512
+
+    def __init__(self, address=('127.0.0.1', 0), verbose=False, faults=None, processing_seconds=0.0):
+        super().__init__(address, FakeNetlifyHandler)
+        self.state = FakeNetlifyState(processing_seconds)
+        self.verbose = verbose
+        self.faults = faults
+
+    @property
+    def api_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/api/v1'
+
+    def start(self):
+        """Serve from a background thread, for use from scripts and tests"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local stand-in for the Netlify API')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    parser.add_argument('--processing-ms', type=float, default=0.0,
+                        help='Time an uploaded deploy spends processing before it is ready')
+    faults = parser.add_argument_group('fault injection')
+    faults.add_argument('--latency-ms', type=float, default=0.0, help='Response latency: fixed value, mean or median')
+    faults.add_argument('--latency-dist', choices=LATENCY_DISTRIBUTIONS, default='fixed', help='Latency distribution')
+    faults.add_argument('--jitter-ms', type=float, default=0.0, help='Half-width of the uniform distribution')
+    faults.add_argument('--sigma', type=float, default=0.5, help='Shape of the lognormal distribution')
+    faults.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of requests answered with 429')
+    faults.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429s')
+    faults.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 500/502/503')
+    faults.add_argument('--upload-kbps', type=float, default=0.0, help='Throttle upload bodies to this many KiB/s')
+    faults.add_argument('--collision-rate', type=float, default=0.0, help='Fraction of site names reported as taken')
+    faults.add_argument('--fault-routes', nargs='+', metavar='OPERATION',
+                        help='Only inject into these operations (create_site, create_deploy, upload_file, '
+                             'get_deploy, get_site, list_site_files)')
+    faults.add_argument('--seed', type=int, help='Seed for reproducible fault sequences')
+    args = parser.parse_args()
+
+    profile = FaultProfile(
+        latency_ms=args.latency_ms,
+        latency_distribution=args.latency_dist,
+        jitter_ms=args.jitter_ms,
+        sigma=args.sigma,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        upload_bytes_per_sec=args.upload_kbps * 1024 or None,
+        collision_rate=args.collision_rate,
+        routes=args.fault_routes,
+        seed=args.seed
+    )
+    server = FakeNetlifyServer((args.host, args.port), verbose=args.verbose, faults=profile,
+                               processing_seconds=args.processing_ms / 1000)
+    print(f"Fake Netlify API listening on {server.api_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for a Redis server, covering the commands RedisLimiter uses.
+
+It speaks RESP2 over TCP and keeps string keys with optional expiry in
+memory. Every command runs under one lock, and MULTI/EXEC queues commands
+and runs them as one atomic batch, matching Redis semantics closely enough
+to exercise the shared rate limiter offline:
+
+    python fake_redis.py --port 6380
+    RATE_LIMIT_BACKEND=redis REDIS_URL=redis://localhost:6380/0 python app.py
+"""
+
+import argparse
+import fnmatch
+import socketserver
+import threading
+import time
+
+
+class FakeRedisState:
+    """Keys, values and expiry times shared by every connection"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = {}
+        self.expires = {}
+
+    def _alive(self, key):
+        expires_at = self.expires.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def _incr_by(self, key, amount):
+        value = int(self.data[key]) if self._alive(key) else 0
+        value += amount
+        self.data[key] = str(value).encode()
+        return value
+
+    # Command implementations; the caller holds self.lock
+
+    def cmd_ping(self, *args):
+        return ('+', 'PONG')
+
+    def cmd_auth(self, *args):
+        return ('+', 'OK')
+
+    def cmd_select(self, *args):
+        return ('+', 'OK')
+
+    def cmd_get(self, key):
+        return self.data[key] if self._alive(key) else None
+
+    def cmd_set(self, key, value):
+        self.data[key] = value
+        self.expires.pop(key, None)
+        return ('+', 'OK')
+
+    def cmd_incr(self, key):
+        return self._incr_by(key, 1)
+
+    def cmd_decr(self, key):
+        return self._incr_by(key, -1)
+
+    def cmd_incrby(self, key, amount):
+        return self._incr_by(key, int(amount))
+
+    def cmd_expire(self, key, seconds):
+        if not self._alive(key):
+            return 0
+        self.expires[key] = time.monotonic() + int(seconds)
+        return 1
+
+    def cmd_ttl(self, key):
+        if not self._alive(key):
+            return -2
+        expires_at = self.expires.get(key)
+        return -1 if expires_at is None else int(expires_at - time.monotonic())
+
+    def cmd_del(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                del self.data[key]
+                self.expires.pop(key, None)
+                removed += 1
+        return removed
+
+    def cmd_dbsize(self):
+        return sum(1 for key in list(self.data) if self._alive(key))
+
+    def cmd_scan(self, cursor, *args):
+        # Walks the sorted key list; the cursor is an offset into it
+        options = {name.decode().lower(): value for name, value in zip(args[::2], args[1::2])}
+        pattern = options.get('match', b'*')
+        count = int(options.get('count', 10))
+        keys = sorted(key for key in list(self.data) if self._alive(key))
+        start = int(cursor)
+        batch = keys[start:start + count]
+        next_cursor = start + count if start + count < len(keys) else 0
+        return [str(next_cursor).encode(), [key for key in batch if fnmatch.fnmatchcase(key, pattern)]]
+
+    def cmd_flushdb(self):
+        self.data.clear()
+        self.expires.clear()
+        return ('+', 'OK')
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    """Parses RESP2 command arrays and writes replies"""
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            # Inline command, as typed into telnet
+            return line.strip().split()
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    @staticmethod
+    def _encode(reply):
+        if isinstance(reply, tuple):
+            kind, text = reply
+            return f'{kind}{text}\r\n'.encode()
+        if reply is None:
+            return b'$-1\r\n'
+        if isinstance(reply, int):
+            return b':%d\r\n' % reply
+        if isinstance(reply, bytes):
+            return b'$%d\r\n%s\r\n' % (len(reply), reply)
+        if isinstance(reply, list):
+            return b'*%d\r\n' % len(reply) + b''.join(RespHandler._encode(item) for item in reply)
+        raise TypeError(f'Cannot encode {reply!r}')
+
+    def _run(self, name, args):
+        handler = getattr(self.server.state, f'cmd_{name}', None)
+        if handler is None:
+            return ('-', f"ERR unknown command '{name}'")
+        try:
+            return handler(*args)
+        except (TypeError, ValueError) as e:
+            return ('-', f'ERR {e}')
+
+    def handle(self):
+        state = self.server.state
+        queued = None
+        while True:
+            command = self._read_command()
+            if command is None:
+                return
+            if not command:
+                continue
+            name = command[0].decode().lower()
+            args = command[1:]
+
+            if name == 'multi':
+                queued = []
+                reply = ('+', 'OK')
+            elif name == 'discard':
+                queued = None
+                reply = ('+', 'OK')
+            elif name == 'exec':
+                if queued is None:
+                    reply = ('-', 'ERR EXEC without MULTI')
+                else:
+                    with state.lock:
+                        reply = [self._run(queued_name, queued_args) for queued_name, queued_args in queued]
+                    queued = None
+            elif queued is not None:
+                queued.append((name, args))
+                reply = ('+', 'QUEUED')
+            else:
+                with state.lock:
+                    reply = self._run(name, args)
+
+            self.wfile.write(self._encode(reply))
+            self.wfile.flush()
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """Threaded TCP server holding a shared FakeRedisState"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=('127.0.0.1', 0)):
+        super().__init__(address, RespHandler)
+        self.state = FakeRedisState()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'redis://{host}:{port}/0'
+
+    def start(self):
+        """Serve from a background thread, for use from scripts and tests"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local stand-in for a Redis server')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind')
+    parser.add_argument('--port', type=int, default=6380, help='Port to listen on')
+    args = parser.parse_args()
+
+    server = FakeRedisServer((args.host, args.port))
+    print(f"Fake Redis listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
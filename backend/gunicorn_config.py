@@ -1,13 +1,44 @@
 import os
+import sys
 
 # Server socket
 bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
 backlog = 2048
 
 # Worker processes
-workers = 1
-worker_class = "sync"
-worker_connections = 1000
+#
+# SERVER_PROFILE picks how each worker handles concurrent requests:
+#   gthread (default) - a pool of GUNICORN_THREADS threads per worker, so a slow
+#                       Netlify upload only holds one thread, not the worker
+#   gevent            - one greenlet per request, up to GUNICORN_WORKER_CONNECTIONS;
+#                       suits hundreds of deploys waiting on Netlify at once.
+#                       gevent is in requirements.txt; falls back to gthread without it.
+#                       Not the shipped default: threading.local becomes
+#                       greenlet-local, so the SQLite stores and the Redis limiter
+#                       open a connection per request, and a SQLite lock wait
+#                       blocks every greenlet in the worker
+#   sync              - one request at a time per worker
+SERVER_PROFILES = ('gthread', 'gevent', 'sync')
+
+server_profile = os.getenv('SERVER_PROFILE', 'gthread').lower()
+if server_profile not in SERVER_PROFILES:
+    raise ValueError(f"SERVER_PROFILE must be one of {', '.join(SERVER_PROFILES)}")
+
+if server_profile == 'gevent':
+    try:
+        from gevent import monkey
+    except ImportError:
+        print("gevent is not installed, falling back to SERVER_PROFILE=gthread", file=sys.stderr)
+        server_profile = 'gthread'
+    else:
+        # Patch before preload_app imports the app, so requests, ssl and the
+        # app's locks and threads are all cooperative in every worker
+        monkey.patch_all()
+
+workers = int(os.getenv('WEB_CONCURRENCY', '1'))
+worker_class = server_profile
+threads = int(os.getenv('GUNICORN_THREADS', '16')) if server_profile == 'gthread' else 1
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '1000'))
 timeout = 30
 keepalive = 2
 
@@ -30,4 +61,19 @@ preload_app = True
 # Security
 limit_request_line = 0
 limit_request_fields = 100
-limit_request_field_size = 8190 
\ No newline at end of file
+limit_request_field_size = 8190 
+
+def on_starting(server):
+    """Drop metrics snapshots left by a previous run of the server"""
+    from metrics import clear_directory
+    clear_directory(os.getenv('METRICS_DIR'))
+
+def post_worker_init(worker):
+    """Start the app's background threads before the worker takes requests
+
+    With preload_app the app, its templates and its warm-up already ran in the
+    master, so this is the last piece of per-process setup and the first
+    request no longer pays for it.
+    """
+    from app import start_background_workers
+    start_background_workers()
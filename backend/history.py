@@ -0,0 +1,245 @@
+"""
+Persistent deployment history.
+
+Every successful deploy is appended to a ``deployments`` table in a WAL-mode
+SQLite file shared by all workers on the host. Requests never wait on the
+disk: ``record`` puts the row on a bounded queue and a writer thread per
+process inserts queued rows in batches, one transaction each. When the queue
+is full (the disk has stalled), rows are dropped and counted rather than
+holding up deploys.
+
+Listings use keyset pagination on ``(created_at, id)``: each page returns an
+opaque cursor holding the last row's sort key, and the next page seeks past
+it through an index. A page costs the same however deep it is, unlike
+``OFFSET``, which has to walk every skipped row. Indexes cover the filters
+the API offers: by client, by site and by time.
+"""
+
+import base64
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+from shared_sqlite import SQLiteConnections
+
+logger = logging.getLogger(__name__)
+
+INDEXES = ('deployments_by_client', 'deployments_by_site', 'deployments_by_time')
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS deployments ('
+    ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+    # NULL for deploys made without a client id; only admin listings see them
+    ' client TEXT,'
+    ' site_id TEXT NOT NULL,'
+    ' deploy_id TEXT,'
+    ' title TEXT NOT NULL,'
+    ' description TEXT NOT NULL,'
+    ' theme TEXT,'
+    ' url TEXT,'
+    ' admin_url TEXT,'
+    ' updated INTEGER NOT NULL DEFAULT 0,'
+    ' created_at REAL NOT NULL'
+    ')',
+    'CREATE INDEX IF NOT EXISTS deployments_by_client ON deployments (client, created_at, id)',
+    'CREATE INDEX IF NOT EXISTS deployments_by_site ON deployments (site_id, created_at, id)',
+    'CREATE INDEX IF NOT EXISTS deployments_by_time ON deployments (created_at, id)'
+)
+
+COLUMNS = ('client', 'site_id', 'deploy_id', 'title', 'description', 'theme', 'url', 'admin_url',
+           'updated', 'created_at')
+
+
+class InvalidCursor(ValueError):
+    """Raised for a pagination cursor this store did not issue"""
+
+
+def encode_cursor(created_at, row_id):
+    payload = json.dumps([created_at, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return float(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def _isoformat(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+class DeploymentHistory:
+    """Append-only deployment log with a background batch writer"""
+
+    def __init__(self, path, queue_size=10000, batch_size=500, busy_timeout=5.0):
+        self.path = path
+        self.batch_size = batch_size
+        self._connections = SQLiteConnections(path, busy_timeout)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._pid = None
+
+        self.written = 0
+        self.dropped = 0
+        self.write_errors = 0
+
+        self._connections.execute_script(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Rebuild a table from before client became nullable"""
+        def client_required(conn):
+            return any(column[1] == 'client' and column[3] for column in conn.execute('PRAGMA table_info(deployments)'))
+
+        conn = self._connections.connect()
+        try:
+            if not client_required(conn):
+                return
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Another process may have migrated it while we waited
+                if client_required(conn):
+                    for index in INDEXES:
+                        conn.execute(f'DROP INDEX IF EXISTS {index}')
+                    conn.execute('ALTER TABLE deployments RENAME TO deployments_old')
+                    for statement in SCHEMA:
+                        conn.execute(statement)
+                    conn.execute(f"INSERT INTO deployments (id, {', '.join(COLUMNS)}) "
+                                 f"SELECT id, {', '.join(COLUMNS)} FROM deployments_old")
+                    conn.execute('DROP TABLE deployments_old')
+                    logger.info('Migrated the deployment history to allow deploys without a client id')
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        finally:
+            conn.close()
+
+    def _connection(self):
+        return self._connections.get()
+
+    def ensure_started(self):
+        """Start the writer thread in this process if it isn't running"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Rows queued before a fork are written by the parent
+            self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._pid = os.getpid()
+            thread = threading.Thread(target=self._write_loop, name='history-writer', daemon=True)
+            thread.start()
+
+    def record(self, client, summary, now=None):
+        """Queue a deploy summary for writing; never blocks the caller"""
+        self.ensure_started()
+        row = (
+            client,
+            summary['site_id'],
+            summary.get('deploy_id'),
+            summary['title'],
+            summary['description'],
+            summary.get('theme'),
+            summary.get('url'),
+            summary.get('admin_url'),
+            1 if summary.get('updated') else 0,
+            time.time() if now is None else now
+        )
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"Deployment history queue full, dropped record for site {summary['site_id']}")
+
+    def _write_loop(self):
+        while True:
+            rows = [self._queue.get()]
+            while len(rows) < self.batch_size:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._insert(rows)
+            except Exception as e:
+                self.write_errors += 1
+                logger.error(f"Writing {len(rows)} deployment history rows failed: {str(e)}")
+            finally:
+                for _ in rows:
+                    self._queue.task_done()
+
+    def _insert(self, rows):
+        with self._connections.transaction() as conn:
+            conn.executemany(
+                f"INSERT INTO deployments ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                rows
+            )
+        self.written += len(rows)
+
+    def flush(self):
+        """Wait until every queued row has been written"""
+        if self._pid == os.getpid():
+            self._queue.join()
+
+    def query(self, client=None, site_id=None, since=None, until=None, limit=50, cursor=None):
+        """Return ``(rows, next_cursor)``, newest first
+
+        ``since`` and ``until`` are Unix timestamps bounding ``created_at``.
+        ``next_cursor`` is None on the last page.
+        """
+        clauses = []
+        params = []
+        if client is not None:
+            clauses.append('client = ?')
+            params.append(client)
+        if site_id is not None:
+            clauses.append('site_id = ?')
+            params.append(site_id)
+        if since is not None:
+            clauses.append('created_at >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('created_at < ?')
+            params.append(until)
+        if cursor is not None:
+            clauses.append('(created_at, id) < (?, ?)')
+            params.extend(decode_cursor(cursor))
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        # One extra row tells whether another page follows
+        rows = self._connection().execute(
+            f"SELECT id, {', '.join(COLUMNS)} FROM deployments {where} "
+            f"ORDER BY created_at DESC, id DESC LIMIT ?",
+            params + [limit + 1]
+        ).fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        records = [self._to_dict(row) for row in rows]
+        next_cursor = encode_cursor(rows[-1][-1], rows[-1][0]) if has_more else None
+        return records, next_cursor
+
+    @staticmethod
+    def _to_dict(row):
+        record = dict(zip(('id',) + COLUMNS, row))
+        record['updated'] = bool(record['updated'])
+        record['created_at'] = _isoformat(record['created_at'])
+        return record
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'write_errors': self.write_errors
+        }
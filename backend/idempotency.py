@@ -0,0 +1,278 @@
+"""
+Idempotency keys and single-flight coalescing for deploy requests.
+
+A client that sends ``Idempotency-Key`` gets the same response for every
+request carrying that key: the first request (the leader) runs, concurrent
+duplicates (followers) wait for the leader's response instead of repeating
+the work, and later retries are answered from a bounded store of finished
+responses that expire after ``ttl`` seconds. Requests without a key are still
+coalesced while an identical request from the same client is in flight, but
+nothing is replayed once it finishes.
+
+A key may only be reused with the same request; a different payload under a
+known key raises ``IdempotencyKeyReused``. Responses that are worth retrying
+(``429`` and ``5xx``) are handed to the waiting followers but not replayed,
+so the next retry runs again.
+
+Requests and responses are kept in an ``idempotency`` table in a WAL-mode
+SQLite file shared by every gunicorn worker on the host (by default the rate
+limiter's), so a retry routed to another worker is still recognised. A
+follower in the leader's own process is woken directly; one in another
+worker polls the leader's row until the response is written. A leader that
+dies without finishing holds its key for ``lease`` seconds, after which the
+next request takes over.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from shared_sqlite import SQLiteConnections
+
+# Outcomes of IdempotencyStore.begin
+LEAD = 'lead'
+FOLLOW = 'follow'
+REPLAY = 'replay'
+
+# A row with a NULL status is a request still being run by its leader; a
+# finished row is replayed to later requests only when ``replay`` is set.
+# Rows that aren't replayed stay just long enough for polling followers.
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS idempotency ('
+    ' key TEXT PRIMARY KEY,'
+    ' flight TEXT NOT NULL,'
+    ' fingerprint TEXT NOT NULL,'
+    ' status INTEGER,'
+    ' body BLOB,'
+    ' headers TEXT,'
+    ' size INTEGER NOT NULL DEFAULT 0,'
+    ' replay INTEGER NOT NULL DEFAULT 0,'
+    ' expires_at REAL NOT NULL'
+    ')',
+    'CREATE INDEX IF NOT EXISTS idempotency_by_expiry ON idempotency (expires_at)'
+)
+
+# How long a finished response that isn't replayed stays readable by
+# followers polling from other workers
+HANDOFF_SECONDS = 10.0
+
+
+class IdempotencyKeyReused(Exception):
+    """Raised when a key is sent again with a different request"""
+
+
+class StoredResponse:
+    """The parts of a finished response needed to replay it"""
+
+    __slots__ = ('fingerprint', 'status', 'body', 'headers')
+
+    def __init__(self, fingerprint, status, body, headers):
+        self.fingerprint = fingerprint
+        self.status = status
+        self.body = body
+        self.headers = headers
+
+    @property
+    def retryable(self):
+        return self.status == 429 or self.status >= 500
+
+
+def _row_key(key):
+    """The table key for a scope tuple"""
+    return hashlib.sha256(json.dumps(key, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+def _stored_response(fingerprint, status, body, headers):
+    """A StoredResponse from the columns of a finished row"""
+    return StoredResponse(fingerprint, status, bytes(body), [tuple(header) for header in json.loads(headers)])
+
+
+class Flight:
+    """A request being run by its leader in this process, waited on by any followers"""
+
+    def __init__(self, fingerprint, flight_id=None):
+        self.fingerprint = fingerprint
+        self.flight_id = flight_id or os.urandom(16).hex()
+        self.response = None
+        self.followers = 0
+        self._done = threading.Event()
+
+    def wait(self, timeout):
+        """The leader's StoredResponse, or None on timeout or leader failure"""
+        self._done.wait(timeout)
+        return self.response
+
+
+class RemoteFlight:
+    """A request being run by a leader in another worker"""
+
+    def __init__(self, store, row_key, fingerprint, flight_id):
+        self.fingerprint = fingerprint
+        self.flight_id = flight_id
+        self._store = store
+        self._row_key = row_key
+
+    def wait(self, timeout):
+        """Poll the leader's row; None on timeout or when the leader gave up"""
+        deadline = time.monotonic() + timeout
+        while True:
+            row = self._store._connections.get().execute(
+                'SELECT flight, status, body, headers FROM idempotency WHERE key = ?', (self._row_key,)
+            ).fetchone()
+            if row is None or row[0] != self.flight_id:
+                return None
+            if row[1] is not None:
+                return _stored_response(self.fingerprint, row[1], row[2], row[3])
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self._store.poll_interval)
+
+
+class IdempotencyStore:
+    """In-flight requests plus a TTL store of finished responses, shared through SQLite"""
+
+    def __init__(self, path, max_entries=10000, max_bytes=None, ttl=86400, lease=300,
+                 poll_interval=0.05, prune_interval=60.0, busy_timeout=5.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.prune_interval = prune_interval
+        self._connections = SQLiteConnections(path, busy_timeout)
+        self._connections.execute_script(SCHEMA)
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._next_prune = 0.0
+
+        self.outcomes = {LEAD: 0, FOLLOW: 0, REPLAY: 0, 'conflicts': 0}
+
+    def _count(self, outcome):
+        with self._lock:
+            self.outcomes[outcome] += 1
+
+    def begin(self, key, fingerprint):
+        """Return ``(outcome, value)`` for a request
+
+        ``(REPLAY, StoredResponse)`` when the key already finished,
+        ``(FOLLOW, flight)`` when the same request is in flight, and
+        ``(LEAD, Flight)`` when the caller should run it and then call
+        ``finish``.
+        """
+        row_key = _row_key(key)
+        with self._lock:
+            flight = self._flights.get(row_key)
+            if flight is not None:
+                if flight.fingerprint != fingerprint:
+                    self.outcomes['conflicts'] += 1
+                    raise IdempotencyKeyReused('Idempotency-Key was already used with a different request')
+                flight.followers += 1
+                self.outcomes[FOLLOW] += 1
+                return FOLLOW, flight
+
+        now = time.time()
+        flight = Flight(fingerprint)
+        with self._connections.transaction() as conn:
+            row = conn.execute(
+                'SELECT flight, fingerprint, status, body, headers, replay FROM idempotency'
+                ' WHERE key = ? AND expires_at > ?',
+                (row_key, now)
+            ).fetchone()
+            if row is not None and (row[2] is None or row[5]):
+                if row[1] != fingerprint:
+                    self._count('conflicts')
+                    raise IdempotencyKeyReused('Idempotency-Key was already used with a different request')
+                if row[2] is not None:
+                    self._count(REPLAY)
+                    return REPLAY, _stored_response(fingerprint, row[2], row[3], row[4])
+                self._count(FOLLOW)
+                return FOLLOW, RemoteFlight(self, row_key, fingerprint, row[0])
+
+            conn.execute(
+                'INSERT OR REPLACE INTO idempotency (key, flight, fingerprint, expires_at) VALUES (?, ?, ?, ?)',
+                (row_key, flight.flight_id, fingerprint, now + self.lease)
+            )
+
+        with self._lock:
+            self._flights[row_key] = flight
+            self.outcomes[LEAD] += 1
+        return LEAD, flight
+
+    def finish(self, key, flight, response, remember=True):
+        """Publish the leader's response to followers and, if kept, to retries
+
+        ``response`` is a StoredResponse, or None when the leader failed
+        without one.
+        """
+        row_key = _row_key(key)
+        flight.response = response
+        now = time.time()
+        try:
+            conn = self._connections.get()
+            if response is None:
+                conn.execute('DELETE FROM idempotency WHERE key = ? AND flight = ?', (row_key, flight.flight_id))
+            else:
+                replay = remember and not response.retryable
+                conn.execute(
+                    'UPDATE idempotency SET status = ?, body = ?, headers = ?, size = ?, replay = ?, expires_at = ?'
+                    ' WHERE key = ? AND flight = ?',
+                    (
+                        response.status,
+                        response.body,
+                        json.dumps(response.headers),
+                        len(response.body),
+                        int(replay),
+                        now + (self.ttl if replay else HANDOFF_SECONDS),
+                        row_key,
+                        flight.flight_id
+                    )
+                )
+        finally:
+            with self._lock:
+                self._flights.pop(row_key, None)
+            flight._done.set()
+
+        if now >= self._next_prune:
+            self._next_prune = now + self.prune_interval
+            self.prune(now)
+
+    def prune(self, now=None):
+        """Drop expired rows, then the oldest responses over the size limits"""
+        now = time.time() if now is None else now
+        conn = self._connections.get()
+        conn.execute('DELETE FROM idempotency WHERE expires_at <= ?', (now,))
+        limits = []
+        params = []
+        if self.max_entries:
+            limits.append('n > ?')
+            params.append(self.max_entries)
+        if self.max_bytes:
+            limits.append('total > ?')
+            params.append(self.max_bytes)
+        if limits:
+            conn.execute(
+                'DELETE FROM idempotency WHERE key IN ('
+                ' SELECT key FROM ('
+                '  SELECT key,'
+                '   ROW_NUMBER() OVER (ORDER BY expires_at DESC) AS n,'
+                '   SUM(size) OVER (ORDER BY expires_at DESC) AS total'
+                '  FROM idempotency WHERE replay = 1'
+                f' ) WHERE {" OR ".join(limits)}'
+                ')',
+                params
+            )
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.outcomes)
+            stats['in_flight'] = len(self._flights)
+        entries, size = self._connections.get().execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM idempotency WHERE replay = 1 AND expires_at > ?',
+            (time.time(),)
+        ).fetchone()
+        stats['stored'] = {'entries': entries, 'bytes': size}
+        stats['path'] = self.path
+        return stats
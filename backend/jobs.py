@@ -0,0 +1,410 @@
+"""
+Background deploy jobs.
+
+``JobManager`` runs deploy pipelines on a bounded thread pool so the web
+worker that accepted the request can answer straight away with a job id.
+Each ``DeployJob`` records its stage transitions; clients read them by
+polling ``GET /api/deploy/<job_id>`` or by following the Server-Sent Events
+stream at ``GET /api/deploy/<job_id>/events``.
+
+A job runs in the worker that accepted it, but its state, result and stage
+history are written to a WAL-mode SQLite file shared by every gunicorn
+worker on the host, so a status request or event stream routed to any worker
+finds it. The running worker wakes its own waiters directly; other workers
+poll the job's rows.
+
+A job holds a lease that its worker renews every few seconds while the job is
+queued or running. If the worker dies, the lease runs out after ``lease``
+seconds and whoever next reads the job marks it failed, so it gets a
+``finished_at``, is purged like any other job, and its event streams end.
+"""
+
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from shared_sqlite import SQLiteConnections
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RENDERING = 'rendering'
+ZIPPING = 'zipping'
+CREATING_SITE = 'creating_site'
+UPLOADING = 'uploading'
+READY = 'ready'
+FAILED = 'failed'
+
+TERMINAL_STATES = (READY, FAILED)
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS deploy_jobs ('
+    ' id TEXT PRIMARY KEY,'
+    ' title TEXT NOT NULL,'
+    ' state TEXT NOT NULL,'
+    ' result TEXT,'
+    ' error TEXT,'
+    ' created_at TEXT NOT NULL,'
+    ' finished_at REAL,'
+    ' lease_until REAL'
+    ')',
+    'CREATE INDEX IF NOT EXISTS deploy_jobs_by_finish ON deploy_jobs (finished_at)',
+    'CREATE TABLE IF NOT EXISTS deploy_job_events ('
+    ' job_id TEXT NOT NULL,'
+    ' seq INTEGER NOT NULL,'
+    ' event TEXT NOT NULL,'
+    ' PRIMARY KEY (job_id, seq)'
+    ')'
+)
+
+
+# Error recorded on a job whose worker stopped renewing its lease
+ABANDONED = 'The worker running this deploy stopped before it finished'
+
+
+class JobQueueFull(Exception):
+    """Raised when the deploy queue cannot accept another job"""
+
+
+def fail_abandoned_jobs(conn, now, job_id=None):
+    """Mark unfinished jobs whose lease ran out as failed; returns how many
+
+    Runs inside the caller's transaction. Limited to ``job_id`` when given.
+    """
+    query = 'SELECT id FROM deploy_jobs WHERE finished_at IS NULL AND lease_until < ?'
+    params = (now,)
+    if job_id is not None:
+        query += ' AND id = ?'
+        params += (job_id,)
+    stale = [row[0] for row in conn.execute(query, params).fetchall()]
+    for stale_id in stale:
+        seq = conn.execute(
+            'SELECT COALESCE(MAX(seq) + 1, 0) FROM deploy_job_events WHERE job_id = ?', (stale_id,)
+        ).fetchone()[0]
+        conn.execute(
+            'UPDATE deploy_jobs SET state = ?, error = ?, finished_at = ? WHERE id = ?',
+            (FAILED, ABANDONED, now, stale_id)
+        )
+        conn.execute(
+            'INSERT INTO deploy_job_events (job_id, seq, event) VALUES (?, ?, ?)',
+            (stale_id, seq, json.dumps({'state': FAILED, 'at': datetime.now().isoformat(), 'message': ABANDONED}))
+        )
+    if stale:
+        logger.warning(f"Marked {len(stale)} abandoned deploy job(s) as failed")
+    return len(stale)
+
+
+class DeployJob:
+    """State and stage history of a single background deploy
+
+    The instance held by the running worker writes every change through to
+    the shared store; instances loaded by other workers read it back.
+    """
+
+    def __init__(self, connections, job_id, title, state=QUEUED, result=None, error=None,
+                 created_at=None, events=None, poll_interval=0.25, lease=60.0):
+        self.id = job_id
+        self.title = title
+        self.state = state
+        self.result = result
+        self.error = error
+        self.created_at = created_at or datetime.now().isoformat()
+        self.events = events if events is not None else []
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self._connections = connections
+        self._changed = threading.Condition()
+        # Set on the instance running the pipeline
+        self._local = False
+
+    @staticmethod
+    def _event(state, **extra):
+        event = {'state': state, 'at': datetime.now().isoformat()}
+        event.update(extra)
+        return event
+
+    @property
+    def done(self):
+        return self.state in TERMINAL_STATES
+
+    def _write(self, state, event, result=None, error=None):
+        """Record a transition: the new state and its event in one transaction
+
+        Returns False, writing nothing, if the job already finished, which
+        happens when its lease ran out and another worker failed it.
+        """
+        now = time.time()
+        finished_at = now if state in TERMINAL_STATES else None
+        with self._connections.transaction() as conn:
+            updated = conn.execute(
+                'UPDATE deploy_jobs SET state = ?, result = ?, error = ?, finished_at = ?, lease_until = ?'
+                ' WHERE id = ? AND finished_at IS NULL',
+                (state, json.dumps(result) if result is not None else None, error, finished_at,
+                 now + self.lease, self.id)
+            ).rowcount
+            if not updated:
+                return False
+            conn.execute(
+                'INSERT INTO deploy_job_events (job_id, seq, event) VALUES (?, ?, ?)',
+                (self.id, len(self.events), json.dumps(event))
+            )
+        return True
+
+    def advance(self, state, **extra):
+        """Move the job to a new stage and wake anyone waiting on it"""
+        with self._changed:
+            event = self._event(state, **extra)
+            if self._write(state, event, self.result, self.error):
+                self.state = state
+                self.events.append(event)
+            else:
+                self.refresh()
+            self._changed.notify_all()
+
+    def succeed(self, result):
+        self.result = result
+        self.advance(READY, url=result.get('url'))
+
+    def fail(self, message):
+        self.error = message
+        self.advance(FAILED, message=message)
+
+    def refresh(self):
+        """Reload state and any new events written by the running worker"""
+        conn = self._connections.get()
+        conn.execute('BEGIN')
+        try:
+            row = conn.execute(
+                'SELECT state, result, error, finished_at, lease_until FROM deploy_jobs WHERE id = ?', (self.id,)
+            ).fetchone()
+            events = conn.execute(
+                'SELECT event FROM deploy_job_events WHERE job_id = ? AND seq >= ? ORDER BY seq',
+                (self.id, len(self.events))
+            ).fetchall()
+        finally:
+            conn.execute('COMMIT')
+        if row is None:
+            return
+        if not self._local and row[3] is None and row[4] is not None and row[4] < time.time():
+            # Its worker is gone; fail the job and read it back
+            with self._connections.transaction() as conn:
+                fail_abandoned_jobs(conn, time.time(), self.id)
+            return self.refresh()
+        row = row[:3]
+        with self._changed:
+            self.state, result, self.error = row
+            self.result = json.loads(result) if result is not None else None
+            self.events.extend(json.loads(event) for (event,) in events)
+
+    def wait_for_events(self, seen, timeout):
+        """Block until there are more than ``seen`` events or timeout expires"""
+        if self._local:
+            with self._changed:
+                self._changed.wait_for(lambda: len(self.events) > seen or self.done, timeout)
+                return list(self.events[seen:])
+
+        deadline = time.monotonic() + timeout
+        while True:
+            self.refresh()
+            if len(self.events) > seen or self.done or time.monotonic() >= deadline:
+                with self._changed:
+                    return list(self.events[seen:])
+            time.sleep(self.poll_interval)
+
+    def to_dict(self):
+        if not self._local:
+            self.refresh()
+        with self._changed:
+            return {
+                'job_id': self.id,
+                'state': self.state,
+                'title': self.title,
+                'created_at': self.created_at,
+                'events': list(self.events),
+                'result': self.result,
+                'error': self.error
+            }
+
+
+class JobManager:
+    """Runs deploy jobs on a bounded executor and keeps recent results"""
+
+    def __init__(self, path, max_workers=4, max_queue=32, ttl=3600, poll_interval=0.25, lease=60.0,
+                 busy_timeout=5.0):
+        self.path = path
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self._connections = SQLiteConnections(path, busy_timeout)
+        self._connections.execute_script(SCHEMA)
+        self._migrate()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='deploy-job')
+        # Jobs running (or queued) in this process
+        self._jobs = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._heartbeat_pid = None
+        self.abandoned = 0
+
+    def _migrate(self):
+        """Add the lease column to a table from before jobs had leases"""
+        conn = self._connections.connect()
+        try:
+            columns = {column[1] for column in conn.execute('PRAGMA table_info(deploy_jobs)')}
+            if 'lease_until' in columns:
+                return
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Another process may have added it while we waited
+                columns = {column[1] for column in conn.execute('PRAGMA table_info(deploy_jobs)')}
+                if 'lease_until' not in columns:
+                    conn.execute('ALTER TABLE deploy_jobs ADD COLUMN lease_until REAL')
+                    # Unfinished jobs get one lease for their worker to renew
+                    conn.execute(
+                        'UPDATE deploy_jobs SET lease_until = ? WHERE finished_at IS NULL',
+                        (time.time() + self.lease,)
+                    )
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        finally:
+            conn.close()
+
+    def _ensure_heartbeat(self):
+        """Start the lease renewal thread in this process if it isn't running"""
+        if self._heartbeat_pid == os.getpid():
+            return
+        with self._lock:
+            if self._heartbeat_pid == os.getpid():
+                return
+            self._heartbeat_pid = os.getpid()
+            threading.Thread(target=self._heartbeat_loop, name='deploy-job-lease', daemon=True).start()
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(self.lease / 3)
+            with self._lock:
+                job_ids = list(self._jobs)
+            if not job_ids:
+                continue
+            try:
+                self.renew_leases(job_ids)
+            except Exception as e:
+                logger.error(f"Failed to renew deploy job leases: {str(e)}")
+
+    def renew_leases(self, job_ids):
+        """Extend the lease of this process's unfinished jobs"""
+        placeholders = ', '.join('?' * len(job_ids))
+        with self._connections.transaction() as conn:
+            conn.execute(
+                f'UPDATE deploy_jobs SET lease_until = ? WHERE finished_at IS NULL AND id IN ({placeholders})',
+                (time.time() + self.lease, *job_ids)
+            )
+
+    def fail_abandoned(self):
+        """Fail every unfinished job whose worker stopped renewing its lease"""
+        with self._connections.transaction() as conn:
+            failed = fail_abandoned_jobs(conn, time.time())
+        with self._lock:
+            self.abandoned += failed
+        return failed
+
+    def submit(self, title, pipeline, *args):
+        """Queue ``pipeline(job, *args)`` and return the new job
+
+        The pipeline reports progress through ``job.advance`` and returns the
+        deploy result. Raises JobQueueFull when every worker is busy and the
+        queue is at capacity.
+        """
+        job = DeployJob(self._connections, secrets.token_urlsafe(12), title, poll_interval=self.poll_interval,
+                        lease=self.lease)
+        job._local = True
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                raise JobQueueFull(f'Deploy queue is full ({self.max_queue} jobs waiting)')
+            self._pending += 1
+            self._jobs[job.id] = job
+
+        try:
+            self._ensure_heartbeat()
+            self.fail_abandoned()
+            self._purge_expired()
+            event = job._event(QUEUED)
+            with self._connections.transaction() as conn:
+                conn.execute(
+                    'INSERT INTO deploy_jobs (id, title, state, created_at, lease_until) VALUES (?, ?, ?, ?, ?)',
+                    (job.id, title, QUEUED, job.created_at, time.time() + self.lease)
+                )
+                conn.execute(
+                    'INSERT INTO deploy_job_events (job_id, seq, event) VALUES (?, 0, ?)',
+                    (job.id, json.dumps(event))
+                )
+            job.events.append(event)
+        except Exception:
+            self._release(job)
+            raise
+
+        self._executor.submit(self._run, job, pipeline, args)
+        return job
+
+    def _run(self, job, pipeline, args):
+        try:
+            job.succeed(pipeline(job, *args))
+        except Exception as e:
+            job.fail(str(e))
+        finally:
+            self._release(job)
+
+    def _release(self, job):
+        with self._lock:
+            self._pending -= 1
+            self._jobs.pop(job.id, None)
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.ttl
+        with self._connections.transaction() as conn:
+            conn.execute(
+                'DELETE FROM deploy_job_events WHERE job_id IN'
+                ' (SELECT id FROM deploy_jobs WHERE finished_at < ?)',
+                (cutoff,)
+            )
+            conn.execute('DELETE FROM deploy_jobs WHERE finished_at < ?', (cutoff,))
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+
+        row = self._connections.get().execute(
+            'SELECT title, created_at FROM deploy_jobs WHERE id = ?', (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = DeployJob(self._connections, job_id, row[0], created_at=row[1], poll_interval=self.poll_interval,
+                        lease=self.lease)
+        job.refresh()
+        return job
+
+    def stats(self):
+        self.fail_abandoned()
+        states = dict(self._connections.get().execute(
+            'SELECT state, COUNT(*) FROM deploy_jobs GROUP BY state'
+        ).fetchall())
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'pending': self._pending,
+                'jobs': sum(states.values()),
+                'states': states,
+                'abandoned': self.abandoned
+            }
@@ -0,0 +1,379 @@
+"""
+Prometheus-style metrics, aggregated across gunicorn workers.
+
+Each process keeps its own counters, gauges and histograms in a
+``MetricsRegistry``. With ``METRICS_DIR`` set, a background thread writes the
+process's snapshot to ``<METRICS_DIR>/<pid>.json`` every few seconds, and a
+scrape of ``/metrics`` (served by any one worker) merges the snapshots of every
+worker into a single exposition:
+
+* counters and histograms are summed;
+* gauges are summed or maxed per metric (``aggregate='sum'|'max'``), the
+  latter for values that every worker reads from the same shared store.
+
+Snapshots of workers that have exited are folded into ``archived.json`` so
+their counts survive worker recycling, while their gauges are dropped. The
+directory should be emptied when the server starts; ``gunicorn_config.py``
+does that in ``on_starting``. Without ``METRICS_DIR`` only the current
+process is reported.
+"""
+
+import atexit
+import bisect
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, from sub-millisecond renders to slow Netlify uploads
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+ARCHIVE_FILE = 'archived.json'
+
+
+def _label_key(labelnames, labels):
+    return json.dumps([str(labels.get(name, '')) for name in labelnames])
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Base for a named metric family with optional labels"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'type': self.kind,
+                'help': self.documentation,
+                'labelnames': list(self.labelnames),
+                'samples': {key: self._copy(value) for key, value in self._values.items()}
+            }
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A gauge set directly, or read from ``function`` at snapshot time"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), aggregate='sum', function=None):
+        super().__init__(name, documentation, labelnames)
+        self.aggregate = aggregate
+        self.function = function
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_label_key(self.labelnames, labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def snapshot(self):
+        if self.function is not None:
+            try:
+                value = self.function()
+            except Exception as e:
+                logger.warning(f"Gauge {self.name} callback failed: {str(e)}")
+                value = None
+            if value is not None:
+                self.set(value)
+        snapshot = super().snapshot()
+        snapshot['aggregate'] = self.aggregate
+        return snapshot
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, plus one for +Inf
+                series = self._values[key] = {'buckets': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    @staticmethod
+    def _copy(value):
+        return {'buckets': list(value['buckets']), 'sum': value['sum'], 'count': value['count']}
+
+    def snapshot(self):
+        snapshot = super().snapshot()
+        snapshot['bucket_bounds'] = list(self.buckets)
+        return snapshot
+
+
+def merge_snapshots(snapshots, include_gauges=True):
+    """Combine per-process snapshots into one"""
+    merged = {}
+    for snapshot in snapshots:
+        for name, family in snapshot.items():
+            if family['type'] == 'gauge' and not include_gauges:
+                continue
+            target = merged.get(name)
+            if target is None:
+                target = merged[name] = {key: value for key, value in family.items() if key != 'samples'}
+                target['samples'] = {}
+            samples = target['samples']
+            for key, value in family['samples'].items():
+                previous = samples.get(key)
+                if previous is None:
+                    samples[key] = Histogram._copy(value) if family['type'] == 'histogram' else value
+                elif family['type'] == 'histogram':
+                    if len(previous['buckets']) != len(value['buckets']):
+                        # Bucket layout changed between deploys; keep the newer series
+                        samples[key] = Histogram._copy(value)
+                        continue
+                    previous['buckets'] = [a + b for a, b in zip(previous['buckets'], value['buckets'])]
+                    previous['sum'] += value['sum']
+                    previous['count'] += value['count']
+                elif family['type'] == 'gauge' and family.get('aggregate') == 'max':
+                    samples[key] = max(previous, value)
+                else:
+                    samples[key] = previous + value
+    return merged
+
+
+def render(snapshot):
+    """Render a snapshot in the Prometheus text exposition format"""
+    lines = []
+    for name in sorted(snapshot):
+        family = snapshot[name]
+        labelnames = family['labelnames']
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for key in sorted(family['samples']):
+            values = json.loads(key)
+            value = family['samples'][key]
+            if family['type'] != 'histogram':
+                lines.append(f"{name}{_format_labels(labelnames, values)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            bounds = list(family['bucket_bounds']) + [float('inf')]
+            for bound, count in zip(bounds, value['buckets']):
+                cumulative += count
+                le = _format_value(bound)
+                lines.append(f"{name}_bucket{_format_labels(labelnames, values, [('le', le)])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labelnames, values)} {_format_value(value['sum'])}")
+            lines.append(f"{name}_count{_format_labels(labelnames, values)} {value['count']}")
+    return '\n'.join(lines) + '\n'
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsRegistry:
+    """Metrics of one process, optionally shared with sibling workers on disk"""
+
+    def __init__(self, directory=None, flush_interval=5.0):
+        self.directory = directory or None
+        self.flush_interval = flush_interval
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'Metric {metric.name} is already registered')
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), aggregate='sum', function=None):
+        return self._register(Gauge(name, documentation, labelnames, aggregate, function))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    # Cross-process sharing
+
+    def ensure_started(self):
+        """Start the snapshot writer in this process (again after a fork)"""
+        if not self.directory or self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+            thread = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+            thread.start()
+            # Counts since the last periodic write would be lost on exit
+            atexit.register(self.flush)
+
+    def _flush_loop(self):
+        while True:
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Writing metrics snapshot failed: {str(e)}")
+            time.sleep(self.flush_interval)
+
+    def flush(self):
+        """Write this process's snapshot for sibling workers to read"""
+        if not self.directory:
+            return
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(temp_path, path)
+
+    @contextmanager
+    def _directory_lock(self):
+        with open(os.path.join(self.directory, '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def collect(self):
+        """Snapshot of every live worker plus the archive of exited ones"""
+        if not self.directory:
+            return self.snapshot()
+
+        own_pid = os.getpid()
+        self.flush()
+        snapshots = [self.snapshot()]
+        with self._directory_lock():
+            archive_path = os.path.join(self.directory, ARCHIVE_FILE)
+            archive = self._read(archive_path) or {}
+            exited = []
+            for filename in os.listdir(self.directory):
+                stem, extension = os.path.splitext(filename)
+                if extension != '.json' or not stem.isdigit():
+                    continue
+                pid = int(stem)
+                if pid == own_pid:
+                    continue
+                path = os.path.join(self.directory, filename)
+                snapshot = self._read(path)
+                if snapshot is None:
+                    continue
+                if _pid_alive(pid):
+                    snapshots.append(snapshot)
+                else:
+                    exited.append((path, snapshot))
+
+            if exited:
+                # Keep the counts of exited workers; their gauges no longer apply
+                archive = merge_snapshots([archive] + [snapshot for _, snapshot in exited], include_gauges=False)
+                temp_path = f'{archive_path}.tmp'
+                with open(temp_path, 'w') as f:
+                    json.dump(archive, f)
+                os.replace(temp_path, archive_path)
+                for path, _ in exited:
+                    os.unlink(path)
+        snapshots.append(archive)
+        return merge_snapshots(snapshots)
+
+    def exposition(self):
+        return render(self.collect())
+
+
+def clear_directory(directory):
+    """Remove snapshots left by a previous server run"""
+    if not directory or not os.path.isdir(directory):
+        return
+    for filename in os.listdir(directory):
+        if filename.endswith('.json') or filename.endswith('.tmp'):
+            os.unlink(os.path.join(directory, filename))
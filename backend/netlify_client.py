@@ -0,0 +1,258 @@
+"""
+Netlify API client.
+
+Two deploy strategies are supported:
+
+* ``zip``: upload the whole site as a single ZIP archive.
+* ``digest``: send a ``path -> SHA1`` manifest, then upload only the files
+  Netlify reports as ``required``. Netlify deduplicates file contents across
+  the account, so files that are byte-identical on every site (``_redirects``,
+  ``netlify.toml``) are almost never uploaded again.
+
+A single ``NetlifyDeployer`` is meant to be shared by the whole process: it
+owns a keep-alive ``requests.Session`` with a sized connection pool, applies
+explicit connect/read timeouts to every call and records per-call latency.
+
+``requests`` is only needed to talk to Netlify, so it is imported when the
+session is first used rather than when the app loads: previews never pay for
+it, and a cold process can serve its first preview sooner.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_URL = "https://api.netlify.com/api/v1"
+
+DEPLOY_MODES = ('zip', 'digest')
+
+_upload_executor = None
+_upload_executor_lock = threading.Lock()
+
+
+def _get_upload_executor(max_workers):
+    """Shared thread pool for parallel digest-mode file uploads"""
+    global _upload_executor
+    if _upload_executor is None:
+        with _upload_executor_lock:
+            if _upload_executor is None:
+                _upload_executor = ThreadPoolExecutor(
+                    max_workers=max_workers,
+                    thread_name_prefix='netlify-upload'
+                )
+    return _upload_executor
+
+
+def file_digest_manifest(files):
+    """Map each site path to the SHA1 of its contents, as Netlify expects"""
+    return {
+        '/' + path.lstrip('/'): hashlib.sha1(content).hexdigest()
+        for path, content in files.items()
+    }
+
+
+class NetlifyDeployer:
+    """Handles Netlify deployment operations"""
+
+    def __init__(self, token, base_url=DEFAULT_API_URL, upload_concurrency=4,
+                 pool_size=10, connect_timeout=5.0, read_timeout=25.0):
+        self.token = token
+        self.base_url = base_url.rstrip('/')
+        self.upload_concurrency = upload_concurrency
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._latency = {}
+        self._latency_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """The pooled session, created (and ``requests`` imported) on first use"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    # Keep-alive connections are reused across requests and
+                    # threads, so only the first call to api.netlify.com pays
+                    # for TCP and TLS setup
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    session.headers.update({"Authorization": f"Bearer {self.token}"})
+                    self._session = session
+        return self._session
+
+    def _request(self, operation, method, url, **kwargs):
+        """Send a request through the pooled session and record its latency"""
+        kwargs.setdefault('timeout', self.timeout)
+        start = time.perf_counter()
+        failed = True
+        try:
+            response = self.session.request(method, url, **kwargs)
+            failed = response.status_code >= 400
+            return response
+        finally:
+            self._record(operation, time.perf_counter() - start, failed)
+
+    def _record(self, operation, elapsed, failed):
+        with self._latency_lock:
+            stats = self._latency.get(operation)
+            if stats is None:
+                stats = self._latency[operation] = {
+                    'calls': 0, 'errors': 0, 'seconds_total': 0.0, 'seconds_max': 0.0, 'seconds_last': 0.0
+                }
+            stats['calls'] += 1
+            stats['errors'] += failed
+            stats['seconds_total'] += elapsed
+            stats['seconds_max'] = max(stats['seconds_max'], elapsed)
+            stats['seconds_last'] = elapsed
+
+    def stats(self):
+        """Return per-operation call counts and latencies in milliseconds"""
+        with self._latency_lock:
+            return {
+                operation: {
+                    'calls': stats['calls'],
+                    'errors': stats['errors'],
+                    'latency_ms_avg': round(stats['seconds_total'] * 1000 / stats['calls'], 3),
+                    'latency_ms_max': round(stats['seconds_max'] * 1000, 3),
+                    'latency_ms_last': round(stats['seconds_last'] * 1000, 3)
+                }
+                for operation, stats in self._latency.items()
+            }
+
+    def create_site(self, site_name):
+        """Create a new Netlify site"""
+        url = f"{self.base_url}/sites"
+        payload = {
+            "name": site_name,
+            "custom_domain": None,
+            "force_ssl": True,
+            "published": True
+        }
+
+        response = self._request('create_site', 'POST', url, json=payload)
+        if response.status_code == 201:
+            return response.json()
+        else:
+            logger.error(f"Failed to create site: {response.text}")
+            raise Exception(f"Failed to create site: {response.text}")
+
+    def deploy_site(self, site_id, zip_content):
+        """Deploy files to an existing Netlify site
+
+        ``zip_content`` is the archive as bytes or as an iterator of byte
+        chunks. It is sent as the raw request body rather than wrapped in a
+        multipart form, and iterators go out with chunked transfer encoding
+        as they are produced, so the archive is never copied in full.
+        """
+        url = f"{self.base_url}/sites/{site_id}/deploys"
+        headers = {"Content-Type": "application/zip"}
+
+        response = self._request('deploy_site', 'POST', url, data=zip_content, headers=headers)
+        if response.status_code == 200:
+            return response.json()
+        else:
+            logger.error(f"Failed to deploy site: {response.text}")
+            raise Exception(f"Failed to deploy site: {response.text}")
+
+    def deploy_files(self, site_id, files, manifest=None):
+        """Deploy files to an existing site using a SHA1 digest manifest
+
+        ``files`` maps site-relative paths to their ``bytes`` content. Only
+        the files Netlify does not already have are uploaded, in parallel.
+        Pass ``manifest`` when the caller has already computed it.
+        """
+        if manifest is None:
+            manifest = file_digest_manifest(files)
+        url = f"{self.base_url}/sites/{site_id}/deploys"
+
+        response = self._request('deploy_files', 'POST', url, json={"files": manifest})
+        if response.status_code != 200:
+            logger.error(f"Failed to create digest deploy: {response.text}")
+            raise Exception(f"Failed to create digest deploy: {response.text}")
+
+        deploy_info = response.json()
+        required = set(deploy_info.get('required') or ())
+
+        # Several paths may share a digest; Netlify only needs one upload each
+        uploads = {}
+        for path, sha1 in manifest.items():
+            if sha1 in required and sha1 not in uploads:
+                uploads[sha1] = path
+
+        executor = _get_upload_executor(self.upload_concurrency)
+        futures = [
+            executor.submit(self.upload_file, deploy_info['id'], path, files[path.lstrip('/')])
+            for path in uploads.values()
+        ]
+        for future in futures:
+            future.result()
+
+        logger.info(f"Digest deploy {deploy_info['id']}: uploaded {len(uploads)} of {len(manifest)} files")
+        deploy_info['uploaded_files'] = len(uploads)
+        if uploads:
+            # The state in the create response predates the uploads
+            deploy_info['state'] = 'uploaded'
+        return deploy_info
+
+    def upload_file(self, deploy_id, path, content):
+        """Upload a single file required by a digest deploy"""
+        url = f"{self.base_url}/deploys/{deploy_id}/files{quote(path)}"
+        headers = {"Content-Type": "application/octet-stream"}
+
+        response = self._request('upload_file', 'PUT', url, data=content, headers=headers)
+        if response.status_code == 200:
+            return response.json()
+        else:
+            logger.error(f"Failed to upload {path}: {response.text}")
+            raise Exception(f"Failed to upload {path}: {response.text}")
+
+    def get_deploy(self, deploy_id):
+        """Fetch a deploy's current state, or None if Netlify doesn't know it"""
+        url = f"{self.base_url}/deploys/{deploy_id}"
+
+        response = self._request('get_deploy', 'GET', url)
+        if response.status_code == 200:
+            return response.json()
+        if response.status_code == 404:
+            return None
+        logger.error(f"Failed to fetch deploy {deploy_id}: {response.text}")
+        raise Exception(f"Failed to fetch deploy {deploy_id}: {response.text}")
+
+    def get_site(self, site_id):
+        """Fetch a site, including its ``published_deploy``, or None if unknown"""
+        url = f"{self.base_url}/sites/{site_id}"
+
+        response = self._request('get_site', 'GET', url)
+        if response.status_code == 200:
+            return response.json()
+        if response.status_code == 404:
+            return None
+        logger.error(f"Failed to fetch site {site_id}: {response.text}")
+        raise Exception(f"Failed to fetch site {site_id}: {response.text}")
+
+    def get_site_files(self, site_id):
+        """Return the ``path -> SHA1`` manifest of a site's published deploy
+
+        Returns None if Netlify doesn't know the site.
+        """
+        url = f"{self.base_url}/sites/{site_id}/files"
+
+        response = self._request('get_site_files', 'GET', url)
+        if response.status_code == 200:
+            return {entry['path']: entry['sha'] for entry in response.json()}
+        if response.status_code == 404:
+            return None
+        logger.error(f"Failed to list files of site {site_id}: {response.text}")
+        raise Exception(f"Failed to list files of site {site_id}: {response.text}")
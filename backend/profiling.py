@@ -0,0 +1,152 @@
+"""
+Opt-in per-request profiling.
+
+A request made with ``?profile=1`` is run under ``cProfile`` when profiling
+is allowed: either ``PROFILING_ENABLED`` is set, or the request carries the
+configured ``ADMIN_TOKEN`` in ``X-Admin-Token``. The profile is saved to
+``PROFILE_DIR`` as a raw ``pstats`` dump plus a JSON summary with the
+top functions by cumulative time, and only the newest ``PROFILE_HISTORY``
+profiles are kept. The directory is shared, so a profile captured by one
+gunicorn worker can be fetched through any other.
+
+cProfile only sees the request's own thread, so work handed to background
+executors (async deploys, batch items, digest uploads) shows up as time
+spent waiting on them.
+"""
+
+import io
+import json
+import marshal
+import os
+import secrets
+import time
+from datetime import datetime
+
+# Rows of the cumulative-time table kept in the JSON summary
+SUMMARY_ROWS = 40
+
+
+class ProfileStore:
+    """The last N request profiles, kept as files in a shared directory"""
+
+    def __init__(self, directory, history=20):
+        self.directory = directory
+        self.history = history
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, profile_id, extension):
+        # Ids are generated here; refuse anything that could escape the directory
+        if not profile_id.isalnum():
+            raise KeyError(profile_id)
+        return os.path.join(self.directory, f'{profile_id}.{extension}')
+
+    def save(self, profiler, method, path, status, duration):
+        """Store a finished profile and return its id"""
+        # Imported here, like cProfile below, so only profiled requests load it
+        import pstats
+
+        profile_id = secrets.token_hex(8)
+        stats = pstats.Stats(profiler)
+
+        summary = io.StringIO()
+        stats.stream = summary
+        stats.sort_stats('cumulative').print_stats(SUMMARY_ROWS)
+
+        with open(self._path(profile_id, 'prof'), 'wb') as f:
+            # Same format as Profile.dump_stats, readable by pstats/snakeviz
+            marshal.dump(stats.stats, f)
+        record = {
+            'id': profile_id,
+            'method': method,
+            'path': path,
+            'status': status,
+            'duration_ms': round(duration * 1000, 3),
+            'created_at': datetime.now().isoformat(),
+            'pid': os.getpid(),
+            'summary': summary.getvalue()
+        }
+        with open(self._path(profile_id, 'json'), 'w') as f:
+            json.dump(record, f)
+
+        self._prune()
+        return profile_id
+
+    def _records(self):
+        entries = []
+        for filename in os.listdir(self.directory):
+            if filename.endswith('.json'):
+                path = os.path.join(self.directory, filename)
+                try:
+                    entries.append((os.path.getmtime(path), filename[:-5]))
+                except OSError:
+                    continue
+        entries.sort(reverse=True)
+        return [profile_id for _, profile_id in entries]
+
+    def _prune(self):
+        for profile_id in self._records()[self.history:]:
+            for extension in ('json', 'prof'):
+                try:
+                    os.unlink(self._path(profile_id, extension))
+                except OSError:
+                    pass
+
+    def list(self):
+        """Newest-first metadata of the stored profiles"""
+        records = []
+        for profile_id in self._records():
+            record = self.get(profile_id)
+            if record is not None:
+                record.pop('summary', None)
+                records.append(record)
+        return records
+
+    def get(self, profile_id):
+        try:
+            with open(self._path(profile_id, 'json')) as f:
+                return json.load(f)
+        except (KeyError, OSError, ValueError):
+            return None
+
+    def raw_path(self, profile_id):
+        """Path of the pstats dump, or None"""
+        try:
+            path = self._path(profile_id, 'prof')
+        except KeyError:
+            return None
+        return path if os.path.exists(path) else None
+
+
+class RequestProfile:
+    """A cProfile session wrapped around a single request"""
+
+    def __init__(self):
+        import cProfile
+
+        self.profiler = cProfile.Profile()
+        self.start = None
+
+    def begin(self):
+        """Start profiling; False if another profiler already owns the thread"""
+        try:
+            self.profiler.enable()
+        except ValueError:
+            # Python 3.12+ allows one active profiler at a time
+            return False
+        self.start = time.perf_counter()
+        return True
+
+    def end(self):
+        self.profiler.disable()
+        return time.perf_counter() - self.start
+
+
+def token_matches(expected, supplied):
+    """Constant-time comparison of a secret with a caller-supplied value
+
+    Compared as UTF-8 bytes: ``compare_digest`` raises TypeError for ``str``
+    arguments that aren't ASCII, which a caller could send on purpose.
+    """
+    if not isinstance(expected, str) or not isinstance(supplied, str) or not expected or not supplied:
+        return False
+    return secrets.compare_digest(expected.encode('utf-8'), supplied.encode('utf-8', 'surrogatepass'))
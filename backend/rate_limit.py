@@ -0,0 +1,401 @@
+"""
+Deploy rate limiting.
+
+Every limiter approximates a sliding window with two fixed windows: the count
+in the previous window is weighted by how much of it still overlaps the
+sliding window. Each check is O(1) and needs only two counters per client.
+
+Limiters share the ``LimiterBackend`` interface and differ in where the
+counters live:
+
+* ``SlidingWindowLimiter`` (``memory``): in this process. Clients are spread
+  over independently locked stripes, each an LRU that sweeps idle clients and
+  enforces a hard cap, so a flood of distinct keys (e.g. spoofed
+  ``X-Forwarded-For`` values) cannot grow memory without bound.
+* ``SQLiteLimiter`` (``sqlite``): in a WAL-mode SQLite file shared by every
+  worker on the host. Each check is one short ``BEGIN IMMEDIATE`` transaction.
+* ``RedisLimiter`` (``redis``): in any server speaking the Redis protocol,
+  shared by every worker and host. Counters are updated with atomic ``INCR``.
+
+With a shared backend the limit holds across all gunicorn workers and
+survives worker recycling.
+"""
+
+import os
+import socket
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from shared_sqlite import SQLiteConnections
+
+BACKENDS = ('memory', 'sqlite', 'redis')
+
+
+def _window_position(now, window):
+    """Return (window_index, weight of the previous window) for a timestamp"""
+    window_index, offset = divmod(now, window)
+    return int(window_index), 1.0 - offset / window
+
+
+class LimiterBackend:
+    """Interface shared by all rate limiter backends"""
+
+    name = None
+
+    def hit(self, key, now=None):
+        """Count a request for key and return whether it is within the limit"""
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+
+class _Stripe:
+    __slots__ = ('lock', 'clients', 'last_sweep', 'evictions', 'rejections')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # key -> [window_index, current_count, previous_count]
+        self.clients = OrderedDict()
+        self.last_sweep = 0.0
+        self.evictions = 0
+        self.rejections = 0
+
+
+class SlidingWindowLimiter(LimiterBackend):
+    """Thread-safe in-process sliding-window rate limiter with bounded memory"""
+
+    name = 'memory'
+
+    def __init__(self, limit, window=3600, stripes=16, max_clients=100000, sweep_interval=60):
+        self.limit = limit
+        self.window = window
+        self.max_clients_per_stripe = max(1, max_clients // stripes)
+        self.sweep_interval = sweep_interval
+        self._stripes = [_Stripe() for _ in range(stripes)]
+
+    def _stripe(self, key):
+        return self._stripes[zlib.crc32(key.encode('utf-8')) % len(self._stripes)]
+
+    def hit(self, key, now=None):
+        """Count a request for key and return whether it is within the limit"""
+        now = time.time() if now is None else now
+        window_index, weight = _window_position(now, self.window)
+        stripe = self._stripe(key)
+
+        with stripe.lock:
+            if now - stripe.last_sweep >= self.sweep_interval:
+                self._sweep(stripe, window_index)
+                stripe.last_sweep = now
+
+            state = stripe.clients.get(key)
+            if state is None:
+                state = stripe.clients[key] = [window_index, 0, 0]
+                if len(stripe.clients) > self.max_clients_per_stripe:
+                    stripe.clients.popitem(last=False)
+                    stripe.evictions += 1
+            else:
+                stripe.clients.move_to_end(key)
+                if state[0] != window_index:
+                    # Roll the windows forward; anything older than the
+                    # previous window no longer overlaps the sliding window
+                    state[2] = state[1] if state[0] == window_index - 1 else 0
+                    state[1] = 0
+                    state[0] = window_index
+
+            if state[1] + state[2] * weight >= self.limit:
+                stripe.rejections += 1
+                return False
+
+            state[1] += 1
+            return True
+
+    def _sweep(self, stripe, window_index):
+        """Drop clients with no requests in the current or previous window"""
+        clients = stripe.clients
+        # Least recently seen clients come first, so stop at the first live one
+        while clients:
+            key, state = next(iter(clients.items()))
+            if state[0] >= window_index - 1:
+                break
+            del clients[key]
+            stripe.evictions += 1
+
+    def __len__(self):
+        return sum(len(stripe.clients) for stripe in self._stripes)
+
+    def stats(self):
+        return {
+            'backend': self.name,
+            'tracked_clients': len(self),
+            'max_clients': self.max_clients_per_stripe * len(self._stripes),
+            'stripes': len(self._stripes),
+            'limit': self.limit,
+            'window_seconds': self.window,
+            'evictions': sum(stripe.evictions for stripe in self._stripes),
+            'rejections': sum(stripe.rejections for stripe in self._stripes)
+        }
+
+
+class SQLiteLimiter(LimiterBackend):
+    """Sliding-window limiter whose counters live in a shared SQLite file"""
+
+    name = 'sqlite'
+
+    def __init__(self, path, limit, window=3600, sweep_interval=60, busy_timeout=5.0):
+        self.path = path
+        self.limit = limit
+        self.window = window
+        self.sweep_interval = sweep_interval
+        self._connections = SQLiteConnections(path, busy_timeout)
+        self._last_sweep = 0.0
+        self.rejections = 0
+
+        self._connections.execute_script((
+            'CREATE TABLE IF NOT EXISTS rate_limit ('
+            ' key TEXT NOT NULL,'
+            ' window INTEGER NOT NULL,'
+            ' count INTEGER NOT NULL,'
+            ' PRIMARY KEY (key, window)'
+            ') WITHOUT ROWID',
+        ))
+
+    def hit(self, key, now=None):
+        now = time.time() if now is None else now
+        window_index, weight = _window_position(now, self.window)
+
+        # BEGIN IMMEDIATE takes the write lock up front, so the read and the
+        # increment below are atomic with respect to every other process
+        with self._connections.transaction() as conn:
+            counts = dict(conn.execute(
+                'SELECT window, count FROM rate_limit WHERE key = ? AND window IN (?, ?)',
+                (key, window_index, window_index - 1)
+            ).fetchall())
+            current = counts.get(window_index, 0)
+            previous = counts.get(window_index - 1, 0)
+
+            allowed = current + previous * weight < self.limit
+            if allowed:
+                conn.execute(
+                    'INSERT INTO rate_limit (key, window, count) VALUES (?, ?, 1) '
+                    'ON CONFLICT (key, window) DO UPDATE SET count = count + 1',
+                    (key, window_index)
+                )
+            else:
+                self.rejections += 1
+
+            if now - self._last_sweep >= self.sweep_interval:
+                conn.execute('DELETE FROM rate_limit WHERE window < ?', (window_index - 1,))
+                self._last_sweep = now
+        return allowed
+
+    def stats(self):
+        window_index, _ = _window_position(time.time(), self.window)
+        tracked = self._connections.get().execute(
+            'SELECT COUNT(DISTINCT key) FROM rate_limit WHERE window >= ?', (window_index - 1,)
+        ).fetchone()[0]
+        return {
+            'backend': self.name,
+            'path': self.path,
+            'tracked_clients': tracked,
+            'limit': self.limit,
+            'window_seconds': self.window,
+            'rejections': self.rejections
+        }
+
+
+class RedisError(Exception):
+    """Error reply from a Redis-protocol server"""
+
+
+class RespConnection:
+    """Minimal blocking client for the Redis serialization protocol (RESP2)"""
+
+    def __init__(self, host, port, db=0, password=None, timeout=2.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile('rb')
+        if password:
+            self.execute('AUTH', password)
+        if db:
+            self.execute('SELECT', db)
+
+    @staticmethod
+    def _encode(*args):
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode('utf-8')
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        return b''.join(parts)
+
+    def _read_reply(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError('Connection closed by Redis server')
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b'+':
+            return payload.decode('utf-8')
+        if prefix == b'-':
+            raise RedisError(payload.decode('utf-8'))
+        if prefix == b':':
+            return int(payload)
+        if prefix == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            return data[:-2]
+        if prefix == b'*':
+            length = int(payload)
+            if length < 0:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise RedisError(f'Unexpected reply: {line!r}')
+
+    def execute(self, *args):
+        self.sock.sendall(self._encode(*args))
+        return self._read_reply()
+
+    def pipeline(self, *commands):
+        """Send several commands in one round trip and return every reply"""
+        self.sock.sendall(b''.join(self._encode(*command) for command in commands))
+        return [self._read_reply() for _ in commands]
+
+    def close(self):
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RedisLimiter(LimiterBackend):
+    """Sliding-window limiter whose counters live in a Redis-protocol server"""
+
+    name = 'redis'
+
+    def __init__(self, url, limit, window=3600, prefix='ratelimit', timeout=2.0, stats_ttl=60.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.password = parsed.password
+        self.limit = limit
+        self.window = window
+        self.prefix = prefix
+        self.timeout = timeout
+        self.stats_ttl = stats_ttl
+        self._local = threading.local()
+        self.rejections = 0
+
+        # (count, time) of the last SCAN; every metrics flush reads stats()
+        self._tracked = None
+        self._tracked_lock = threading.Lock()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._local.conn = RespConnection(
+                self.host, self.port, db=self.db, password=self.password, timeout=self.timeout
+            )
+            self._local.pid = os.getpid()
+        return conn
+
+    def hit(self, key, now=None):
+        now = time.time() if now is None else now
+        window_index, weight = _window_position(now, self.window)
+        current_key = f'{self.prefix}:{key}:{window_index}'
+        previous_key = f'{self.prefix}:{key}:{window_index - 1}'
+
+        try:
+            replies = self._exchange(current_key, previous_key)
+        except (OSError, ConnectionError):
+            # Reconnect once; the server may have closed an idle connection,
+            # or the first connect of this thread may have failed
+            conn = getattr(self._local, 'conn', None)
+            if conn is not None:
+                conn.close()
+            self._local.conn = None
+            replies = self._exchange(current_key, previous_key)
+
+        # INCR is atomic, so concurrent hits from any worker each see a
+        # distinct count; the increment is undone if it went over the limit
+        current, previous = replies[-1][0], int(replies[-1][2] or 0)
+        if (current - 1) + previous * weight < self.limit:
+            return True
+
+        self._connection().execute('DECR', current_key)
+        self.rejections += 1
+        return False
+
+    def _exchange(self, current_key, previous_key):
+        return self._connection().pipeline(
+            ('MULTI',),
+            ('INCR', current_key),
+            ('EXPIRE', current_key, self.window * 2),
+            ('GET', previous_key),
+            ('EXEC',)
+        )
+
+    def tracked_clients(self, now=None):
+        """Clients with a counter in the current or previous window
+
+        Walks the limiter's keys with SCAN, so it costs one pass over them;
+        meant for stats, not the request path.
+        """
+        now = time.time() if now is None else now
+        window_index, _ = _window_position(now, self.window)
+        windows = {str(window_index).encode(), str(window_index - 1).encode()}
+        start = len(self.prefix) + 1
+        clients = set()
+        cursor = b'0'
+        while True:
+            cursor, keys = self._connection().execute('SCAN', cursor, 'MATCH', f'{self.prefix}:*', 'COUNT', 1000)
+            for key in keys:
+                client, _, window = key[start:].rpartition(b':')
+                if window in windows:
+                    clients.add(client)
+            if cursor == b'0':
+                return len(clients)
+
+    def cached_tracked_clients(self):
+        """``tracked_clients``, rescanned at most every ``stats_ttl`` seconds"""
+        with self._tracked_lock:
+            now = time.time()
+            if self._tracked is not None and now - self._tracked[1] < self.stats_ttl:
+                return self._tracked[0]
+            try:
+                tracked = self.tracked_clients(now)
+            except (OSError, ConnectionError, RedisError):
+                tracked = None
+            # A failed scan is cached too, so an unreachable server isn't
+            # retried on every flush
+            self._tracked = (tracked, now)
+            return tracked
+
+    def stats(self):
+        tracked = self.cached_tracked_clients()
+        return {
+            'backend': self.name,
+            'server': f'{self.host}:{self.port}/{self.db}',
+            'tracked_clients': tracked,
+            'limit': self.limit,
+            'window_seconds': self.window,
+            'rejections': self.rejections
+        }
+
+
+def create_limiter(backend, limit, window=3600, max_clients=100000, sqlite_path=None, redis_url=None,
+                   stats_ttl=60.0):
+    """Build the limiter backend selected by configuration"""
+    if backend == 'memory':
+        return SlidingWindowLimiter(limit=limit, window=window, max_clients=max_clients)
+    if backend == 'sqlite':
+        return SQLiteLimiter(sqlite_path, limit=limit, window=window)
+    if backend == 'redis':
+        return RedisLimiter(redis_url, limit=limit, window=window, stats_ttl=stats_ttl)
+    raise ValueError(f"Rate limit backend must be one of {', '.join(BACKENDS)}")
@@ -0,0 +1,233 @@
+"""
+Tracks Netlify deploys until they are live.
+
+Netlify accepts an upload long before the site is served: the deploy moves
+through ``uploaded`` and ``processing`` before it reaches ``ready``, and the
+site URL answers 404 until then. ``ReadinessTracker`` keeps every deploy this
+process has started (or been asked about) and a single background thread per
+process checks the unsettled ones in one sweep, so any number of waiting
+clients costs one ``GET /deploys/<id>`` per deploy per poll rather than one
+per client.
+
+Each deploy is polled with its own adaptive interval: the first check comes
+soon after the upload, then the interval grows by ``backoff`` up to
+``max_interval`` while the deploy is still processing, and after failed
+calls. Deploys that never settle are given up on after ``max_age`` seconds.
+Clients block in ``wait`` (``GET /api/deploy/<deploy_id>/ready?timeout=``)
+until the deploy settles or their timeout runs out.
+
+Like the site pool, the poller thread is started lazily in the process that
+serves requests, so every gunicorn worker polls only its own deploys. At most
+``max_tracked`` deploys are kept: past that, the deploy that settled longest
+ago is forgotten first, and if none has settled the oldest is given up on.
+"""
+
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+READY = 'ready'
+FAILED_STATES = ('error', 'rejected')
+# Given up on: still processing after max_age, or unknown to Netlify
+TIMED_OUT = 'timeout'
+NOT_FOUND = 'not_found'
+
+SETTLED_STATES = (READY, TIMED_OUT, NOT_FOUND) + FAILED_STATES
+
+
+class TrackedDeploy:
+    """Last known Netlify state of one deploy and when to check it next"""
+
+    def __init__(self, deploy_id, state, url, interval):
+        self.deploy_id = deploy_id
+        self.state = state or 'unknown'
+        self.url = url
+        self.error = None
+        self.polls = 0
+        self.interval = interval
+        self.tracked_at = time.monotonic()
+        self.next_poll = self.tracked_at + interval
+        self.settled_at = None
+
+    @property
+    def settled(self):
+        return self.state in SETTLED_STATES
+
+    def to_dict(self):
+        result = {
+            'deploy_id': self.deploy_id,
+            'state': self.state,
+            'ready': self.state == READY,
+            'url': self.url,
+            'polls': self.polls
+        }
+        if self.error:
+            result['error'] = self.error
+        if self.settled_at is not None:
+            result['seconds_to_settle'] = round(self.settled_at - self.tracked_at, 3)
+        return result
+
+
+class ReadinessTracker:
+    """Polls in-flight deploys from one background thread per process"""
+
+    def __init__(self, fetch_deploy, initial_interval=1.0, max_interval=10.0, backoff=1.5,
+                 max_age=300, ttl=3600, max_tracked=10000):
+        self.fetch_deploy = fetch_deploy
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_age = max_age
+        self.ttl = ttl
+        self.max_tracked = max_tracked
+
+        self._deploys = {}
+        self._changed = threading.Condition()
+        self._thread = None
+        self._pid = None
+
+        self.polls = 0
+        self.poll_errors = 0
+        self.evicted = 0
+        self.settled = {}
+
+    def ensure_started(self):
+        """Start the poller thread in this process if it isn't running"""
+        if self._pid == os.getpid():
+            return
+        with self._changed:
+            if self._pid == os.getpid():
+                return
+            # Deploys inherited across a fork are the parent's to poll
+            self._deploys.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._poll_loop, name='deploy-readiness', daemon=True)
+            self._thread.start()
+
+    def track(self, deploy_id, state=None, url=None):
+        """Start tracking a deploy, seeded with the state Netlify last reported"""
+        self.ensure_started()
+        with self._changed:
+            deploy = self._deploys.get(deploy_id)
+            if deploy is None:
+                if len(self._deploys) >= self.max_tracked:
+                    self._evict()
+                deploy = self._deploys[deploy_id] = TrackedDeploy(deploy_id, state, url, self.initial_interval)
+                if state is None:
+                    # Nothing known yet: check on the next sweep
+                    deploy.next_poll = deploy.tracked_at
+                elif deploy.settled:
+                    self._settle(deploy)
+                self._changed.notify_all()
+            return deploy
+
+    def wait(self, deploy_id, timeout):
+        """Block until the deploy settles or timeout expires; return its status"""
+        deploy = self.track(deploy_id)
+        with self._changed:
+            self._changed.wait_for(lambda: deploy.settled, timeout)
+            return deploy.to_dict()
+
+    def _evict(self):
+        """Make room for one deploy; waiters on an unsettled one get a timeout"""
+        # Dicts keep insertion order, so the first match is the oldest
+        deploy = next((deploy for deploy in self._deploys.values() if deploy.settled), None)
+        if deploy is None:
+            deploy = next(iter(self._deploys.values()))
+            deploy.state = TIMED_OUT
+            self._settle(deploy)
+            self._changed.notify_all()
+        del self._deploys[deploy.deploy_id]
+        self.evicted += 1
+
+    def _settle(self, deploy):
+        deploy.settled_at = time.monotonic()
+        self.settled[deploy.state] = self.settled.get(deploy.state, 0) + 1
+
+    def _poll_loop(self):
+        while True:
+            with self._changed:
+                due = self._due()
+                while not due:
+                    self._changed.wait(self._idle_wait())
+                    due = self._due()
+            for deploy in due:
+                self._poll(deploy)
+
+    def _due(self):
+        now = time.monotonic()
+        self._purge(now)
+        return [
+            deploy for deploy in self._deploys.values()
+            if not deploy.settled and deploy.next_poll <= now
+        ]
+
+    def _idle_wait(self):
+        pending = [deploy.next_poll for deploy in self._deploys.values() if not deploy.settled]
+        if not pending:
+            # Nothing in flight; track() wakes the thread
+            return None
+        return max(0.0, min(pending) - time.monotonic())
+
+    def _purge(self, now):
+        expired = [
+            deploy_id for deploy_id, deploy in self._deploys.items()
+            if deploy.settled_at is not None and deploy.settled_at < now - self.ttl
+        ]
+        for deploy_id in expired:
+            del self._deploys[deploy_id]
+
+    def _poll(self, deploy):
+        # Checked one after another over the keep-alive session, which also
+        # keeps a burst of deploys from flooding Netlify's API rate limit
+        try:
+            info = self.fetch_deploy(deploy.deploy_id)
+            error = None
+        except Exception as e:
+            info = None
+            error = str(e)
+            logger.warning(f"Readiness check for deploy {deploy.deploy_id} failed: {error}")
+
+        with self._changed:
+            self.polls += 1
+            deploy.polls += 1
+            now = time.monotonic()
+            if error is not None:
+                self.poll_errors += 1
+            elif info is None:
+                deploy.state = NOT_FOUND
+            else:
+                deploy.state = info.get('state') or deploy.state
+                deploy.url = info.get('ssl_url') or deploy.url
+                if deploy.state in FAILED_STATES:
+                    deploy.error = info.get('error_message')
+
+            if not deploy.settled and now - deploy.tracked_at >= self.max_age:
+                deploy.state = TIMED_OUT
+            if deploy.settled:
+                self._settle(deploy)
+                self._changed.notify_all()
+            else:
+                deploy.interval = min(deploy.interval * self.backoff, self.max_interval)
+                deploy.next_poll = now + deploy.interval
+
+    def in_flight(self):
+        with self._changed:
+            return sum(1 for deploy in self._deploys.values() if not deploy.settled)
+
+    def stats(self):
+        with self._changed:
+            settled = sum(self.settled.values())
+            return {
+                'tracked': len(self._deploys),
+                'max_tracked': self.max_tracked,
+                'evicted': self.evicted,
+                'in_flight': sum(1 for deploy in self._deploys.values() if not deploy.settled),
+                'polls': self.polls,
+                'poll_errors': self.poll_errors,
+                'settled': dict(self.settled),
+                'polls_per_deploy': round(self.polls / settled, 2) if settled else None
+            }
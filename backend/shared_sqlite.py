@@ -0,0 +1,67 @@
+"""
+Connections to the SQLite files shared by every worker on the host.
+
+The rate limiter, the deployment history and the other shared stores keep
+their state in WAL-mode SQLite files so every gunicorn worker sees the same
+data. ``SQLiteConnections`` hands each thread its own connection (a
+connection must not be used from two threads at once) and opens a fresh one
+after a fork, since a connection inherited from the parent process must never
+be used by the child. Connections run in autocommit mode; callers that need a
+transaction open it explicitly, usually with ``BEGIN IMMEDIATE`` so the write
+lock is taken up front.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+def connect(path, busy_timeout=5.0):
+    """Open a WAL-mode connection in autocommit mode"""
+    conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+class SQLiteConnections:
+    """One connection per thread to a shared SQLite file"""
+
+    def __init__(self, path, busy_timeout=5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+
+    def connect(self):
+        """A new connection, owned by the caller"""
+        return connect(self.path, self.busy_timeout)
+
+    def get(self):
+        """This thread's connection, reopened after a fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._local.conn = self.connect()
+            self._local.pid = os.getpid()
+        return conn
+
+    def execute_script(self, statements):
+        """Run schema statements on a short-lived connection"""
+        conn = self.connect()
+        try:
+            for statement in statements:
+                conn.execute(statement)
+        finally:
+            conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """``BEGIN IMMEDIATE`` on this thread's connection; commits on success"""
+        conn = self.get()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
@@ -0,0 +1,62 @@
+"""
+Last deploy of each site, shared by every worker on the host.
+
+A redeploy diffs its file manifest against the site's newest deploy and
+skips Netlify entirely when nothing changed. The record of that deploy must
+be the same in every gunicorn worker: a worker holding an older manifest
+would answer "unchanged" for files another worker has since replaced. The
+records live in a ``site_manifests`` table in a WAL-mode SQLite file (by
+default the rate limiter's), and a record is only replaced by one for a
+deploy created at the same time or later, so a slow writer can't roll a
+site back. At most ``max_entries`` sites are kept; the least recently
+updated ones are dropped first and read again from Netlify when needed.
+"""
+
+import json
+import time
+
+from shared_sqlite import SQLiteConnections
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS site_manifests ('
+    ' site_id TEXT PRIMARY KEY,'
+    ' record TEXT NOT NULL,'
+    ' deployed_at TEXT,'
+    ' updated_at REAL NOT NULL'
+    ')',
+    'CREATE INDEX IF NOT EXISTS site_manifests_by_age ON site_manifests (updated_at)'
+)
+
+
+class SiteManifestStore:
+    """Newest known deploy (manifest, deploy id, URLs) of each site"""
+
+    def __init__(self, path, max_entries=1024, busy_timeout=5.0):
+        self.path = path
+        self.max_entries = max_entries
+        self._connections = SQLiteConnections(path, busy_timeout)
+        self._connections.execute_script(SCHEMA)
+
+    def get(self, site_id):
+        """The stored record for a site, or None"""
+        row = self._connections.get().execute(
+            'SELECT record FROM site_manifests WHERE site_id = ?', (site_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def set(self, site_id, record):
+        """Store a site's record unless a newer deploy is already recorded"""
+        with self._connections.transaction() as conn:
+            conn.execute(
+                'INSERT INTO site_manifests (site_id, record, deployed_at, updated_at) VALUES (?, ?, ?, ?)'
+                ' ON CONFLICT (site_id) DO UPDATE SET'
+                ' record = excluded.record, deployed_at = excluded.deployed_at, updated_at = excluded.updated_at'
+                ' WHERE site_manifests.deployed_at IS NULL OR excluded.deployed_at >= site_manifests.deployed_at',
+                (site_id, json.dumps(record), record.get('deployed_at'), time.time())
+            )
+            conn.execute(
+                'DELETE FROM site_manifests WHERE site_id IN ('
+                ' SELECT site_id FROM site_manifests ORDER BY updated_at DESC LIMIT -1 OFFSET ?'
+                ')',
+                (self.max_entries,)
+            )
@@ -0,0 +1,187 @@
+"""
+Warm pool of pre-created Netlify sites.
+
+Creating a site is a blocking Netlify round trip that sits on the critical
+path of every deploy. ``SitePool`` keeps a number of empty sites ready so a
+deploy can take one immediately and go straight to the upload. A background
+thread tops the pool back up whenever it drops to its low watermark, creating
+at most ``refill_per_minute`` sites per minute.
+
+The pool itself is a ``site_pool`` table in a WAL-mode SQLite file shared by
+every gunicorn worker on the host, so recycling a worker leaves its sites for
+the others instead of orphaning them in the Netlify account. A deploy claims
+a site by deleting its row in one ``BEGIN IMMEDIATE`` transaction, so no two
+deploys get the same site. Each worker runs a refill thread, started lazily
+in the process that serves requests; before creating a site it reserves a
+row, so together the workers fill the pool to ``size`` and no further. A
+reservation left by a worker that died mid-create expires after
+``reservation_ttl`` seconds.
+"""
+
+import collections
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+
+from shared_sqlite import SQLiteConnections
+
+logger = logging.getLogger(__name__)
+
+# A row with a NULL site is a reservation for a site being created
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS site_pool ('
+    ' id TEXT PRIMARY KEY,'
+    ' site TEXT,'
+    ' reserved_until REAL,'
+    ' created_at REAL NOT NULL'
+    ')',
+    'CREATE INDEX IF NOT EXISTS site_pool_by_age ON site_pool (created_at)'
+)
+
+
+class SitePool:
+    """Keeps pre-created sites ready to hand out to deploys"""
+
+    def __init__(self, path, create_site, name_factory, size, low_watermark=None, refill_per_minute=30,
+                 reservation_ttl=120, busy_timeout=5.0):
+        self.path = path
+        self.create_site = create_site
+        self.name_factory = name_factory
+        self.size = size
+        self.low_watermark = size // 2 if low_watermark is None else low_watermark
+        self.refill_interval = 60.0 / refill_per_minute if refill_per_minute > 0 else 0.0
+        self.reservation_ttl = reservation_ttl
+
+        self._connections = SQLiteConnections(path, busy_timeout)
+        if self.enabled:
+            self._connections.execute_script(SCHEMA)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+        self.failures = 0
+        self._created_at = collections.deque()
+
+    @property
+    def enabled(self):
+        return self.size > 0
+
+    def ensure_started(self):
+        """Start the refill thread in this process if it isn't running"""
+        if not self.enabled or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._wakeup.set()
+            self._thread = threading.Thread(target=self._refill_loop, name='site-pool', daemon=True)
+            self._thread.start()
+
+    def acquire(self):
+        """Return a pre-created site, or None when the pool is empty"""
+        if not self.enabled:
+            return None
+        self.ensure_started()
+
+        with self._connections.transaction() as conn:
+            row = conn.execute(
+                'SELECT id, site FROM site_pool WHERE site IS NOT NULL ORDER BY created_at LIMIT 1'
+            ).fetchone()
+            if row is not None:
+                conn.execute('DELETE FROM site_pool WHERE id = ?', (row[0],))
+            depth = self._depth(conn)
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if depth <= self.low_watermark:
+            self._wakeup.set()
+        return json.loads(row[1]) if row is not None else None
+
+    @staticmethod
+    def _depth(conn):
+        return conn.execute('SELECT COUNT(*) FROM site_pool WHERE site IS NOT NULL').fetchone()[0]
+
+    def _reserve(self):
+        """Reserve a slot for one more site; None when the pool is full"""
+        now = time.time()
+        with self._connections.transaction() as conn:
+            conn.execute('DELETE FROM site_pool WHERE site IS NULL AND reserved_until < ?', (now,))
+            count = conn.execute('SELECT COUNT(*) FROM site_pool').fetchone()[0]
+            if count >= self.size:
+                return None
+            slot = secrets.token_hex(8)
+            conn.execute(
+                'INSERT INTO site_pool (id, reserved_until, created_at) VALUES (?, ?, ?)',
+                (slot, now + self.reservation_ttl, now)
+            )
+            return slot
+
+    def _refill_loop(self):
+        while True:
+            self._wakeup.wait(timeout=30)
+            self._wakeup.clear()
+
+            while True:
+                try:
+                    slot = self._reserve()
+                except Exception as e:
+                    logger.error(f"Site pool reservation failed: {str(e)}")
+                    break
+                if slot is None:
+                    break
+
+                try:
+                    site = self.create_site(self.name_factory())
+                except Exception as e:
+                    self._connections.get().execute('DELETE FROM site_pool WHERE id = ?', (slot,))
+                    with self._lock:
+                        self.failures += 1
+                    logger.error(f"Site pool refill failed: {str(e)}")
+                    # Back off before retrying so a Netlify outage isn't hammered
+                    time.sleep(max(self.refill_interval, 5.0))
+                    continue
+
+                # Replaces the reservation, or re-adds the site if the
+                # reservation expired while Netlify was slow
+                self._connections.get().execute(
+                    'INSERT OR REPLACE INTO site_pool (id, site, reserved_until, created_at) VALUES (?, ?, NULL, ?)',
+                    (slot, json.dumps(site), time.time())
+                )
+                with self._lock:
+                    self.created += 1
+                    self._created_at.append(time.monotonic())
+
+                if self.refill_interval:
+                    time.sleep(self.refill_interval)
+
+    def stats(self):
+        depth = self._depth(self._connections.get()) if self.enabled else 0
+        with self._lock:
+            cutoff = time.monotonic() - 60
+            while self._created_at and self._created_at[0] < cutoff:
+                self._created_at.popleft()
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'depth': depth,
+                'target': self.size,
+                'low_watermark': self.low_watermark,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'created': self.created,
+                'failures': self.failures,
+                'refills_last_minute': len(self._created_at)
+            }
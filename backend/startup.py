@@ -0,0 +1,93 @@
+"""
+Startup-timing report.
+
+``app.py`` imports this module first, so the clock starts before Flask and
+the rest of the app are imported. The app marks each load phase as it
+finishes (imports, setup, templates, routes, warm-up) and logs one summary
+line once it is ready to serve.
+
+Under gunicorn's ``preload_app`` the load happens once, in the master, and
+workers are forked from it. Each process then records its first response and
+its first successful preview, timed from the moment it became ready: the end
+of the load, or the fork for a worker. Together with the load phases this is
+the time-to-first-successful-preview of a cold instance, reported under
+``startup`` in ``/api/stats``.
+"""
+
+import os
+import threading
+import time
+
+
+class StartupReport:
+    """Load phase durations plus the first responses served by this process"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.details = {}
+        self.loaded = None
+        self._last_mark = self.started
+        self._lock = threading.Lock()
+        self._reset_process(forked=False)
+        os.register_at_fork(after_in_child=lambda: self._reset_process(forked=True))
+
+    def _reset_process(self, forked):
+        self.pid = os.getpid()
+        self.forked = forked
+        self.ready_at = time.perf_counter() if forked else None
+        self.first_response = None
+        self.first_preview = None
+        # Lock-free check on the request path once both have been seen
+        self._pending = True
+
+    def mark(self, phase, **details):
+        """Record the time since the previous mark as ``phase``"""
+        now = time.perf_counter()
+        self.phases[phase] = now - self._last_mark
+        self._last_mark = now
+        self.details.update(details)
+
+    def finish(self):
+        """End the load; returns the summary line to log"""
+        self.loaded = time.perf_counter()
+        if self.ready_at is None:
+            self.ready_at = self.loaded
+        phases = ', '.join(f'{phase} {seconds * 1000:.1f}ms' for phase, seconds in self.phases.items())
+        return f"App loaded in {(self.loaded - self.started) * 1000:.1f}ms ({phases})"
+
+    def record_response(self, endpoint, status, latency, preview=False):
+        """Note a response; only the first (and first good preview) are kept"""
+        if not self._pending:
+            return
+        now = time.perf_counter()
+        ready_at = self.ready_at if self.ready_at is not None else self.started
+        entry = {
+            'endpoint': endpoint,
+            'status': status,
+            'latency_ms': round(latency * 1000, 3),
+            # From the end of the load (or the fork) until the response was ready
+            'ms_after_ready': round((now - ready_at) * 1000, 3)
+        }
+        with self._lock:
+            if self.first_response is None:
+                self.first_response = entry
+            if preview and 200 <= status < 300 and self.first_preview is None:
+                self.first_preview = entry
+            self._pending = self.first_preview is None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pid': self.pid,
+                'forked': self.forked,
+                'load_ms': round((self.loaded - self.started) * 1000, 3) if self.loaded else None,
+                'phases_ms': {phase: round(seconds * 1000, 3) for phase, seconds in self.phases.items()},
+                **self.details,
+                'first_response': self.first_response,
+                'first_preview': self.first_preview
+            }
+
+
+# Created on import, which app.py does before anything else
+startup_report = StartupReport()
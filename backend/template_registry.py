@@ -0,0 +1,216 @@
+"""
+Process-wide registry of compiled Jinja2 templates.
+
+Template sources live in the ``templates`` directory next to this file. Each
+template is parsed and compiled once, the first time it is requested (or when
+the registry is warmed at app load), and the compiled template is then shared
+by every worker thread. Compile and render durations are recorded so they can
+be reported from ``/api/stats``. ``generate`` streams a render in buffered
+chunks instead of building the whole output first.
+
+Templates can also be compiled ahead of time (``python compile_templates.py``,
+run by the Docker and Render builds) into ``templates_compiled``: Jinja's
+``compile_templates`` writes one Python module per template, which
+``ModuleLoader`` imports instead of parsing and compiling the source, so a
+cold process skips the Jinja compiler entirely. A manifest of source hashes is
+written next to the modules; if any template changed since, the compiled
+directory is ignored and everything is compiled from source as before.
+"""
+
+import compileall
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import jinja2
+from jinja2 import ChoiceLoader, Environment, FileSystemLoader, ModuleLoader
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_DIR = os.path.join(BASE_DIR, 'templates')
+COMPILED_DIR = os.path.join(BASE_DIR, 'templates_compiled')
+COMPILED_MANIFEST = 'manifest.json'
+
+# Jinja yields one string per template node; pieces are joined up to about
+# this many characters before being handed to the response
+STREAM_CHUNK_SIZE = 8 * 1024
+
+
+class TemplateRegistry:
+    """Compiles templates once per process and tracks compile/render timings"""
+
+    def __init__(self, template_dir=TEMPLATE_DIR, compiled_dir=None):
+        self.template_dir = template_dir
+        self.source_loader = FileSystemLoader(template_dir)
+        self.compiled_dir = None
+        self.precompiled = frozenset()
+        self.env = self._environment(self.source_loader)
+        self._templates = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        if compiled_dir:
+            self.use_compiled(compiled_dir)
+
+    @staticmethod
+    def _environment(loader):
+        # autoescape stays off to match the output of the original inline
+        # template; auto_reload is off so lookups never stat the filesystem.
+        # compile_templates uses this same environment, so precompiled
+        # modules always match what compiling from source would produce.
+        return Environment(loader=loader, autoescape=False, auto_reload=False)
+
+    def source_manifest(self):
+        """SHA-256 of every template source, plus the Jinja version"""
+        templates = {}
+        for name in self.source_loader.list_templates():
+            source, _, _ = self.source_loader.get_source(self.env, name)
+            templates[name] = hashlib.sha256(source.encode('utf-8')).hexdigest()
+        return {'jinja2': jinja2.__version__, 'templates': templates}
+
+    def compile(self, target=COMPILED_DIR):
+        """Compile every template into importable modules under ``target``
+
+        The modules are byte-compiled as well, so loading them later costs
+        an unmarshal rather than a Python compile.
+        """
+        os.makedirs(target, exist_ok=True)
+        self._environment(self.source_loader).compile_templates(target, zip=None, ignore_errors=False)
+        compileall.compile_dir(target, quiet=1)
+        manifest = self.source_manifest()
+        with open(os.path.join(target, COMPILED_MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        return sorted(manifest['templates'])
+
+    def use_compiled(self, compiled_dir):
+        """Load templates from ``compiled_dir`` if it matches the sources
+
+        Returns whether the precompiled templates are in use. A missing,
+        stale or mismatched directory leaves templates compiled from source.
+        """
+        try:
+            with open(os.path.join(compiled_dir, COMPILED_MANIFEST)) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            logger.info(f"No precompiled templates in {compiled_dir}, compiling from source")
+            return False
+
+        if manifest != self.source_manifest():
+            logger.warning(
+                f"Precompiled templates in {compiled_dir} are out of date, compiling from source; "
+                f"run compile_templates.py to refresh them"
+            )
+            return False
+
+        with self._lock:
+            # Anything not precompiled still loads from source
+            self.env = self._environment(ChoiceLoader([ModuleLoader(compiled_dir), self.source_loader]))
+            self.compiled_dir = compiled_dir
+            self.precompiled = frozenset(manifest['templates'])
+            self._templates.clear()
+        return True
+
+    def source(self, name):
+        """The template's source text, whichever loader serves it"""
+        source, _, _ = self.source_loader.get_source(self.env, name)
+        return source
+
+    def _new_stats(self):
+        return {
+            'compiles': 0,
+            'compile_seconds': 0.0,
+            'renders': 0,
+            'render_seconds_total': 0.0,
+            'render_seconds_max': 0.0
+        }
+
+    def get(self, name):
+        """Return the compiled template, compiling it on first use only"""
+        template = self._templates.get(name)
+        if template is not None:
+            return template
+
+        with self._lock:
+            template = self._templates.get(name)
+            if template is None:
+                start = time.perf_counter()
+                template = self.env.get_template(name)
+                elapsed = time.perf_counter() - start
+
+                stats = self._stats.setdefault(name, self._new_stats())
+                stats['compiles'] += 1
+                stats['compile_seconds'] += elapsed
+                self._templates[name] = template
+        return template
+
+    def warm(self, *names):
+        """Compile (or load precompiled) templates ahead of the first request"""
+        for name in names:
+            self.get(name)
+
+    def _record_render(self, name, elapsed):
+        with self._lock:
+            stats = self._stats.setdefault(name, self._new_stats())
+            stats['renders'] += 1
+            stats['render_seconds_total'] += elapsed
+            stats['render_seconds_max'] = max(stats['render_seconds_max'], elapsed)
+
+    def render(self, name, **context):
+        """Render a template and record how long the render took"""
+        template = self.get(name)
+
+        start = time.perf_counter()
+        output = template.render(**context)
+        self._record_render(name, time.perf_counter() - start)
+        return output
+
+    def generate(self, name, chunk_size=STREAM_CHUNK_SIZE, **context):
+        """Render a template as a stream of string chunks
+
+        The render is recorded once the stream is exhausted; the time spent
+        by the consumer between chunks is not counted.
+        """
+        template = self.get(name)
+
+        elapsed = 0.0
+        buffer = []
+        buffered = 0
+        start = time.perf_counter()
+        for piece in template.generate(**context):
+            buffer.append(piece)
+            buffered += len(piece)
+            if buffered >= chunk_size:
+                elapsed += time.perf_counter() - start
+                yield ''.join(buffer)
+                buffer = []
+                buffered = 0
+                start = time.perf_counter()
+        elapsed += time.perf_counter() - start
+        if buffer:
+            yield ''.join(buffer)
+        self._record_render(name, elapsed)
+
+    def stats(self):
+        """Return a snapshot of compile and render timings per template"""
+        with self._lock:
+            snapshot = {}
+            for name, stats in self._stats.items():
+                renders = stats['renders']
+                snapshot[name] = {
+                    'compiles': stats['compiles'],
+                    'precompiled': name in self.precompiled,
+                    'compile_ms': round(stats['compile_seconds'] * 1000, 3),
+                    'renders': renders,
+                    'render_ms_avg': round(stats['render_seconds_total'] * 1000 / renders, 3) if renders else 0.0,
+                    'render_ms_max': round(stats['render_seconds_max'] * 1000, 3),
+                    # Compile cost amortised over every render served so far
+                    'compile_ms_per_render': round(stats['compile_seconds'] * 1000 / renders, 6) if renders else None
+                }
+            return snapshot
+
+
+# Shared by every request handled in this process
+template_registry = TemplateRegistry()
@@ -0,0 +1,72 @@
+"""
+Shared fixtures: the app is imported once, configured against a
+FakeNetlifyServer and throwaway SQLite files, since Config reads the
+environment at import time.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from fake_netlify import FakeNetlifyServer  # noqa: E402
+
+NETLIFY = FakeNetlifyServer().start()
+DATA_DIR = tempfile.mkdtemp(prefix='landing-tests-')
+
+os.environ.update(
+    NETLIFY_TOKEN='test-token',
+    ADMIN_TOKEN='test-admin',
+    NETLIFY_API_URL=NETLIFY.api_url,
+    HISTORY_DB_PATH=os.path.join(DATA_DIR, 'history.sqlite3'),
+    RATE_LIMIT_SQLITE_PATH=os.path.join(DATA_DIR, 'shared.sqlite3'),
+    MAX_DEPLOYS_PER_HOUR='100000',
+    SITE_POOL_SIZE='0',
+    WARM_UP='false'
+)
+
+THEME = {
+    'id': 'test',
+    'name': 'Test Theme',
+    'colors': {
+        'primary': '#3B82F6',
+        'secondary': '#1E40AF',
+        'accent': '#F59E0B',
+        'text': '#1F2937',
+        'background': '#FFFFFF'
+    }
+}
+
+
+@pytest.fixture(scope='session')
+def netlify():
+    return NETLIFY
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    import app
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def deploy_payload(request):
+    """A deploy body whose title is unique to the test"""
+    def build(**overrides):
+        payload = {
+            'title': f'Project {request.node.name}',
+            'description': 'A landing page generated by the test suite',
+            'theme': THEME
+        }
+        payload.update(overrides)
+        return payload
+    return build
@@ -0,0 +1,77 @@
+"""Deploy ZIP construction: the content-addressed cache and streamed archives"""
+
+import io
+import zipfile
+
+from artifacts import STATIC_FILES, ArtifactStore, static_members
+
+
+def unzip(archive):
+    with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+        assert zf.testzip() is None
+        return {info.filename: zf.read(info) for info in zf.infolist()}
+
+
+def test_same_site_reuses_the_cached_archive():
+    store = ArtifactStore()
+    first = store.get_zip('<h1>Hello</h1>', (('assets/a.css', 'body{}'),))
+    second = store.get_zip('<h1>Hello</h1>', (('assets/a.css', 'body{}'),))
+    other = store.get_zip('<h1>Hello</h1>', (('assets/a.css', 'p{}'),))
+
+    assert second is first
+    assert other != first
+    assert store.stats()['hits'] == 1
+
+
+def test_archives_are_reproducible_and_carry_the_static_files():
+    archive = ArtifactStore.build('<h1>Hello</h1>')
+    assert ArtifactStore.build('<h1>Hello</h1>') == archive
+
+    files = unzip(archive)
+    assert files['index.html'] == b'<h1>Hello</h1>'
+    for name, content in STATIC_FILES.items():
+        assert files[name] == content.encode('utf-8')
+    # Deflated once per process, then spliced into every archive
+    assert static_members() is static_members()
+
+
+def test_content_hash_separates_paths_from_contents():
+    assert ArtifactStore.content_hash('x', (('a', 'bc'),)) != ArtifactStore.content_hash('x', (('ab', 'c'),))
+
+
+def test_large_sites_stream_members_with_data_descriptors():
+    store = ArtifactStore()
+    html = '<p>' + 'streamed ' * 1000 + '</p>'
+    big_asset = io.BytesIO(bytes(range(256)) * 4096)
+    chunks = store.for_upload(html, (('assets/big.bin', big_asset),), stream_threshold=1024)
+
+    assert not isinstance(chunks, bytes)
+    archive = b''.join(chunks)
+    files = unzip(archive)
+    assert files['index.html'] == html.encode('utf-8')
+    assert files['assets/big.bin'] == bytes(range(256)) * 4096
+
+    with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+        flags = {info.filename: info.flag_bits for info in zf.infolist()}
+    # Streamed members put their CRC and sizes after the data
+    assert flags['index.html'] & 0x08
+    assert flags['assets/big.bin'] & 0x08
+    assert not flags['netlify.toml'] & 0x08
+    # Streamed archives aren't cached
+    assert store.stats()['entries'] == 0
+
+
+def test_small_in_memory_sites_are_not_streamed():
+    store = ArtifactStore()
+    assert isinstance(store.for_upload('<h1>Small</h1>', stream_threshold=1024), bytes)
+
+
+def test_streamed_zip_deploys_to_netlify(app_module, client, netlify, deploy_payload, monkeypatch):
+    monkeypatch.setattr(app_module.config, 'ZIP_STREAM_THRESHOLD', 0)
+    payload = deploy_payload()
+    response = client.post('/api/deploy', json=payload)
+    assert response.status_code == 200, response.get_json()
+
+    files = netlify.state.deploys[response.get_json()['deploy_id']]['files']
+    assert payload['title'].encode() in netlify.state.blobs[files['/index.html']]
+    assert '/netlify.toml' in files
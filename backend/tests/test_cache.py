@@ -0,0 +1,55 @@
+"""The bounded LRU/TTL caches in front of rendering and packaging"""
+
+from cache import LRUCache
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = LRUCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_byte_cap_evicts_until_the_new_entry_fits():
+    cache = LRUCache(max_entries=None, max_bytes=10)
+    cache.set('a', b'x' * 4)
+    cache.set('b', b'x' * 4)
+    cache.set('c', b'x' * 4)
+
+    assert cache.get('a') is None
+    assert cache.stats()['bytes'] == 8
+    # Larger than the whole cache: refused instead of emptying it
+    assert cache.set('huge', b'x' * 11) is False
+    assert len(cache) == 2
+
+
+def test_expired_entries_are_misses(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('cache.time.monotonic', lambda: now[0])
+    cache = LRUCache(ttl=60)
+    cache.set('a', 'page')
+    now[0] += 59
+    assert cache.get('a') == 'page'
+    now[0] += 1
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+    assert len(cache) == 0
+
+
+def test_identical_renders_come_from_the_cache(app_module, deploy_payload):
+    payload = deploy_payload()
+    theme = payload['theme']
+    generator = app_module.HTMLGenerator
+    hits = app_module.render_cache.hits
+
+    first = generator.generate_cached_landing_page(payload['title'], payload['description'], theme)
+    renamed = dict(theme, name='Another name for the same colours')
+    second = generator.generate_cached_landing_page(payload['title'], payload['description'], renamed)
+
+    assert second is first
+    assert app_module.render_cache.hits == hits + 1
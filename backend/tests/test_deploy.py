@@ -0,0 +1,121 @@
+import io
+import zipfile
+
+import pytest
+
+from site_manifests import SiteManifestStore
+
+
+def deploy(client, payload, **headers):
+    response = client.post('/api/deploy', json=payload, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+@pytest.fixture
+def digest_mode(app_module, monkeypatch):
+    monkeypatch.setattr(app_module.config, 'NETLIFY_DEPLOY_MODE', 'digest')
+
+
+def test_digest_deploy_uploads_only_required_files(client, netlify, deploy_payload, digest_mode):
+    deploy(client, deploy_payload())
+
+    # The second page shares every file but index.html with the first
+    known_blobs = set(netlify.state.blobs)
+    uploads_before = netlify.state.request_counts.get('upload_file', 0)
+    result = deploy(client, deploy_payload(description='Same theme, different copy'))
+
+    files = netlify.state.deploys[result['deploy_id']]['files']
+    required = {sha1 for sha1 in files.values() if sha1 not in known_blobs}
+    uploads = netlify.state.request_counts.get('upload_file', 0) - uploads_before
+    assert len(required) == 1
+    assert uploads == len(required) < len(files)
+    # Every required file arrived, so Netlify went on to publish it
+    assert netlify.state.deploys[result['deploy_id']]['state'] == 'ready'
+
+
+def test_zip_deploy_sends_a_valid_archive(app_module, client, netlify, deploy_payload):
+    assert app_module.config.NETLIFY_DEPLOY_MODE == 'zip'
+    payload = deploy_payload()
+    result = deploy(client, payload)
+
+    files = netlify.state.deploys[result['deploy_id']]['files']
+    assert '/index.html' in files
+    assert payload['title'].encode() in netlify.state.blobs[files['/index.html']]
+
+    html, assets = app_module.HTMLGenerator.generate_site(payload['title'], payload['description'], payload['theme'])
+    archive = zipfile.ZipFile(io.BytesIO(app_module.HTMLGenerator.create_upload_zip(html, assets)))
+    assert archive.testzip() is None
+    assert 'index.html' in archive.namelist()
+
+
+def test_unchanged_redeploy_skips_netlify(client, netlify, deploy_payload):
+    payload = deploy_payload()
+    first = deploy(client, payload)
+    site = {'site_id': first['site_id'], 'site_token': first['site_token']}
+
+    deploys_before = netlify.state.request_counts.get('create_deploy', 0)
+    unchanged = deploy(client, dict(payload, **site))
+    assert unchanged['unchanged'] is True
+    assert unchanged['uploaded_files'] == 0
+    assert unchanged['deploy_id'] == first['deploy_id']
+    assert netlify.state.request_counts.get('create_deploy', 0) == deploys_before
+
+    changed = deploy(client, dict(payload, description='An updated description', **site))
+    assert changed['unchanged'] is False
+    assert changed['site_id'] == first['site_id']
+    assert changed['uploaded_files'] == 1
+
+
+def test_redeploys_diff_against_the_deploy_other_workers_made(app_module, client, deploy_payload):
+    payload = deploy_payload()
+    first = deploy(client, payload)
+    site = {'site_id': first['site_id'], 'site_token': first['site_token']}
+    changed = deploy(client, dict(payload, description='An updated description', **site))
+
+    # Another worker opens the same file and sees the newest deploy
+    other_worker = SiteManifestStore(app_module.config.SITE_MANIFEST_DB_PATH)
+    assert other_worker.get(first['site_id'])['deploy_id'] == changed['deploy_id']
+
+    # Going back to the first page is a change, not "unchanged"
+    reverted = deploy(client, dict(payload, **site))
+    assert reverted['unchanged'] is False
+    assert reverted['deploy_id'] != first['deploy_id']
+
+
+def test_site_manifests_keep_the_newest_deploy(tmp_path):
+    store = SiteManifestStore(str(tmp_path / 'manifests.sqlite3'), max_entries=2)
+    store.set('site-a', {'deploy_id': 'new', 'deployed_at': '2024-01-02T00:00:00Z'})
+    store.set('site-a', {'deploy_id': 'old', 'deployed_at': '2024-01-01T00:00:00Z'})
+    assert store.get('site-a')['deploy_id'] == 'new'
+
+    store.set('site-b', {'deploy_id': 'b', 'deployed_at': None})
+    store.set('site-c', {'deploy_id': 'c', 'deployed_at': None})
+    assert store.get('site-a') is None
+    assert store.get('site-c')['deploy_id'] == 'c'
+
+
+def test_redeploy_requires_the_site_token(client, deploy_payload):
+    first = deploy(client, deploy_payload())
+    response = client.post('/api/deploy', json=deploy_payload(site_id=first['site_id'], site_token='0' * 64))
+    assert response.status_code == 403
+
+
+def test_idempotency_key_replays_the_first_response(client, netlify, deploy_payload):
+    payload = deploy_payload()
+    first = client.post('/api/deploy', json=payload, headers={'Idempotency-Key': 'replay-key'})
+    sites_before = netlify.state.request_counts.get('create_site', 0)
+    replay = client.post('/api/deploy', json=payload, headers={'Idempotency-Key': 'replay-key'})
+
+    assert replay.status_code == first.status_code == 200
+    assert replay.headers['Idempotent-Replayed'] == 'true'
+    assert replay.get_data() == first.get_data()
+    assert netlify.state.request_counts.get('create_site', 0) == sites_before
+
+
+def test_idempotency_key_reused_for_another_request_conflicts(client, deploy_payload):
+    headers = {'Idempotency-Key': 'conflict-key'}
+    assert client.post('/api/deploy', json=deploy_payload(), headers=headers).status_code == 200
+
+    response = client.post('/api/deploy', json=deploy_payload(description='Something else'), headers=headers)
+    assert response.status_code == 422
@@ -0,0 +1,79 @@
+def test_history_pages_through_a_clients_deploys(app_module, client, deploy_payload):
+    client_id = client.post('/api/client').get_json()['client_id']
+    headers = {'X-Client-Id': client_id}
+    deployed = []
+    for index in range(5):
+        response = client.post('/api/deploy', json=deploy_payload(title=f'History page {index}'), headers=headers)
+        deployed.append(response.get_json()['site_id'])
+    app_module.deployment_history.flush()
+
+    seen = []
+    cursor = None
+    while True:
+        query = {'limit': 2}
+        if cursor:
+            query['cursor'] = cursor
+        page = client.get('/api/history', query_string=query, headers=headers).get_json()
+        assert len(page['deployments']) <= 2
+        seen.extend(page['deployments'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    # Newest first, each deploy exactly once, with the token to update it
+    assert [entry['site_id'] for entry in seen] == deployed[::-1]
+    assert all(entry['site_token'] == app_module.site_token(entry['site_id']) for entry in seen)
+
+
+def test_history_requires_an_issued_client_id(client):
+    assert client.get('/api/history').status_code == 401
+    assert client.get('/api/history', headers={'X-Client-Id': '10.0.0.5'}).status_code == 401
+    assert client.get('/api/history', query_string={'cursor': 'garbage'},
+                      headers={'X-Client-Id': client.post('/api/client').get_json()['client_id']}).status_code == 400
+
+
+def test_malformed_client_id_does_not_fail_a_finished_deploy(client, netlify, deploy_payload):
+    sites_before = netlify.state.request_counts.get('create_site', 0)
+    response = client.post('/api/deploy', json=deploy_payload(), headers={'X-Client-Id': 'abc.\xe9'})
+    assert response.status_code == 200
+    assert netlify.state.request_counts.get('create_site', 0) == sites_before + 1
+
+
+def test_deploys_without_a_client_id_are_logged_for_admins_only(app_module, client, deploy_payload):
+    anonymous = client.post('/api/deploy', json=deploy_payload()).get_json()
+    app_module.deployment_history.flush()
+
+    admin = client.get('/api/history', query_string={'client': '*', 'site_id': anonymous['site_id']},
+                       headers={'X-Admin-Token': 'test-admin'}).get_json()
+    assert [entry['site_id'] for entry in admin['deployments']] == [anonymous['site_id']]
+    assert admin['deployments'][0]['client'] is None
+    assert 'site_token' not in admin['deployments'][0]
+
+    own = client.get('/api/history', query_string={'site_id': anonymous['site_id']},
+                     headers={'X-Client-Id': client.post('/api/client').get_json()['client_id']}).get_json()
+    assert own['deployments'] == []
+
+
+def test_history_from_before_nullable_clients_is_migrated(tmp_path):
+    import sqlite3
+
+    from history import DeploymentHistory
+
+    path = str(tmp_path / 'history.sqlite3')
+    conn = sqlite3.connect(path)
+    conn.execute(
+        'CREATE TABLE deployments (id INTEGER PRIMARY KEY AUTOINCREMENT, client TEXT NOT NULL,'
+        ' site_id TEXT NOT NULL, deploy_id TEXT, title TEXT NOT NULL, description TEXT NOT NULL, theme TEXT,'
+        ' url TEXT, admin_url TEXT, updated INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL)'
+    )
+    conn.execute('CREATE INDEX deployments_by_client ON deployments (client, created_at, id)')
+    conn.execute("INSERT INTO deployments (client, site_id, title, description, created_at)"
+                 " VALUES ('old-client', 'old-site', 'Old', 'Old page', 1.0)")
+    conn.commit()
+    conn.close()
+
+    history = DeploymentHistory(path)
+    history.record(None, {'site_id': 'new-site', 'title': 'New', 'description': 'New page'}, now=2.0)
+    history.flush()
+    rows, _ = history.query()
+    assert [(row['client'], row['site_id']) for row in rows] == [(None, 'new-site'), ('old-client', 'old-site')]
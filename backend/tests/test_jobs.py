@@ -0,0 +1,133 @@
+"""Background deploy jobs and their event streams"""
+
+import sqlite3
+import threading
+import time
+
+import jobs
+from jobs import JobManager
+
+
+def blocking_pipeline(release):
+    def pipeline(job):
+        job.advance(jobs.RENDERING)
+        release.wait(5)
+        return {'url': 'https://example.netlify.app'}
+    return pipeline
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_job_of_a_dead_worker_fails_once_its_lease_runs_out(tmp_path, monkeypatch):
+    path = str(tmp_path / 'jobs.sqlite3')
+    running = JobManager(path, lease=0.3, poll_interval=0.01)
+    # The worker stops renewing, as if it had died
+    monkeypatch.setattr(running, 'renew_leases', lambda job_ids: None)
+    release = threading.Event()
+    job = running.submit('Stuck', blocking_pipeline(release))
+    wait_until(lambda: job.state == jobs.RENDERING)
+
+    other_worker = JobManager(path, lease=0.3, poll_interval=0.01)
+    time.sleep(0.4)
+    status = other_worker.get(job.id).to_dict()
+    assert status['state'] == jobs.FAILED
+    assert status['error'] == jobs.ABANDONED
+    assert status['events'][-1]['state'] == jobs.FAILED
+
+    # The original worker finishing late doesn't overwrite the failure
+    release.set()
+    wait_until(lambda: job.id not in running._jobs)
+    assert job.state == jobs.FAILED
+    assert other_worker.get(job.id).to_dict()['state'] == jobs.FAILED
+
+
+def test_leases_are_renewed_while_the_job_runs(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    running = JobManager(path, lease=0.3, poll_interval=0.01)
+    release = threading.Event()
+    job = running.submit('Slow', blocking_pipeline(release))
+
+    other_worker = JobManager(path, lease=0.3, poll_interval=0.01)
+    time.sleep(0.6)
+    assert other_worker.get(job.id).to_dict()['state'] == jobs.RENDERING
+    assert other_worker.stats()['abandoned'] == 0
+    release.set()
+    wait_until(lambda: job.done)
+    assert other_worker.get(job.id).to_dict()['state'] == jobs.READY
+
+
+def test_event_stream_closes_after_its_maximum_duration(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module.config, 'DEPLOY_JOB_STREAM_MAX_SECONDS', 0.2)
+    release = threading.Event()
+    job = app_module.deploy_jobs.submit('Slow', blocking_pipeline(release))
+    try:
+        started = time.monotonic()
+        body = client.get(f'/api/deploy/{job.id}/events').get_data(as_text=True)
+        assert time.monotonic() - started < 5
+        assert 'event: timeout' in body
+        assert 'event: result' not in body
+    finally:
+        release.set()
+
+
+def test_jobs_from_before_leases_are_migrated(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE deploy_jobs (id TEXT PRIMARY KEY, title TEXT NOT NULL, state TEXT NOT NULL,'
+                 ' result TEXT, error TEXT, created_at TEXT NOT NULL, finished_at REAL)')
+    conn.execute("INSERT INTO deploy_jobs (id, title, state, created_at) VALUES ('old', 'Old', 'uploading', 'x')")
+    conn.commit()
+    conn.close()
+
+    manager = JobManager(path, lease=0.1, poll_interval=0.01)
+    assert manager.get('old').state == jobs.UPLOADING
+    time.sleep(0.2)
+    assert manager.get('old').state == jobs.FAILED
+
+
+def test_async_deploy_reports_every_stage(app_module, client, deploy_payload):
+    response = client.post('/api/deploy?async=1', json=deploy_payload())
+    assert response.status_code == 202
+    queued = response.get_json()
+    assert queued['state'] == jobs.QUEUED
+    assert response.headers['Location'] == queued['status_url']
+
+    body = client.get(queued['events_url']).get_data(as_text=True)
+    states = [line[len('event: '):] for line in body.splitlines() if line.startswith('event: ')]
+    assert states[0] == jobs.QUEUED
+    assert states[-2:] == [jobs.READY, 'result']
+    assert jobs.UPLOADING in states
+
+    status = client.get(queued['status_url']).get_json()
+    assert status['state'] == jobs.READY
+    assert status['result']['url'].startswith('https://')
+
+
+def test_failed_job_reports_the_error(app_module):
+    def pipeline(job):
+        raise RuntimeError('Netlify is down')
+
+    job = app_module.deploy_jobs.submit('Broken', pipeline)
+    wait_until(lambda: job.done)
+    assert job.to_dict()['state'] == jobs.FAILED
+    assert job.to_dict()['error'] == 'Netlify is down'
+
+
+def test_full_queue_answers_503(app_module, client, deploy_payload, monkeypatch):
+    def full(*args):
+        raise jobs.JobQueueFull('Deploy queue is full (0 jobs waiting)')
+    monkeypatch.setattr(app_module.deploy_jobs, 'submit', full)
+
+    response = client.post('/api/deploy', json=deploy_payload(), headers={'Prefer': 'respond-async'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+
+
+def test_unknown_job_is_404(client):
+    assert client.get('/api/deploy/no-such-job').status_code == 404
+    assert client.get('/api/deploy/no-such-job/events').status_code == 404
@@ -0,0 +1,88 @@
+"""Metrics merged across gunicorn workers"""
+
+import json
+import os
+import subprocess
+import sys
+
+from metrics import MetricsRegistry
+
+
+def registry(directory):
+    metrics = MetricsRegistry(str(directory))
+    metrics.counter('deploys_total', 'Deploys', ['outcome'])
+    metrics.gauge('in_flight', 'Deploys running')
+    metrics.gauge('tracked_clients', 'Clients in the shared store', aggregate='max')
+    metrics.histogram('deploy_seconds', 'Deploy time', buckets=(1.0, 5.0))
+    return metrics
+
+
+def record(metrics, deploys, in_flight, tracked, seconds):
+    lookup = metrics._metrics
+    lookup['deploys_total'].inc(deploys, outcome='success')
+    lookup['in_flight'].set(in_flight)
+    lookup['tracked_clients'].set(tracked)
+    for value in seconds:
+        lookup['deploy_seconds'].observe(value)
+
+
+def write_worker(directory, pid, metrics):
+    with open(os.path.join(directory, f'{pid}.json'), 'w') as f:
+        json.dump(metrics.snapshot(), f)
+
+
+def sample(merged, name, labels='[]'):
+    return merged[name]['samples'][labels]
+
+
+def exited_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def test_scrape_merges_every_live_worker(tmp_path):
+    own = registry(tmp_path)
+    record(own, deploys=2, in_flight=1, tracked=40, seconds=[0.5])
+    sibling = registry(tmp_path / 'sibling')
+    record(sibling, deploys=3, in_flight=2, tracked=42, seconds=[2.0, 9.0])
+    # The parent process stands in for a live sibling worker
+    write_worker(tmp_path, os.getppid(), sibling)
+
+    merged = own.collect()
+    assert sample(merged, 'deploys_total', '["success"]') == 5
+    assert sample(merged, 'in_flight') == 3
+    assert sample(merged, 'tracked_clients') == 42
+    assert sample(merged, 'deploy_seconds')['buckets'] == [1, 1, 1]
+    assert sample(merged, 'deploy_seconds')['count'] == 3
+
+    text = own.exposition()
+    assert '# TYPE deploys_total counter' in text
+    assert 'deploy_seconds_bucket{le="5"} 2' in text
+    assert 'deploy_seconds_bucket{le="+Inf"} 3' in text
+
+
+def test_exited_workers_keep_their_counts_but_not_their_gauges(tmp_path):
+    own = registry(tmp_path)
+    record(own, deploys=1, in_flight=0, tracked=1, seconds=[])
+    gone = registry(tmp_path / 'gone')
+    record(gone, deploys=4, in_flight=7, tracked=9, seconds=[0.1])
+    pid = exited_pid()
+    write_worker(tmp_path, pid, gone)
+
+    for _ in range(2):
+        # Folded into the archive once, not again on the next scrape
+        merged = own.collect()
+        assert sample(merged, 'deploys_total', '["success"]') == 5
+        assert sample(merged, 'in_flight') == 0
+        assert sample(merged, 'tracked_clients') == 1
+        assert sample(merged, 'deploy_seconds')['count'] == 1
+    assert not os.path.exists(tmp_path / f'{pid}.json')
+
+
+def test_metrics_endpoint_serves_the_exposition_format(client, deploy_payload):
+    client.post('/api/preview', json=deploy_payload())
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    assert '# TYPE landing_deploys_in_flight gauge' in response.get_data(as_text=True)
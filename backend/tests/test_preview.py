@@ -0,0 +1,84 @@
+"""Preview responses: revalidation, compression and raw HTML streaming"""
+
+import gzip
+import json
+
+import pytest
+
+
+def test_preview_revalidates_with_its_etag(client, deploy_payload):
+    first = client.post('/api/preview', json=deploy_payload())
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+
+    again = client.post('/api/preview', json=deploy_payload(), headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.get_data() == b''
+    assert again.headers['ETag'] == etag
+
+    changed = client.post('/api/preview', json=deploy_payload(description='Other copy'), headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+
+
+def test_preview_is_gzipped_for_clients_that_accept_it(client, deploy_payload):
+    plain = client.post('/api/preview', json=deploy_payload())
+    zipped = client.post('/api/preview', json=deploy_payload(), headers={'Accept-Encoding': 'gzip'})
+
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in zipped.headers['Vary']
+    assert json.loads(gzip.decompress(zipped.get_data())) == plain.get_json()
+    assert zipped.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+
+    # Either representation's validator revalidates the other
+    revalidated = client.post('/api/preview', json=deploy_payload(), headers={'If-None-Match': zipped.headers['ETag']})
+    assert revalidated.status_code == 304
+
+
+def test_preview_prefers_brotli_when_installed(client, deploy_payload):
+    brotli = pytest.importorskip('brotli')
+    response = client.post('/api/preview', json=deploy_payload(), headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert json.loads(brotli.decompress(response.get_data()))['success'] is True
+
+
+def test_identity_only_clients_get_an_uncompressed_preview(client, deploy_payload):
+    response = client.post('/api/preview', json=deploy_payload(), headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json()['success'] is True
+
+
+def test_raw_preview_streams_first_then_serves_the_cached_page(client, deploy_payload):
+    payload = deploy_payload()
+    query = {'title': payload['title'], 'description': payload['description'], 'theme': json.dumps(payload['theme'])}
+
+    streamed = client.get('/api/preview/render', query_string=query)
+    assert streamed.status_code == 200
+    # Sent as it renders: no length or validator known up front
+    assert 'Content-Length' not in streamed.headers
+    assert 'ETag' not in streamed.headers
+    assert streamed.headers['Content-Security-Policy'] == 'sandbox'
+    html = streamed.get_data(as_text=True)
+    assert html.lstrip().lower().startswith('<!doctype html')
+    assert payload['title'] in html
+
+    cached = client.get('/api/preview/render', query_string=query)
+    assert cached.headers['Content-Length'] == str(len(html.encode('utf-8')))
+    assert cached.get_data(as_text=True) == html
+    assert 'ETag' in cached.headers
+    assert cached.headers['Content-Security-Policy'] == 'sandbox'
+
+
+def test_raw_previews_of_caller_text_are_sandboxed(client, deploy_payload):
+    payload = deploy_payload(title='<script>alert(1)</script> & friends')
+    response = client.post('/api/preview', json=payload, headers={'Accept': 'text/html'})
+
+    assert response.mimetype == 'text/html'
+    assert response.headers['Content-Security-Policy'] == 'sandbox'
+    assert response.headers['X-Content-Type-Options'] == 'nosniff'
+    assert response.headers['X-Preview-Title'] == '%3Cscript%3Ealert%281%29%3C/script%3E%20%26%20friends'
+
+
+def test_raw_preview_rejects_a_theme_that_is_not_an_object(client):
+    query = {'title': 'Title', 'description': 'Description'}
+    assert client.get('/api/preview/render', query_string=dict(query, theme='not json')).status_code == 400
+    assert client.get('/api/preview/render', query_string=dict(query, theme='[1]')).status_code == 400
@@ -0,0 +1,136 @@
+import threading
+
+import pytest
+
+from fake_redis import FakeRedisServer
+from rate_limit import RedisLimiter, SlidingWindowLimiter, SQLiteLimiter
+
+
+@pytest.fixture
+def sqlite_limiters(tmp_path):
+    # Separate instances on one file stand in for separate workers
+    path = str(tmp_path / 'rate-limit.sqlite3')
+    return [SQLiteLimiter(path, limit=25) for _ in range(4)]
+
+
+@pytest.fixture
+def redis_limiters():
+    server = FakeRedisServer().start()
+    yield [RedisLimiter(server.url, limit=25) for _ in range(4)]
+    server.shutdown()
+
+
+def hammer(limiters, hits_per_thread=5, threads_per_limiter=8):
+    """Hit one key from many threads at once; return how many were allowed"""
+    allowed = []
+    barrier = threading.Barrier(len(limiters) * threads_per_limiter)
+
+    def run(limiter):
+        barrier.wait()
+        for _ in range(hits_per_thread):
+            allowed.append(limiter.hit('203.0.113.7', now=1_000_000.0))
+
+    threads = [
+        threading.Thread(target=run, args=(limiter,))
+        for limiter in limiters for _ in range(threads_per_limiter)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return allowed.count(True), len(allowed)
+
+
+@pytest.mark.parametrize('backend', ['sqlite_limiters', 'redis_limiters'])
+def test_shared_backend_admits_exactly_the_limit(backend, request):
+    limiters = request.getfixturevalue(backend)
+    allowed, total = hammer(limiters)
+    assert total == 160
+    assert allowed == 25
+    assert sum(limiter.rejections for limiter in limiters) == total - allowed
+
+
+def test_redis_stats_count_clients_in_the_current_windows(redis_limiters):
+    limiter = redis_limiters[0]
+    for client in ('198.51.100.1', '2001:db8::1'):
+        limiter.hit(client, now=1_000_000.0)
+    limiter.hit('198.51.100.2', now=1_000_000.0 - 2 * limiter.window)
+    assert limiter.tracked_clients(now=1_000_000.0) == 2
+
+
+def test_redis_stats_reuse_the_client_count_until_it_expires(redis_limiters):
+    limiter = redis_limiters[0]
+    scans = []
+    scan = limiter.tracked_clients
+    limiter.tracked_clients = lambda now=None: scans.append(now) or scan(now)
+
+    limiter.hit('198.51.100.1')
+    assert limiter.stats()['tracked_clients'] == 1
+    limiter.hit('198.51.100.2')
+    assert limiter.stats()['tracked_clients'] == 1
+    assert len(scans) == 1
+
+    limiter.stats_ttl = 0
+    assert limiter.stats()['tracked_clients'] == 2
+    assert len(scans) == 2
+
+
+@pytest.fixture
+def three_per_hour(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'deploy_limiter', SlidingWindowLimiter(limit=3))
+
+
+def test_batch_charges_one_deploy_per_item(client, netlify, deploy_payload, three_per_hour):
+    items = [deploy_payload(title=f'Batch item {i}') for i in range(4)]
+    items.insert(1, {'title': ''})
+    headers = {'X-Forwarded-For': '192.0.2.10'}
+    sites_before = netlify.state.request_counts.get('create_site', 0)
+
+    response = client.post('/api/deploy/batch', json={'items': items}, headers=headers)
+    body = response.get_json()
+    assert response.status_code == 200
+    # The invalid item isn't charged; the fourth valid one is over the limit
+    assert [result['success'] for result in body['results']] == [True, False, True, True, False]
+    assert body['results'][4]['error'] == 'Rate limit exceeded'
+    assert body['rate_limited'] == 1
+    assert netlify.state.request_counts.get('create_site', 0) - sites_before == 3
+
+    response = client.post('/api/deploy/batch', json={'items': items[:1]}, headers=headers)
+    assert response.status_code == 429
+    # Another client has its own allowance
+    response = client.post('/api/deploy', json=deploy_payload(), headers={'X-Forwarded-For': '192.0.2.11'})
+    assert response.status_code == 200
+
+
+def allowed(limiter, key, now, attempts):
+    return sum(limiter.hit(key, now=now) for _ in range(attempts))
+
+
+def test_memory_limiter_weights_the_previous_window():
+    limiter = SlidingWindowLimiter(limit=10, window=3600)
+    start = 3600 * 100.0
+    assert allowed(limiter, 'client', start, 12) == 10
+
+    # Halfway through the next window half of the previous one still counts
+    assert allowed(limiter, 'client', start + 3600 + 1800, 10) == 5
+    # Two windows on, nothing of the old counts overlaps any more
+    assert allowed(limiter, 'client', start + 3 * 3600, 12) == 10
+    assert limiter.stats()['rejections'] == 2 + 5 + 2
+
+
+def test_memory_limiter_caps_the_clients_it_tracks():
+    limiter = SlidingWindowLimiter(limit=10, stripes=4, max_clients=8)
+    for i in range(100):
+        limiter.hit(f'198.51.100.{i}', now=1_000_000.0)
+
+    stats = limiter.stats()
+    assert stats['tracked_clients'] <= 8
+    assert stats['evictions'] == 100 - stats['tracked_clients']
+
+
+def test_memory_limiter_sweeps_idle_clients():
+    limiter = SlidingWindowLimiter(limit=10, window=3600, stripes=1, sweep_interval=60)
+    limiter.hit('idle', now=3600 * 100.0)
+    limiter.hit('active', now=3600 * 102.0)
+    assert len(limiter) == 1
+    assert limiter.stats()['evictions'] == 1
@@ -0,0 +1,89 @@
+"""Tracking deploys until Netlify serves them"""
+
+import threading
+import time
+
+import readiness
+from readiness import ReadinessTracker
+
+
+class FakeDeploys:
+    """Hands out a scripted sequence of states per deploy, counting calls"""
+
+    def __init__(self, *states):
+        self.states = list(states)
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, deploy_id):
+        with self.lock:
+            self.calls += 1
+            state = self.states.pop(0) if len(self.states) > 1 else self.states[0]
+        if state is None:
+            return None
+        return {'id': deploy_id, 'state': state, 'ssl_url': 'https://example.netlify.app',
+                'error_message': 'Build failed' if state == 'error' else None}
+
+
+def tracker(fetch, **kwargs):
+    kwargs.setdefault('initial_interval', 0.01)
+    kwargs.setdefault('max_interval', 0.02)
+    return ReadinessTracker(fetch, **kwargs)
+
+
+def test_waiters_share_one_poll_per_check():
+    fetch = FakeDeploys('processing', 'processing', 'ready')
+    deploys = tracker(fetch)
+    deploys.track('abc123', 'uploaded')
+
+    results = []
+    waiters = [threading.Thread(target=lambda: results.append(deploys.wait('abc123', 5))) for _ in range(5)]
+    for waiter in waiters:
+        waiter.start()
+    for waiter in waiters:
+        waiter.join()
+
+    assert [result['state'] for result in results] == [readiness.READY] * 5
+    assert fetch.calls == 3
+    assert deploys.stats()['settled'] == {readiness.READY: 1}
+
+
+def test_failed_unknown_and_stuck_deploys_settle():
+    failed = tracker(FakeDeploys('error')).wait('failed1', 5)
+    assert failed['state'] == 'error' and failed['error'] == 'Build failed'
+
+    assert tracker(FakeDeploys(None)).wait('unknown1', 5)['state'] == readiness.NOT_FOUND
+
+    stuck = tracker(FakeDeploys('processing'), max_age=0.05).wait('stuck1', 5)
+    assert stuck['state'] == readiness.TIMED_OUT
+
+
+def test_unsettled_wait_returns_after_its_timeout():
+    deploys = tracker(FakeDeploys('processing'), max_interval=10)
+    started = time.monotonic()
+    assert deploys.wait('slow1', 0.05)['state'] == 'processing'
+    assert time.monotonic() - started < 1
+
+
+def test_tracker_is_bounded():
+    deploys = tracker(FakeDeploys('processing'), max_tracked=2, initial_interval=60)
+    deploys.track('settled1', readiness.READY)
+    oldest = deploys.track('waiting1', 'uploaded')
+    # The settled deploy goes first
+    deploys.track('waiting2', 'uploaded')
+    assert oldest.state == 'uploaded'
+    # With none settled, the oldest is given up on
+    deploys.track('waiting3', 'uploaded')
+    assert oldest.state == readiness.TIMED_OUT
+
+    stats = deploys.stats()
+    assert stats['tracked'] == 2
+    assert stats['evicted'] == 2
+
+
+def test_ready_endpoint_reports_a_finished_deploy(client, deploy_payload):
+    result = client.post('/api/deploy', json=deploy_payload()).get_json()
+    response = client.get(result['ready_url'] + '&timeout=5')
+    assert response.status_code == 200
+    assert response.get_json()['state'] == readiness.READY
+    assert client.get(f"/api/deploy/{result['deploy_id']}/ready?token=wrong").status_code == 404
@@ -0,0 +1,45 @@
+"""Rendering the landing page and its stylesheet"""
+
+
+def test_theme_stylesheet_cache_tells_empty_colors_apart(app_module):
+    generator = app_module.HTMLGenerator
+    empty = generator.generate_theme_stylesheet({'name': 'Empty', 'colors': {}})
+    extra = generator.generate_theme_stylesheet({'name': 'Extra', 'colors': {'extra': '#000'}})
+
+    # theme.css only draws the gradient when ``colors`` isn't empty
+    assert 'linear-gradient(135deg,  0%,  100%)' not in empty
+    assert 'linear-gradient(135deg,  0%,  100%)' in extra
+    assert generator.theme_stylesheet_key({'colors': {}}) != generator.theme_stylesheet_key({'colors': {'extra': '#000'}})
+
+
+def test_theme_stylesheet_skips_the_cache_for_colours_that_are_not_strings(app_module):
+    generator = app_module.HTMLGenerator
+    assert generator.theme_stylesheet_key({'colors': {'primary': 1}}) is None
+    assert 'True' in generator.generate_theme_stylesheet({'colors': {'primary': True}})
+    assert 'True' not in generator.generate_theme_stylesheet({'colors': {'primary': 1}})
+
+
+def test_external_stylesheet_mode_ships_one_shared_asset(app_module, client, netlify, deploy_payload, monkeypatch):
+    monkeypatch.setattr(app_module.config, 'STYLESHEET_MODE', 'external')
+    first = client.post('/api/deploy', json=deploy_payload()).get_json()
+    second = client.post('/api/deploy', json=deploy_payload(title='Same theme, other page')).get_json()
+
+    first_files = netlify.state.deploys[first['deploy_id']]['files']
+    second_files = netlify.state.deploys[second['deploy_id']]['files']
+    assets = [path for path in first_files if path.startswith('/assets/theme.') and path.endswith('.css')]
+    assert len(assets) == 1
+    # Named after its contents, so every site with the theme shares it
+    assert second_files[assets[0]] == first_files[assets[0]]
+
+    html = netlify.state.blobs[first_files['/index.html']].decode('utf-8')
+    assert f'<link rel="stylesheet" href="{assets[0]}">' in html
+    assert '<style>' not in html
+    stylesheet = netlify.state.blobs[first_files[assets[0]]].decode('utf-8')
+    assert deploy_payload()['theme']['colors']['primary'] in stylesheet
+
+
+def test_previews_keep_the_stylesheet_inline_in_external_mode(app_module, client, deploy_payload, monkeypatch):
+    monkeypatch.setattr(app_module.config, 'STYLESHEET_MODE', 'external')
+    html = client.post('/api/preview', json=deploy_payload()).get_json()['html']
+    assert '<style>' in html
+    assert 'rel="stylesheet"' not in html
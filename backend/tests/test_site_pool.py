@@ -0,0 +1,82 @@
+"""The warm pool of pre-created Netlify sites"""
+
+import itertools
+import threading
+import time
+
+from site_pool import SitePool
+
+
+def site_factory():
+    counter = itertools.count()
+    lock = threading.Lock()
+
+    def create_site(name):
+        with lock:
+            return {'id': f'site-{next(counter)}', 'name': name}
+    return create_site
+
+
+def pool(path, create_site, size=4, **kwargs):
+    return SitePool(path, create_site, lambda: 'landing-test', size=size, refill_per_minute=0, **kwargs)
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_workers_fill_one_shared_pool_and_never_share_a_site(tmp_path):
+    path = str(tmp_path / 'pool.sqlite3')
+    create_site = site_factory()
+    workers = [pool(path, create_site) for _ in range(3)]
+    for worker in workers:
+        worker.ensure_started()
+    wait_until(lambda: workers[0].stats()['depth'] == 4)
+    time.sleep(0.1)
+    # Together the workers stop at the target, not three times over
+    assert sum(worker.created for worker in workers) == 4
+
+    sites = [workers[i % 3].acquire() for i in range(4)]
+    assert len({site['id'] for site in sites}) == 4
+    assert workers[0].stats()['hits'] + workers[1].stats()['hits'] + workers[2].stats()['hits'] == 4
+
+
+def test_empty_pool_is_a_miss_and_disabled_pool_does_nothing(tmp_path):
+    path = str(tmp_path / 'pool.sqlite3')
+    empty = pool(path, lambda name: None, size=1)
+    empty._reserve()  # the only slot is taken by a create still in progress
+    assert empty.acquire() is None
+    assert empty.stats()['misses'] == 1
+
+    disabled = pool(path, site_factory(), size=0)
+    assert disabled.acquire() is None
+    assert disabled.stats()['enabled'] is False
+
+
+def test_reservation_of_a_dead_worker_expires(tmp_path):
+    path = str(tmp_path / 'pool.sqlite3')
+    dead = pool(path, site_factory(), size=1, reservation_ttl=0.1)
+    assert dead._reserve() is not None
+    assert dead._reserve() is None
+    time.sleep(0.15)
+    assert dead._reserve() is not None
+
+
+def test_deploy_takes_a_site_from_the_pool(app_module, client, netlify, deploy_payload, monkeypatch, tmp_path):
+    warm = SitePool(str(tmp_path / 'pool.sqlite3'), app_module.netlify_deployer.create_site,
+                    app_module.HTMLGenerator.generate_site_name, size=1, low_watermark=0, refill_per_minute=0)
+    warm.ensure_started()
+    wait_until(lambda: warm.stats()['depth'] == 1)
+    monkeypatch.setattr(app_module, 'site_pool', warm)
+
+    sites_before = set(netlify.state.sites)
+    response = client.post('/api/deploy', json=deploy_payload())
+    assert response.status_code == 200
+    assert response.get_json()['site_id'] in sites_before
+    assert warm.stats()['hits'] == 1
+
+    # Topped back up in the background; wait so no create lands in another test
+    wait_until(lambda: warm.stats()['depth'] == 1)
@@ -0,0 +1,28 @@
+import pytest
+
+from profiling import token_matches
+
+
+@pytest.mark.parametrize('supplied', ['caf\xe9', '☃' * 8, '\ud800', '', None, 42])
+def test_token_matches_rejects_anything_but_the_secret(supplied):
+    assert token_matches('expected-secret', supplied) is False
+
+
+def test_token_matches_accepts_the_secret():
+    assert token_matches('expected-secret', 'expected-secret') is True
+    assert token_matches('', '') is False
+
+
+def test_non_ascii_site_token_is_refused(client, deploy_payload):
+    first = client.post('/api/deploy', json=deploy_payload()).get_json()
+    response = client.post('/api/deploy', json=deploy_payload(site_id=first['site_id'], site_token='t\xe9st'))
+    assert response.status_code == 403
+
+
+def test_non_ascii_ready_token_is_not_found(client):
+    assert client.get('/api/deploy/abc123/ready?token=%C3%A9&timeout=0').status_code == 404
+
+
+def test_non_ascii_admin_token_is_refused(client):
+    response = client.get('/api/history', query_string={'client': '*'}, headers={'X-Admin-Token': 'caf\xe9'})
+    assert response.status_code == 403
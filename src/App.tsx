@@ -6,15 +6,17 @@ import { PreviewStep } from './components/PreviewStep';
 import { DeployStep } from './components/DeployStep';
 import { HistoryStep } from './components/HistoryStep';
 import { HistoryProvider } from './contexts/HistoryContext';
-import { ProjectInfo, ThemeOption, GeneratedPage, Step } from './types';
+import { ProjectInfo, ThemeOption, GeneratedPage, Step, DeploymentRecord } from './types';
 import { buildLandingPage } from './utils/pageGenerator';
-import { Sparkles, Clock } from 'lucide-react';
+import { Sparkles, Clock, RefreshCw } from 'lucide-react';
 
 function AppContent() {
   const [currentStep, setCurrentStep] = useState<Step>('input');
   const [projectInfo, setProjectInfo] = useState<ProjectInfo | null>(null);
   const [selectedTheme, setSelectedTheme] = useState<ThemeOption | null>(null);
   const [generatedPage, setGeneratedPage] = useState<GeneratedPage | null>(null);
+  // A site picked from the history to redeploy; null deploys a new site
+  const [updateTarget, setUpdateTarget] = useState<DeploymentRecord | null>(null);
 
   const steps = ['Project Info', 'Choose Theme', 'Preview', 'Deploy'];
   const stepIndex = steps.findIndex(s => 
@@ -53,6 +55,7 @@ function AppContent() {
     setProjectInfo(null);
     setSelectedTheme(null);
     setGeneratedPage(null);
+    setUpdateTarget(null);
   };
 
   const handleViewHistory = () => {
@@ -64,6 +67,15 @@ function AppContent() {
     setProjectInfo(null);
     setSelectedTheme(null);
     setGeneratedPage(null);
+    setUpdateTarget(null);
+  };
+
+  const handleUpdateSite = (deployment: DeploymentRecord) => {
+    setCurrentStep('input');
+    setProjectInfo(null);
+    setSelectedTheme(null);
+    setGeneratedPage(null);
+    setUpdateTarget(deployment);
   };
 
   const handleBack = () => {
@@ -119,6 +131,26 @@ function AppContent() {
           />
         )}
 
+        {/* Redeploy target, chosen from the history */}
+        {updateTarget && currentStep !== 'history' && (
+          <div className="max-w-3xl mx-auto mb-8 bg-blue-50 border border-blue-200 rounded-lg px-4 py-3 flex items-center justify-between">
+            <div className="flex items-center text-sm text-blue-800 min-w-0">
+              <RefreshCw className="w-4 h-4 mr-2 flex-shrink-0" />
+              <span className="truncate">
+                Updating {updateTarget.url.replace('https://', '')}
+              </span>
+            </div>
+            {currentStep !== 'deploy' && (
+              <button
+                onClick={() => setUpdateTarget(null)}
+                className="ml-4 text-sm font-medium text-blue-600 hover:text-blue-700 transition-colors flex-shrink-0"
+              >
+                Deploy as a new site instead
+              </button>
+            )}
+          </div>
+        )}
+
         {/* Step Content */}
         <div className="max-w-7xl mx-auto">
           {currentStep === 'input' && (
@@ -148,6 +180,7 @@ function AppContent() {
               projectDescription={projectInfo.projectDescription}
               selectedTheme={selectedTheme}
               generatedPage={generatedPage}
+              updateSite={updateTarget}
               onBack={handleBack}
               onRestart={handleRestart}
               onViewHistory={handleViewHistory}
@@ -157,6 +190,7 @@ function AppContent() {
           {currentStep === 'history' && (
             <HistoryStep
               onCreateNew={handleCreateNew}
+              onUpdateSite={handleUpdateSite}
               onBack={handleBack}
             />
           )}
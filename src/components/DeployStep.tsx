@@ -1,7 +1,8 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { CheckCircle, Globe, Copy, ExternalLink, Sparkles, AlertCircle, Clock } from 'lucide-react';
-import type { GeneratedPage, ThemeOption } from '../types';
-import { deployLandingPage } from '../services/api';
+import type { DeploymentRecord, GeneratedPage, ThemeOption } from '../types';
+import { deployLandingPage, waitForDeployReady } from '../services/api';
+import type { DeployReadiness } from '../services/api';
 import { useHistory } from '../contexts/HistoryContext';
 
 // Backend API configuration
@@ -12,6 +13,8 @@ interface DeployStepProps {
   projectDescription: string;
   selectedTheme: ThemeOption;
   generatedPage?: GeneratedPage | null;
+  // History record of the site to redeploy; a new site is created without one
+  updateSite?: DeploymentRecord | null;
   onBack: () => void;
   onRestart: () => void;
   onViewHistory: () => void;
@@ -22,6 +25,7 @@ export const DeployStep: React.FC<DeployStepProps> = ({
   projectDescription,
   selectedTheme,
   generatedPage, 
+  updateSite,
   onBack, 
   onRestart,
   onViewHistory
@@ -35,7 +39,25 @@ export const DeployStep: React.FC<DeployStepProps> = ({
   
   const { addDeployment } = useHistory();
 
+  // The request body this component last deployed and the Idempotency-Key
+  // sent with it. A re-run of the effect with the same body (React may run
+  // effects twice) must not deploy again; a different body gets a new key,
+  // since the backend rejects a key reused with a different request.
+  const deployRef = useRef<{ body: string; idempotencyKey: string } | null>(null);
+
   useEffect(() => {
+    const site = updateSite?.siteToken
+      ? { siteId: updateSite.siteId, siteToken: updateSite.siteToken }
+      : undefined;
+    const body = JSON.stringify({ projectName, projectDescription, selectedTheme, site });
+    if (deployRef.current?.body === body) {
+      return;
+    }
+    const idempotencyKey = typeof crypto !== 'undefined' && 'randomUUID' in crypto
+      ? crypto.randomUUID()
+      : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    deployRef.current = { body, idempotencyKey };
+
     const deployToNetlify = async () => {
       const steps = [
         'Preparing deployment files...',
@@ -72,9 +94,30 @@ export const DeployStep: React.FC<DeployStepProps> = ({
         setCurrentStep('Deploying to Netlify...');
         setProgress(90);
 
-        const data = await deployLandingPage(projectName, projectDescription, selectedTheme);
+        const data = await deployLandingPage(
+          projectName,
+          projectDescription,
+          selectedTheme,
+          site,
+          idempotencyKey
+        );
 
         if (data.success) {
+          if (data.state !== 'ready' && data.ready_url) {
+            // Netlify serves 404s until the deploy has finished processing
+            setCurrentStep('Waiting for Netlify to publish your site...');
+            setProgress(95);
+            let readiness: DeployReadiness | undefined;
+            try {
+              readiness = await waitForDeployReady(data.ready_url);
+            } catch (readyErr) {
+              console.warn('Could not confirm the site is live:', readyErr);
+            }
+            if (readiness && (readiness.state === 'error' || readiness.state === 'rejected')) {
+              throw new Error(readiness.error || 'Netlify failed to publish the site');
+            }
+          }
+
           setProgress(100);
           setCurrentStep('Deployment successful!');
           setDeployUrl(data.url);
@@ -89,6 +132,7 @@ export const DeployStep: React.FC<DeployStepProps> = ({
             adminUrl: data.admin_url,
             deployedAt: data.deployed_at,
             siteId: data.site_id,
+            siteToken: data.site_token,
             deployId: data.deploy_id
           });
           
@@ -107,7 +151,7 @@ export const DeployStep: React.FC<DeployStepProps> = ({
     };
 
     deployToNetlify();
-  }, [projectName, projectDescription, selectedTheme, generatedPage, addDeployment]);
+  }, [projectName, projectDescription, selectedTheme, updateSite, addDeployment]);
 
   const copyToClipboard = () => {
     if (deployUrl) {
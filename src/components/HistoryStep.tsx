@@ -1,5 +1,6 @@
 import React, { useState } from 'react';
 import { useHistory } from '../contexts/HistoryContext';
+import type { DeploymentRecord } from '../types';
 import { 
   Clock, 
   ExternalLink, 
@@ -9,15 +10,17 @@ import {
   Palette,
   Plus,
   AlertCircle,
-  Check
+  Check,
+  RefreshCw
 } from 'lucide-react';
 
 interface HistoryStepProps {
   onCreateNew: () => void;
+  onUpdateSite: (deployment: DeploymentRecord) => void;
   onBack: () => void;
 }
 
-export const HistoryStep: React.FC<HistoryStepProps> = ({ onCreateNew, onBack }) => {
+export const HistoryStep: React.FC<HistoryStepProps> = ({ onCreateNew, onUpdateSite, onBack }) => {
   const { deployments, removeDeployment, clearHistory } = useHistory();
   const [copiedUrl, setCopiedUrl] = useState<string | null>(null);
   const [showClearConfirm, setShowClearConfirm] = useState(false);
@@ -209,6 +212,17 @@ export const HistoryStep: React.FC<HistoryStepProps> = ({ onCreateNew, onBack })
                 </button>
               </div>
 
+              {/* Only sites this browser holds a site token for can be updated */}
+              {deployment.siteToken && (
+                <button
+                  onClick={() => onUpdateSite(deployment)}
+                  className="w-full mt-2 border border-blue-200 hover:bg-blue-50 text-blue-600 text-sm font-medium py-2 px-3 rounded-lg transition-colors flex items-center justify-center space-x-1"
+                >
+                  <RefreshCw className="w-4 h-4" />
+                  <span>Update this site</span>
+                </button>
+              )}
+
               {/* Admin URL if available */}
               {deployment.adminUrl && (
                 <a
@@ -1,10 +1,61 @@
-import React, { createContext, useContext, useState, useEffect, ReactNode } from 'react';
+import React, { createContext, useContext, useState, useEffect, useCallback, useMemo, ReactNode } from 'react';
 import { DeploymentRecord, HistoryContextType } from '../types';
+import { fetchDeploymentHistory, HistoryEntry } from '../services/api';
 
 const HistoryContext = createContext<HistoryContextType | undefined>(undefined);
 
 const STORAGE_KEY = 'bolt-landing-page-history';
 
+// Deploys the user removed, and when they last cleared the history, so the
+// server's copy doesn't bring them back on the next load
+const DISMISSED_KEY = 'bolt-landing-page-history-dismissed';
+const MAX_DISMISSED = 500;
+
+interface DismissedHistory {
+  deployIds: string[];
+  clearedAt: string | null;
+}
+
+const loadDismissed = (): DismissedHistory => {
+  try {
+    const parsed = JSON.parse(localStorage.getItem(DISMISSED_KEY) || 'null');
+    if (parsed && Array.isArray(parsed.deployIds)) {
+      return { deployIds: parsed.deployIds, clearedAt: parsed.clearedAt ?? null };
+    }
+  } catch (error) {
+    console.error('Error loading dismissed deployments:', error);
+  }
+  return { deployIds: [], clearedAt: null };
+};
+
+const saveDismissed = (dismissed: DismissedHistory) => {
+  try {
+    localStorage.setItem(DISMISSED_KEY, JSON.stringify({
+      ...dismissed,
+      deployIds: dismissed.deployIds.slice(-MAX_DISMISSED),
+    }));
+  } catch (error) {
+    console.error('Error saving dismissed deployments:', error);
+  }
+};
+
+const isDismissed = (entry: HistoryEntry, dismissed: DismissedHistory) =>
+  (entry.deploy_id !== null && dismissed.deployIds.includes(entry.deploy_id)) ||
+  (dismissed.clearedAt !== null && Date.parse(entry.created_at) <= Date.parse(dismissed.clearedAt));
+
+const fromHistoryEntry = (entry: HistoryEntry): DeploymentRecord => ({
+  id: `server-${entry.id}`,
+  projectName: entry.title,
+  projectDescription: entry.description,
+  themeName: entry.theme || 'default',
+  url: entry.url || '',
+  adminUrl: entry.admin_url || undefined,
+  deployedAt: entry.created_at,
+  siteId: entry.site_id,
+  siteToken: entry.site_token,
+  deployId: entry.deploy_id || '',
+});
+
 interface HistoryProviderProps {
   children: ReactNode;
 }
@@ -27,6 +78,35 @@ export const HistoryProvider: React.FC<HistoryProviderProps> = ({ children }) =>
     }
   }, []);
 
+  // The backend logs every deploy from this browser; add the recent ones
+  // missing here, e.g. after localStorage was cleared
+  useEffect(() => {
+    let cancelled = false;
+    fetchDeploymentHistory()
+      .then((page) => {
+        if (cancelled) {
+          return;
+        }
+        const dismissed = loadDismissed();
+        setDeployments(prev => {
+          const known = new Set(prev.map(deployment => deployment.deployId));
+          const missing = page.deployments
+            .filter(entry => entry.deploy_id && !known.has(entry.deploy_id) && !isDismissed(entry, dismissed))
+            .map(fromHistoryEntry);
+          if (missing.length === 0) {
+            return prev;
+          }
+          return [...prev, ...missing].sort((a, b) => b.deployedAt.localeCompare(a.deployedAt));
+        });
+      })
+      .catch((error) => {
+        console.warn('Could not load deployment history from the server:', error);
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, []);
+
   // Save to localStorage whenever deployments change
   useEffect(() => {
     try {
@@ -36,29 +116,47 @@ export const HistoryProvider: React.FC<HistoryProviderProps> = ({ children }) =>
     }
   }, [deployments]);
 
-  const addDeployment = (deployment: Omit<DeploymentRecord, 'id'>) => {
+  // Stable identities, so components can list these as effect dependencies
+  // without re-running the effect on every history change
+  const addDeployment = useCallback((deployment: Omit<DeploymentRecord, 'id'>) => {
     const newDeployment: DeploymentRecord = {
       ...deployment,
       id: Date.now().toString() + Math.random().toString(36).substr(2, 9),
     };
     
     setDeployments(prev => [newDeployment, ...prev]); // Add to beginning for newest first
-  };
+  }, []);
 
-  const removeDeployment = (id: string) => {
-    setDeployments(prev => prev.filter(deployment => deployment.id !== id));
-  };
+  const removeDeployment = useCallback((id: string) => {
+    setDeployments(prev => {
+      const removed = prev.find(deployment => deployment.id === id);
+      const dismissed = loadDismissed();
+      if (removed?.deployId && !dismissed.deployIds.includes(removed.deployId)) {
+        saveDismissed({ ...dismissed, deployIds: [...dismissed.deployIds, removed.deployId] });
+      }
+      return prev.filter(deployment => deployment.id !== id);
+    });
+  }, []);
 
-  const clearHistory = () => {
-    setDeployments([]);
-  };
+  const clearHistory = useCallback(() => {
+    // Everything deployed up to now stays hidden, including server pages
+    // this browser never loaded; the ids cover records whose server
+    // timestamp is ahead of this browser's clock
+    setDeployments(prev => {
+      saveDismissed({
+        deployIds: prev.map(deployment => deployment.deployId).filter(Boolean),
+        clearedAt: new Date().toISOString(),
+      });
+      return [];
+    });
+  }, []);
 
-  const value: HistoryContextType = {
+  const value: HistoryContextType = useMemo(() => ({
     deployments,
     addDeployment,
     removeDeployment,
     clearHistory,
-  };
+  }), [deployments, addDeployment, removeDeployment, clearHistory]);
 
   return (
     <HistoryContext.Provider value={value}>
@@ -7,12 +7,26 @@ export interface DeployRequest {
   title: string;
   description: string;
   theme?: ThemeOption;
+  site_id?: string;
+  site_token?: string;
+}
+
+// A site deployed earlier, updated in place instead of creating a new one
+export interface ExistingSite {
+  siteId: string;
+  siteToken: string;
 }
 
 export interface DeployResponse {
   success: boolean;
   site_id: string;
+  site_token?: string;
   deploy_id: string;
+  updated?: boolean;
+  unchanged?: boolean;
+  uploaded_files?: number;
+  state?: string;
+  ready_url?: string;
   url: string;
   admin_url?: string;
   title: string;
@@ -22,6 +36,15 @@ export interface DeployResponse {
   message?: string;
 }
 
+export interface DeployReadiness {
+  deploy_id: string;
+  state: string;
+  ready: boolean;
+  url?: string;
+  polls: number;
+  error?: string;
+}
+
 export interface PreviewRequest {
   title: string;
   description: string;
@@ -37,11 +60,102 @@ export interface PreviewResponse {
   message?: string;
 }
 
+export interface HistoryEntry {
+  id: number;
+  site_id: string;
+  site_token?: string;
+  deploy_id: string | null;
+  title: string;
+  description: string;
+  theme: string | null;
+  url: string | null;
+  admin_url: string | null;
+  updated: boolean;
+  created_at: string;
+}
+
+export interface HistoryPage {
+  deployments: HistoryEntry[];
+  next_cursor: string | null;
+  limit: number;
+}
+
 export interface APIError {
   error: string;
   message: string;
 }
 
+// Id for this browser, sent as X-Client-Id so the backend's deployment
+// history follows the browser. The backend issues (and signs) it once;
+// older unsigned ids kept here are replaced.
+const CLIENT_ID_KEY = 'bolt-landing-page-client-id';
+
+let clientIdRequest: Promise<string> | null = null;
+
+export const getClientId = (): Promise<string> => {
+  const stored = localStorage.getItem(CLIENT_ID_KEY);
+  if (stored && stored.includes('.')) {
+    return Promise.resolve(stored);
+  }
+  if (!clientIdRequest) {
+    clientIdRequest = fetch(`${API_BASE_URL}/api/client`, { method: 'POST' })
+      .then(async (response) => {
+        const data = await response.json();
+        if (!response.ok) {
+          throw new Error(data.message || data.error || 'Failed to get a client id');
+        }
+        localStorage.setItem(CLIENT_ID_KEY, data.client_id);
+        return data.client_id as string;
+      })
+      .finally(() => {
+        clientIdRequest = null;
+      });
+  }
+  return clientIdRequest;
+};
+
+// Preview responses carry an ETag; remembering the last few lets a
+// re-fetch of the same preview come back as an empty 304
+const PREVIEW_CACHE_SIZE = 20;
+const previewCache = new Map<string, { etag: string; data: PreviewResponse }>();
+
+const fetchPreview = async (baseUrl: string, body: string): Promise<PreviewResponse> => {
+  const cached = previewCache.get(body);
+  const headers: Record<string, string> = {
+    'Content-Type': 'application/json',
+  };
+  if (cached) {
+    headers['If-None-Match'] = cached.etag;
+  }
+
+  const response = await fetch(`${baseUrl}/api/preview`, {
+    method: 'POST',
+    headers,
+    body
+  });
+
+  if (response.status === 304 && cached) {
+    return cached.data;
+  }
+
+  const data = await response.json();
+
+  if (!response.ok) {
+    throw new Error(data.message || data.error || 'Preview generation failed');
+  }
+
+  const etag = response.headers.get('ETag');
+  if (etag) {
+    previewCache.delete(body);
+    previewCache.set(body, { etag, data });
+    if (previewCache.size > PREVIEW_CACHE_SIZE) {
+      previewCache.delete(previewCache.keys().next().value as string);
+    }
+  }
+
+  return data;
+};
+
 class APIService {
   private baseUrl: string;
 
@@ -74,21 +188,7 @@ class APIService {
 
   async previewLandingPage(data: PreviewRequest): Promise<PreviewResponse> {
     try {
-      const response = await fetch(`${this.baseUrl}/api/preview`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(data)
-      });
-
-      const result = await response.json();
-
-      if (!response.ok) {
-        throw new Error(result.message || result.error || 'Preview generation failed');
-      }
-
-      return result;
+      return await fetchPreview(this.baseUrl, JSON.stringify(data));
     } catch (error) {
       console.error('Preview API error:', error);
       throw new Error(error instanceof Error ? error.message : 'Network error occurred');
@@ -146,18 +246,34 @@ export const formatDeployData = (projectName: string, projectDescription?: strin
 export const deployLandingPage = async (
   title: string,
   description: string,
-  theme?: ThemeOption
+  theme?: ThemeOption,
+  site?: ExistingSite,
+  idempotencyKey?: string
 ): Promise<DeployResponse> => {
   try {
+    const headers: Record<string, string> = {
+      'Content-Type': 'application/json',
+    };
+    try {
+      headers['X-Client-Id'] = await getClientId();
+    } catch (clientIdError) {
+      // The deploy still works; it just won't show up in the server history
+      console.warn('Could not get a client id:', clientIdError);
+    }
+    if (idempotencyKey) {
+      // Repeats of this deploy get the first response instead of a new site
+      headers['Idempotency-Key'] = idempotencyKey;
+    }
+
     const response = await fetch(`${API_BASE_URL}/api/deploy`, {
       method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
+      headers,
       body: JSON.stringify({
         title,
         description,
         theme,
+        site_id: site?.siteId,
+        site_token: site?.siteToken,
       }),
     });
 
@@ -179,26 +295,67 @@ export const previewLandingPage = async (
   theme?: ThemeOption
 ): Promise<PreviewResponse> => {
   try {
-    const response = await fetch(`${API_BASE_URL}/api/preview`, {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
-      body: JSON.stringify({
-        title,
-        description,
-        theme,
-      }),
-    });
+    return await fetchPreview(API_BASE_URL, JSON.stringify({
+      title,
+      description,
+      theme,
+    }));
+  } catch (error) {
+    throw new Error(error instanceof Error ? error.message : 'Network error occurred');
+  }
+}; 
+// Long-polls the backend, which checks Netlify on the client's behalf, until
+// the deploy is live; each request waits up to `waitSeconds` server-side.
+// `readyUrl` is the deploy response's ready_url, which carries the token
+// the backend requires.
+export const waitForDeployReady = async (
+  readyUrl: string,
+  maxWaitMs: number = 120000,
+  waitSeconds: number = 25
+): Promise<DeployReadiness> => {
+  const deadline = Date.now() + maxWaitMs;
+  const url = new URL(readyUrl, API_BASE_URL);
 
+  while (true) {
+    const remaining = Math.max(0, Math.min(waitSeconds, (deadline - Date.now()) / 1000));
+    url.searchParams.set('timeout', remaining.toFixed(1));
+    const response = await fetch(url.toString());
     const data = await response.json();
 
+    if (response.status === 202) {
+      if (Date.now() >= deadline) {
+        return data;
+      }
+      continue;
+    }
+
     if (!response.ok) {
-      throw new Error(data.message || data.error || 'Preview generation failed');
+      throw new Error(data.message || data.error || 'Failed to check deploy status');
     }
 
     return data;
-  } catch (error) {
-    throw new Error(error instanceof Error ? error.message : 'Network error occurred');
   }
-}; 
\ No newline at end of file
+};
+
+// One page of this browser's deploys from the backend, newest first; pass
+// the previous page's next_cursor to continue
+export const fetchDeploymentHistory = async (
+  cursor?: string | null,
+  limit: number = 50
+): Promise<HistoryPage> => {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (cursor) {
+    params.set('cursor', cursor);
+  }
+
+  const response = await fetch(`${API_BASE_URL}/api/history?${params}`, {
+    headers: { 'X-Client-Id': await getClientId() },
+  });
+  const data = await response.json();
+
+  if (!response.ok) {
+    throw new Error(data.message || data.error || 'Failed to load deployment history');
+  }
+
+  return data;
+};
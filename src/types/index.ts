@@ -48,6 +48,7 @@ export interface DeploymentRecord {
   adminUrl?: string;
   deployedAt: string;
   siteId: string;
+  siteToken?: string;
   deployId: string;
 }
 
@@ -2,13 +2,91 @@
 """
 End-to-end test script for the Landing Page Generator system.
 Tests the API endpoints and deployment functionality.
+
+With --load it becomes a load generator instead: concurrent workers (or an
+open-loop arrival rate) send a weighted mix of preview, deploy and health
+requests with randomized payloads, and the run is reported as throughput,
+latency percentiles and error/429 rates, optionally exported as JSON.
 """
 
 import json
+import math
+import random
 import requests
+import threading
 import time
 import sys
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+LOAD_OPERATIONS = ('preview', 'deploy', 'health')
+
+WORDS = (
+    'acme', 'analytics', 'cloud', 'studio', 'labs', 'pixel', 'rocket', 'garden',
+    'coffee', 'fitness', 'travel', 'finance', 'design', 'health', 'robotics', 'music'
+)
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse a request mix like "preview=8,deploy=1,health=1" into weights."""
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in LOAD_OPERATIONS:
+            raise ValueError(f"Unknown operation in mix: {name!r} (expected one of {', '.join(LOAD_OPERATIONS)})")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError('Request mix needs at least one positive weight')
+    return mix
+
+
+class LoadResults:
+    """Thread-safe collection of (operation, status, latency) samples."""
+
+    def __init__(self):
+        self.samples = []
+        self.lock = threading.Lock()
+
+    def record(self, operation: str, status: Optional[int], latency: float):
+        with self.lock:
+            self.samples.append((operation, status, latency))
+
+    @staticmethod
+    def summarize(samples, elapsed: float) -> Dict[str, Any]:
+        latencies = sorted(latency for _, _, latency in samples)
+        total = len(samples)
+        rate_limited = sum(1 for _, status, _ in samples if status == 429)
+        # Transport failures (status None) and any other 4xx/5xx count as errors
+        errors = sum(1 for _, status, _ in samples if status is None or (status >= 400 and status != 429))
+        return {
+            'requests': total,
+            'throughput_rps': round(total / elapsed, 2) if elapsed else 0.0,
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+            'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+            'error_rate': round(errors / total, 4) if total else 0.0,
+            'rate_limited_rate': round(rate_limited / total, 4) if total else 0.0
+        }
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        with self.lock:
+            samples = list(self.samples)
+        report = {'overall': self.summarize(samples, elapsed), 'operations': {}}
+        for operation in LOAD_OPERATIONS:
+            operation_samples = [sample for sample in samples if sample[0] == operation]
+            if operation_samples:
+                report['operations'][operation] = self.summarize(operation_samples, elapsed)
+        return report
+
 
 class SystemTester:
     def __init__(self, base_url: str = "http://localhost:5000"):
@@ -17,6 +95,7 @@ class SystemTester:
             "title": "Test Landing Page",
             "description": "This is a test landing page created by the automated testing system. It includes all the standard features and should deploy successfully to Netlify."
         }
+        self._local = threading.local()
     
     def test_health_check(self) -> bool:
         """Test the health check endpoint."""
@@ -195,6 +274,134 @@ class SystemTester:
         
         return results
 
+    def _session(self) -> requests.Session:
+        """One keep-alive session per load worker thread."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+    
+    @staticmethod
+    def random_payload(rng: random.Random) -> Dict[str, Any]:
+        """A randomized title, description and (sometimes) custom theme."""
+        title = ' '.join(rng.choice(WORDS).title() for _ in range(rng.randint(1, 4)))
+        description = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 60)))
+        payload = {'title': title, 'description': description.capitalize() + '.'}
+        if rng.random() < 0.7:
+            color = lambda: '#%06X' % rng.randrange(0x1000000)
+            payload['theme'] = {
+                'id': 'load-test',
+                'name': f'Load {rng.randrange(1000)}',
+                'colors': {
+                    'primary': color(),
+                    'secondary': color(),
+                    'accent': color(),
+                    'text': color(),
+                    'background': color()
+                }
+            }
+        return payload
+    
+    def send(self, operation: str, payload: Dict[str, Any], timeout: float) -> Optional[int]:
+        """Send one load-test request; returns the status, or None on a transport error."""
+        session = self._session()
+        try:
+            if operation == 'health':
+                response = session.get(f"{self.base_url}/health", timeout=timeout)
+            else:
+                response = session.post(f"{self.base_url}/api/{operation}", json=payload, timeout=timeout)
+            response.content  # read the full body, as a real client would
+            return response.status_code
+        except requests.RequestException:
+            return None
+    
+    def run_load_test(self, concurrency: int = 10, duration: float = 30.0, mix: Optional[Dict[str, float]] = None,
+                      rate: float = 0.0, timeout: float = 60.0, seed: Optional[int] = None) -> Dict[str, Any]:
+        """Generate load and return a throughput/latency report.
+        
+        With rate == 0 the test is closed-loop: ``concurrency`` workers each
+        send the next request as soon as the previous one finishes. With a
+        rate, arrivals follow a Poisson process at ``rate`` requests/second
+        regardless of how fast the server answers (open loop), up to
+        ``concurrency`` in flight; latency is measured from each request's
+        scheduled arrival, so queueing behind a slow server is counted.
+        """
+        mix = mix or {'preview': 1.0}
+        operations = list(mix)
+        weights = [mix[operation] for operation in operations]
+        results = LoadResults()
+        rng = random.Random(seed)
+        rng_lock = threading.Lock()
+        
+        def next_request():
+            with rng_lock:
+                operation = rng.choices(operations, weights)[0]
+                return operation, self.random_payload(rng)
+        
+        def execute(operation, payload, scheduled):
+            status = self.send(operation, payload, timeout)
+            results.record(operation, status, time.perf_counter() - scheduled)
+        
+        mode = f"open loop at {rate:g} req/s" if rate else "closed loop"
+        print(f"🏋️  Load test: {mode}, concurrency {concurrency}, {duration:g}s, mix {mix}")
+        if mix.get('deploy'):
+            print("⚠️  The mix includes deploys; point the backend at fake_netlify.py unless you want real sites!")
+        
+        start = time.perf_counter()
+        deadline = start + duration
+        
+        if rate:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                scheduled = start
+                while True:
+                    with rng_lock:
+                        scheduled += rng.expovariate(rate)
+                    if scheduled >= deadline:
+                        break
+                    delay = scheduled - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    operation, payload = next_request()
+                    executor.submit(execute, operation, payload, scheduled)
+        else:
+            def worker():
+                while time.perf_counter() < deadline:
+                    operation, payload = next_request()
+                    execute(operation, payload, time.perf_counter())
+            
+            threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        
+        elapsed = time.perf_counter() - start
+        report = results.report(elapsed)
+        report['config'] = {
+            'base_url': self.base_url,
+            'concurrency': concurrency,
+            'duration_s': duration,
+            'rate_rps': rate,
+            'mix': mix,
+            'seed': seed,
+            'elapsed_s': round(elapsed, 3)
+        }
+        self.print_load_report(report)
+        return report
+    
+    @staticmethod
+    def print_load_report(report: Dict[str, Any]):
+        """Print a load-test report as a table."""
+        print("📊 Load Test Results")
+        print("=" * 96)
+        print(f"{'operation':<10} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} "
+              f"{'p99 ms':>9} {'max ms':>9} {'errors':>8} {'429s':>8}")
+        rows = list(report['operations'].items()) + [('overall', report['overall'])]
+        for name, stats in rows:
+            print(f"{name:<10} {stats['requests']:>9} {stats['throughput_rps']:>9.1f} {stats['p50_ms']:>9.1f} "
+                  f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f} "
+                  f"{stats['error_rate']:>8.2%} {stats['rate_limited_rate']:>8.2%}")
+
 def main():
     """Main function."""
     import argparse
@@ -204,10 +411,39 @@ def main():
     parser.add_argument('--deploy', action='store_true', help='Include actual deployment test')
     parser.add_argument('--quick', action='store_true', help='Run only health check and preview tests')
     
+    load = parser.add_argument_group('load mode')
+    load.add_argument('--load', action='store_true', help='Run a load test instead of the functional tests')
+    load.add_argument('--concurrency', type=int, default=10, help='Concurrent workers (max in flight with --rate)')
+    load.add_argument('--duration', type=float, default=30, help='Test duration in seconds')
+    load.add_argument('--mix', default='preview=8,health=2', help='Weighted request mix, e.g. preview=8,deploy=1,health=1')
+    load.add_argument('--rate', type=float, default=0, help='Open-loop arrival rate in requests/second (0 = closed loop)')
+    load.add_argument('--timeout', type=float, default=60, help='Per-request timeout in seconds')
+    load.add_argument('--seed', type=int, help='Seed for payloads, mix and arrivals')
+    load.add_argument('--json-out', help='Write the load report to this JSON file')
+    
     args = parser.parse_args()
     
     tester = SystemTester(args.url)
     
+    if args.load:
+        try:
+            mix = parse_mix(args.mix)
+        except ValueError as e:
+            parser.error(str(e))
+        report = tester.run_load_test(
+            concurrency=args.concurrency,
+            duration=args.duration,
+            mix=mix,
+            rate=args.rate,
+            timeout=args.timeout,
+            seed=args.seed
+        )
+        if args.json_out:
+            with open(args.json_out, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"💾 Report written to {args.json_out}")
+        return
+    
     if args.quick:
         print("🏃‍♂️ Running quick tests only...")
         results = {